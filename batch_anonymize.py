@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Headless batch anonymization of a whole directory.
+Loads the detector once, anonymizes the documents concurrently and writes one
+JSON per document (anonymized text, placeholder mapping, entities and
+statistics). Ends with the aggregate throughput of the run.
+
+Usage:
+    python batch_anonymize.py large_documents/ --output-dir output/batch --workers 4
+    python batch_anonymize.py "notes/**/*.txt.gz" --output-dir output/notes --regex-only
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List
+
+from components.anonymizer import Anonymizer
+from components.entity_mapper import EntityMapper
+from components.input_text import open_text
+from components.model_server import entity_to_dict
+from components.statistics_generator import StatisticsAggregator, StatisticsGenerator
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "Jean-Baptiste/roberta-large-ner-english"
+INPUT_SUFFIXES = ('.txt', '.txt.gz', '.txt.bz2', '.txt.xz')  # files picked up from directory inputs
+
+
+# input directories, glob patterns or file paths
+def collect_inputs(inputs: List[str]) -> List[Path]:
+    files = set()
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            files.update(path for path in Path(pattern).rglob("*")
+                         if path.is_file() and path.name.lower().endswith(INPUT_SUFFIXES))
+        else:
+            files.update(Path(path) for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+    return sorted(files)
+# output sorted, distinct document paths
+
+
+def output_paths(files: List[Path], output_dir: Path) -> Dict[Path, Path]:
+    """One <relative path>.json per document, relative to the deepest folder shared by all inputs."""
+    if not files:
+        return {}
+    root = os.path.commonpath([str(path.resolve().parent) for path in files])
+    return {path: output_dir / (os.path.relpath(path.resolve(), root) + ".json") for path in files}
+
+
+def anonymize_document(path: Path, output_path: Path, detector, store=None, placeholder_key=None) -> Dict:
+    """Detect, anonymize and write one document; returns its sizes and timing for the summary."""
+    start = time.perf_counter()
+    with open_text(path) as f:
+        text = f.read()
+    entities = detector.detect_entities_full_text(text)
+    # placeholders are numbered per document, shared through the store, or derived from the key
+    mapper = EntityMapper(store=store, key=placeholder_key)
+    anonymizer = Anonymizer(text, entities, mapper)
+    anonymizer.anonymize()
+    aggregator = StatisticsAggregator().add(entities)
+    statistics = StatisticsGenerator.generate_statistics(entities, mapper.get_mapping(), aggregator)
+    processing_time = time.perf_counter() - start
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'source': str(path),
+            'anonymized_text': anonymizer.result_text,
+            'mapping': mapper.get_mapping(),
+            'entities': [entity_to_dict(e) for e in entities],
+            'statistics': statistics,
+            'processing_time': processing_time,
+        }, f, ensure_ascii=False, indent=2, default=float)  # default=float: numpy confidences
+    return {'bytes': len(text.encode('utf-8')), 'entities': len(entities), 'seconds': processing_time,
+            'aggregator': aggregator}
+
+
+# input document paths, a loaded detector, the number of documents in flight, an optional pseudonym store or placeholder key
+def run_batch(files: List[Path], output_dir: Path, detector, workers: int = 1, store=None, placeholder_key=None) -> Dict:
+    targets = output_paths(files, Path(output_dir))
+    summary = {'documents': 0, 'failed': [], 'bytes': 0, 'entities': 0}
+    aggregator = StatisticsAggregator()  # per-document statistics merged into the run's
+    start = time.perf_counter()
+    # threads share the detector; a local EntityDetector serializes its NER passes with its model_lock
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(anonymize_document, path, targets[path], detector, store, placeholder_key): path for path in files}
+        for done, future in enumerate(as_completed(futures), 1):
+            path = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"[{done}/{len(files)}] {path} failed: {e}")
+                summary['failed'].append(str(path))
+                continue
+            summary['documents'] += 1
+            summary['bytes'] += result['bytes']
+            summary['entities'] += result['entities']
+            aggregator.merge(result['aggregator'])
+            logger.info(f"[{done}/{len(files)}] {path}: {result['entities']} entities in {result['seconds']:.2f}s")
+    elapsed = time.perf_counter() - start
+    summary['seconds'] = elapsed
+    summary['documents_per_second'] = summary['documents'] / elapsed if elapsed else 0.0
+    summary['mb_per_second'] = summary['bytes'] / 1024 / 1024 / elapsed if elapsed else 0.0
+    summary['entities_per_second'] = summary['entities'] / elapsed if elapsed else 0.0
+    summary['statistics'] = aggregator.statistics()
+    return summary
+# output counts and aggregate throughput of the whole run
+
+
+def create_detector(args):
+    """Resident model server client, regex-only detector or a locally loaded model, created once per run."""
+    if args.server_url:
+        from components.model_server import ModelClient
+        client = ModelClient(args.server_url)
+        if not client.is_available():
+            raise SystemExit(f"Model server at {args.server_url} not reachable")
+        return client
+    from components.entity_detector import EntityDetector
+    if args.regex_only:
+        return EntityDetector(use_ner=False)
+    return EntityDetector(args.model, confidence_threshold=args.threshold)
+
+
+def print_summary(summary: Dict):
+    print(f"Documents:   {summary['documents']} anonymized, {len(summary['failed'])} failed")
+    print(f"Input:       {summary['bytes'] / 1024 / 1024:.2f} MB, {summary['entities']} entities")
+    print(f"Wall time:   {summary['seconds']:.2f}s")
+    print(f"Throughput:  {summary['documents_per_second']:.2f} documents/s, "
+          f"{summary['mb_per_second']:.3f} MB/s, {summary['entities_per_second']:.1f} entities/s")
+    statistics = summary.get('statistics', {})
+    for label, count in statistics.get('by_category', {}).items():
+        confidence = statistics['confidence_stats'][label]
+        quantiles = statistics['confidence_quantiles'][label]
+        print(f"  {label:<10} {count:>8}  confidence avg {confidence['average confidence']:.3f}, "
+              f"p50 {quantiles['p50']:.3f}, min {confidence['min confidence']:.3f}")
+    for path in summary['failed']:
+        print(f"  failed: {path}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Anonymize every document of a directory without prompts")
+    parser.add_argument("inputs", nargs="+", help="Directories, glob patterns or files (.txt, optionally .gz/.bz2/.xz)")
+    parser.add_argument("--output-dir", type=Path, required=True, help="Where the per-document JSON files go")
+    parser.add_argument("--workers", type=int, default=1, help="Documents processed concurrently")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="NER model name or local path")
+    parser.add_argument("--threshold", type=float, default=0.8, help="NER confidence threshold")
+    parser.add_argument("--regex-only", action="store_true", help="Regex patterns only, no NER model")
+    parser.add_argument("--server-url", default=os.environ.get("ANONYMIZER_SERVER_URL"),
+                        help="Detect through a running model server instead of loading the model")
+    parser.add_argument("--pseudonym-store", type=Path, default=None,
+                        help="SQLite file that keeps placeholders consistent across documents and runs of a case file")
+    parser.add_argument("--placeholder-key-file", type=Path, default=None,
+                        help="Secret key file; placeholders are derived from it, so separate runs agree without a store")
+    parser.add_argument("--verbose", action="store_true", help="Keep the per-chunk detector logging")
+    args = parser.parse_args(argv)
+    if args.pseudonym_store and args.placeholder_key_file:
+        parser.error("--pseudonym-store and --placeholder-key-file can't be combined")
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if not args.verbose:
+        logging.getLogger("components").setLevel(logging.WARNING)
+
+    files = collect_inputs(args.inputs)
+    if not files:
+        print("No input documents found")
+        return 1
+    print(f"Anonymizing {len(files)} documents with {args.workers} workers...")
+    load_start = time.perf_counter()
+    detector = create_detector(args)
+    print(f"Detector ready in {time.perf_counter() - load_start:.2f}s")
+
+    store = None
+    if args.pseudonym_store:
+        from components.pseudonym_store import PseudonymStore
+        store = PseudonymStore(args.pseudonym_store)
+    try:
+        placeholder_key = args.placeholder_key_file.read_bytes().strip() if args.placeholder_key_file else None
+        summary = run_batch(files, args.output_dir, detector, args.workers, store, placeholder_key)
+    finally:
+        if store is not None:
+            store.close()
+    print_summary(summary)
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
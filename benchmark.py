@@ -0,0 +1,1012 @@
+#!/usr/bin/env python3
+"""
+Benchmark script for AI_anonymizer project.
+Runs performance comparisons on the documents in large_documents/.
+
+Usage:
+    python benchmark.py --max-chars 200000 batching --batch-size 8
+"""
+
+import argparse
+import logging
+import re
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+DEFAULT_MODEL = "Jean-Baptiste/roberta-large-ner-english"
+DEFAULT_DOCUMENTS = project_root / "large_documents"
+
+
+def load_documents(documents_dir: Path, max_chars: int = None):
+    """Load benchmark documents, optionally truncated to max_chars each."""
+    documents = []
+    for path in sorted(Path(documents_dir).glob("*.txt")):
+        text = path.read_text(encoding="utf-8")
+        documents.append((path.name, text[:max_chars] if max_chars else text))
+    return documents
+
+
+def entity_keys(entities):
+    """Comparable representation of an entity list (position, label and text)."""
+    return [(e.start, e.end, e.label, e.text) for e in entities]
+
+
+# input documents, compares chunk-at-a-time NER with length-bucketed batches
+def benchmark_batching(args):
+    from components.entity_detector import EntityDetector
+
+    detector = EntityDetector(args.model, confidence_threshold=args.threshold)
+    print(f"{'document':45} {'chunks':>7} {'bs=1 c/s':>10} {f'bs={args.batch_size} c/s':>10} {'identical':>10}")
+
+    for name, text in load_documents(args.documents, args.max_chars):
+        chunk_count = len(detector.chunk_processor.create_tokenized_chunks(text, detector.tokenizer))
+        results = {}
+        for batch_size in (1, args.batch_size):
+            detector.batch_size = batch_size
+            start = time.perf_counter()
+            entities = detector._detect_entities_ner_chunked(text)
+            elapsed = time.perf_counter() - start
+            results[batch_size] = (entity_keys(entities), chunk_count / elapsed if elapsed > 0 else 0.0)
+
+        identical = results[1][0] == results[args.batch_size][0]
+        print(f"{name:45} {chunk_count:>7} {results[1][1]:>10.2f} {results[args.batch_size][1]:>10.2f} {str(identical):>10}")
+# output chunks/sec per document for both modes and whether entities are identical
+
+
+# input documents, compares single-process NER with the forked worker pool
+def benchmark_workers(args):
+    from components.entity_detector import EntityDetector
+
+    detector = EntityDetector(args.model, confidence_threshold=args.threshold,
+                              threads_per_worker=args.threads_per_worker)
+    print(f"{'document':45} {'chunks':>7} {'1 proc c/s':>11} {f'{args.workers} procs c/s':>11} {'identical':>10}")
+
+    for name, text in load_documents(args.documents, args.max_chars):
+        chunk_count = len(detector.chunk_processor.create_tokenized_chunks(text, detector.tokenizer))
+        results = {}
+        for num_workers in (1, args.workers):
+            detector.num_workers = num_workers
+            start = time.perf_counter()
+            entities = detector._detect_entities_ner_chunked(text)
+            elapsed = time.perf_counter() - start
+            results[num_workers] = (entity_keys(entities), chunk_count / elapsed if elapsed > 0 else 0.0)
+
+        identical = results[1][0] == results[args.workers][0]
+        print(f"{name:45} {chunk_count:>7} {results[1][1]:>11.2f} {results[args.workers][1]:>11.2f} {str(identical):>10}")
+# output chunks/sec per document for both modes and whether entities are identical
+
+
+# input documents, compares the pipeline path (chunk text tokenized again) with direct inference on token windows
+def benchmark_tokenization(args):
+    from components.entity_detector import EntityDetector
+
+    detector = EntityDetector(args.model, confidence_threshold=args.threshold)
+    tokenizer = detector.tokenizer
+    print(f"{'document':45} {'pipe tok s':>10} {'direct tok s':>12} {'pipe NER s':>10} {'direct NER s':>12} {'identical':>10}")
+
+    for name, text in load_documents(args.documents, args.max_chars):
+        # tokenizer time of the pipeline path: whole document once, then every chunk again inside the pipeline
+        start = time.perf_counter()
+        chunks = detector.chunk_processor.create_tokenized_chunks(text, tokenizer)
+        for chunk_text, _ in chunks:
+            tokenizer(chunk_text)
+        pipeline_tokenize = time.perf_counter() - start
+
+        # tokenizer time of the direct path: whole document once plus the window edge pieces
+        start = time.perf_counter()
+        detector.chunk_processor.create_token_windows(text, tokenizer)
+        direct_tokenize = time.perf_counter() - start
+
+        results = {}
+        for direct in (False, True):
+            detector.direct_inference = direct
+            start = time.perf_counter()
+            entities = detector._detect_entities_ner_chunked(text)
+            results[direct] = (entity_keys(entities), time.perf_counter() - start)
+
+        identical = results[False][0] == results[True][0]
+        print(f"{name:45} {pipeline_tokenize:>10.3f} {direct_tokenize:>12.3f} "
+              f"{results[False][1]:>10.2f} {results[True][1]:>12.2f} {str(identical):>10}")
+# output tokenizer and total NER time per document for both paths and whether entities are identical
+
+
+# input backend name, runs in a fresh process so peak memory is measured per backend
+def _run_backend(backend, model, threshold, model_cache_dir, documents):
+    import resource
+    from components.entity_detector import EntityDetector
+
+    logging.disable(logging.INFO)
+    start = time.perf_counter()
+    detector = EntityDetector(model, confidence_threshold=threshold, backend=backend, model_cache_dir=model_cache_dir)
+    load_time = time.perf_counter() - start
+
+    results = {}
+    for name, text in documents:
+        start = time.perf_counter()
+        entities = detector._detect_entities_ner_chunked(text)
+        results[name] = (time.perf_counter() - start, {(e.start, e.end, e.label) for e in entities})
+
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # ru_maxrss is in KB on Linux
+    return {'load_time': load_time, 'peak_rss_mb': peak_rss_mb, 'documents': results}
+# output load time, peak RSS and per-document latency and entities
+
+
+# input documents, compares the fp32 model with the dynamically quantized int8 model
+def benchmark_quantization(args):
+    import multiprocessing
+
+    documents = load_documents(args.documents, args.max_chars)
+    context = multiprocessing.get_context("spawn")
+    runs = {}
+    for backend in ("torch", "int8"):
+        with context.Pool(1) as pool:
+            runs[backend] = pool.apply(_run_backend, (backend, args.model, args.threshold, args.cache_dir, documents))
+
+    fp32, int8 = runs["torch"], runs["int8"]
+    print(f"{'document':45} {'fp32 s':>8} {'int8 s':>8} {'speedup':>8} {'precision':>10} {'recall':>8} {'F1':>6}")
+    for name, _ in documents:
+        fp32_time, fp32_entities = fp32['documents'][name]
+        int8_time, int8_entities = int8['documents'][name]
+        common = len(fp32_entities & int8_entities)
+        precision = common / len(int8_entities) if int8_entities else 1.0
+        recall = common / len(fp32_entities) if fp32_entities else 1.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        speedup = fp32_time / int8_time if int8_time > 0 else 0.0
+        print(f"{name:45} {fp32_time:>8.2f} {int8_time:>8.2f} {speedup:>7.2f}x {precision:>10.3f} {recall:>8.3f} {f1:>6.3f}")
+
+    print(f"\n{'':45} {'fp32':>8} {'int8':>8}")
+    print(f"{'model load time (s)':45} {fp32['load_time']:>8.2f} {int8['load_time']:>8.2f}")
+    print(f"{'peak RSS (MB)':45} {fp32['peak_rss_mb']:>8.0f} {int8['peak_rss_mb']:>8.0f}")
+# output latency, entity-level agreement (int8 against fp32) and memory for both models
+
+
+# input documents, compares slice-and-concatenate replacement with the one-pass span rewriter (no model needed)
+def benchmark_rewrite(args):
+    from components.anonymizer import Anonymizer
+    from components.cascade import HeuristicChunkScorer
+    from components.entity_mapper import EntityMapper
+
+    print(f"{'document':45} {'entities':>9} {'slicing s':>10} {'one-pass s':>11} {'identical':>10}")
+    for name, text in load_documents(args.documents, args.max_chars):
+        # capitalised word runs stand in for detected entities
+        entities = HeuristicChunkScorer().score(text)
+        for entity in entities:
+            entity.label = 'PER'
+
+        start = time.perf_counter()
+        mapper = EntityMapper()
+        mapper.set_original_text(text)
+        sliced = text
+        for entity in sorted(entities, key=lambda e: e.start, reverse=True):
+            placeholder = mapper.get_or_create_placeholder(entity)
+            sliced = sliced[:entity.start] + placeholder + sliced[entity.end:]
+        slicing_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        anonymizer = Anonymizer(text, entities, EntityMapper())
+        anonymizer.anonymize()
+        rewrite_time = time.perf_counter() - start
+
+        identical = anonymizer.result_text == sliced
+        print(f"{name:45} {len(entities):>9} {slicing_time:>10.2f} {rewrite_time:>11.2f} {str(identical):>10}")
+# output replacement time for both approaches and whether the output is byte-identical
+
+
+def _pairwise_dedup(entities):
+    """The previous O(n^2) overlap scan of _deduplicate_entities, kept here as the baseline."""
+    seen_positions = set()
+    position_deduplicated = []
+    for entity in entities:
+        key = (entity.start, entity.end, entity.text.lower(), entity.label)
+        if key not in seen_positions:
+            seen_positions.add(key)
+            position_deduplicated.append(entity)
+    position_deduplicated.sort(key=lambda x: (x.start, -x.confidence))
+    final_entities = []
+    for entity in position_deduplicated:
+        overlaps = False
+        for i, existing in enumerate(final_entities):
+            if entity.start < existing.end and entity.end > existing.start:
+                if entity.confidence > existing.confidence:
+                    del final_entities[i]
+                else:
+                    overlaps = True
+                break
+        if not overlaps:
+            final_entities.append(entity)
+    return final_entities
+
+
+# input documents, share of chunks the cascade's cheap tier sends to the full model
+def benchmark_cascade(args):
+    from components.cascade import CascadeFilter, HeuristicChunkScorer, ModelChunkScorer
+    from components.chunk_processor import ChunkProcessor
+
+    tiers = [("heuristic", CascadeFilter(HeuristicChunkScorer(), *args.bounds))]
+    tokenizer = None
+    if args.cascade_model:
+        scorer = ModelChunkScorer(args.cascade_model)
+        tokenizer = scorer.ner_pipeline.tokenizer
+        tiers.append(("model", CascadeFilter(scorer, *args.bounds, recall_guard=HeuristicChunkScorer())))
+    print(f"{'document':45} {'tier':>10} {'chunks':>7} {'escalated':>10} {'accepted':>9} {'skipped':>8} {'guard':>6} {'s':>7}")
+    for name, text in load_documents(args.documents, args.max_chars):
+        if tokenizer is not None:  # the NER chunks of the detector, so the small model never sees more than 400 tokens
+            chunks = ChunkProcessor().create_tokenized_chunks(text, tokenizer, max_tokens=400, overlap_tokens=25,
+                                                              return_token_counts=True)
+        else:
+            chunks = [(chunk_text, offset, 0) for chunk_text, offset in
+                      ChunkProcessor().create_regex_safe_chunks(text, chunk_size=args.chunk_chars, overlap_size=0)]
+        for tier, cascade in tiers:
+            cascade.reset_stats()
+            start = time.perf_counter()
+            cascade.select(chunks)
+            elapsed = time.perf_counter() - start
+            stats = cascade.stats
+            print(f"{name:45} {tier:>10} {stats['chunks_total']:>7} "
+                  f"{stats['chunks_escalated'] / max(1, stats['chunks_total']):>10.0%} {stats['chunks_accepted']:>9} "
+                  f"{stats['chunks_skipped']:>8} {stats['recall_guard_escalations']:>6} {elapsed:>7.2f}")
+# output escalation rate per tier; the full model runs on the escalated chunks only
+
+
+# input documents, compares the pairwise overlap scan with the sweep-line resolver (no model needed)
+def benchmark_dedup(args):
+    from components.cascade import HeuristicChunkScorer
+    from components.entities import EntityMatch
+    from components.overlap_resolver import OverlapResolver
+
+    print(f"{'document':45} {'entities':>9} {'pairwise s':>11} {'sweep s':>9} {'identical':>10}")
+    for name, text in load_documents(args.documents, args.max_chars):
+        # candidates plus a chunk-overlap duplicate and a shorter, overlapping span for each of them
+        entities = []
+        for candidate in HeuristicChunkScorer().score(text):
+            entities.append(candidate)
+            entities.append(EntityMatch(candidate.text, candidate.label, candidate.start, candidate.end, 0.5))
+            if candidate.end - candidate.start > 2:
+                entities.append(EntityMatch(candidate.text[1:], 'PER', candidate.start + 1, candidate.end, 0.75))
+
+        start = time.perf_counter()
+        pairwise = _pairwise_dedup(entities)
+        pairwise_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        swept = OverlapResolver().resolve(entities)
+        sweep_time = time.perf_counter() - start
+
+        identical = [id(e) for e in pairwise] == [id(e) for e in swept]
+        print(f"{name:45} {len(entities):>9} {pairwise_time:>11.2f} {sweep_time:>9.3f} {str(identical):>10}")
+# output dedup time for both approaches and whether they keep the same entities
+
+
+def _sequential_deanonymize(anonymized_text, entity_mapping):
+    """The previous one-re.sub-per-placeholder deanonymization, kept here as the baseline."""
+    result = anonymized_text
+    for placeholder in sorted(entity_mapping, key=len, reverse=True):
+        result = re.sub(re.escape(placeholder), lambda m, value=entity_mapping[placeholder]: value, result)
+    return result
+
+
+# input documents, compares one pass per placeholder with the single-scan deanonymizer (no model needed)
+def benchmark_deanonymize(args):
+    import io
+    from components.anonymizer import Anonymizer
+    from components.cascade import HeuristicChunkScorer
+    from components.deanonymizer import TextDeanonymizer
+    from components.entity_mapper import EntityMapper
+
+    print(f"{'document':45} {'placeholders':>12} {'per-placeholder s':>18} {'single-scan s':>14} {'stream s':>9} {'identical':>10}")
+    for name, text in load_documents(args.documents, args.max_chars):
+        entities = HeuristicChunkScorer().score(text)
+        for entity in entities:
+            entity.label = 'PER'
+        mapper = EntityMapper()
+        anonymizer = Anonymizer(text, entities, mapper)
+        anonymizer.anonymize()
+        mapping = mapper.get_mapping()
+
+        start = time.perf_counter()
+        sequential = _sequential_deanonymize(anonymizer.result_text, mapping)
+        sequential_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        single = TextDeanonymizer.deanonymize_text(anonymizer.result_text, mapping)
+        single_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        output = io.StringIO()
+        TextDeanonymizer.deanonymize_stream(io.StringIO(anonymizer.result_text), output, mapping, chunk_size=1 << 16)
+        stream_time = time.perf_counter() - start
+
+        identical = sequential == single == output.getvalue()
+        print(f"{name:45} {len(mapping):>12} {sequential_time:>18.2f} {single_time:>14.3f} {stream_time:>9.3f} {str(identical):>10}")
+# output deanonymization time for each approach and whether they give the same text
+
+
+# input file, runs in a fresh process so peak memory is measured per run
+def _run_streaming(streaming, model, threshold, path):
+    import resource
+    from components.anonymizer import Anonymizer
+    from components.entity_detector import EntityDetector
+    from components.entity_mapper import EntityMapper
+    from components.streaming_pipeline import StreamingAnonymizer
+
+    logging.disable(logging.INFO)
+    detector = EntityDetector(model, confidence_threshold=threshold)
+    baseline_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    output_path = str(path) + ".anonymized"
+    start = time.perf_counter()
+    if streaming:
+        StreamingAnonymizer(detector, EntityMapper()).anonymize_file(path, output_path)
+    else:
+        text = Path(path).read_text(encoding="utf-8")
+        anonymizer = Anonymizer(text, detector.detect_entities_full_text(text), EntityMapper())
+        anonymizer.anonymize()
+        Path(output_path).write_text(anonymizer.result_text, encoding="utf-8")
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return elapsed, peak_mb - baseline_mb
+# output time and peak RSS growth over the loaded model
+
+
+# input documents, compares peak memory of in-memory and streaming anonymization for growing inputs
+def benchmark_streaming(args):
+    import multiprocessing
+    import tempfile
+
+    corpus = "\n".join(text for _, text in load_documents(args.documents, args.max_chars))
+    context = multiprocessing.get_context("spawn")
+    print(f"{'input MB':>9} {'in-memory s':>12} {'in-memory +MB':>14} {'streaming s':>12} {'streaming +MB':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for copies in args.copies:
+            path = Path(tmp) / f"input_{copies}.txt"
+            with open(path, "w", encoding="utf-8") as f:
+                for _ in range(copies):
+                    f.write(corpus)
+            runs = {}
+            for streaming in (False, True):
+                with context.Pool(1) as pool:
+                    runs[streaming] = pool.apply(_run_streaming, (streaming, args.model, args.threshold, str(path)))
+            size_mb = path.stat().st_size / 1024 / 1024
+            print(f"{size_mb:>9.1f} {runs[False][0]:>12.1f} {runs[False][1]:>14.0f} {runs[True][0]:>12.1f} {runs[True][1]:>14.0f}")
+# output time and peak memory growth of both modes per input size
+
+
+# input documents, compares one finditer pass per pattern with the combined scanner over whole chunks and over trigger regions (no model needed)
+def benchmark_regex(args):
+    from components.chunk_processor import ChunkProcessor
+    from components.pattern_registry import default_registry
+
+    registry = default_registry()
+    patterns = registry.compiled_patterns()
+    print(f"{'document':45} {'chunks':>7} {'per-pattern s':>14} {'whole chunk s':>14} {'regions s':>10} {'scanned':>8} {'identical':>10}")
+    for name, text in load_documents(args.documents, args.max_chars):
+        chunks = ChunkProcessor().create_regex_safe_chunks(text, chunk_size=5000, overlap_size=200)
+
+        start = time.perf_counter()
+        for chunk_text, _ in chunks:
+            for pattern in patterns.values():
+                for _ in pattern.finditer(chunk_text):
+                    pass
+        separate_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        whole = [registry.scanner(registry.active_labels(chunk_text)).scan(chunk_text, offset)
+                 for chunk_text, offset in chunks if registry.active_labels(chunk_text)]
+        whole_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        regional = [registry.scan(chunk_text, offset) for chunk_text, offset in chunks]
+        regions_time = time.perf_counter() - start
+
+        scanned = 0
+        for chunk_text, _ in chunks:
+            labels = registry.active_labels(chunk_text)
+            regions = registry.regions(chunk_text, labels) if labels else []
+            scanned += len(chunk_text) if regions is None else sum(end - start for start, end in regions)
+        identical = ([(e.start, e.end, e.label) for chunk in whole for e in chunk] ==
+                     [(e.start, e.end, e.label) for chunk in regional for e in chunk])
+        print(f"{name:45} {len(chunks):>7} {separate_time:>14.3f} {whole_time:>14.3f} {regions_time:>10.3f} "
+              f"{scanned / max(1, len(text)):>8.0%} {str(identical):>10}")
+# output scan time of the three approaches over the same regex chunks, share of the text the regions cover
+
+
+# input documents, compares NER without a cache with a cold and a warm NER result cache
+def benchmark_cache(args):
+    import tempfile
+    from components.entity_detector import EntityDetector
+    from components.ner_cache import NERCache
+
+    detector = EntityDetector(args.model, confidence_threshold=args.threshold)
+    print(f"{'document':45} {'no cache s':>11} {'cold s':>8} {'cold hits':>10} {'warm s':>8} {'warm hits':>10} {'identical':>10}")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for name, text in load_documents(args.documents, args.max_chars):
+            detector.ner_cache = None
+            start = time.perf_counter()
+            reference = entity_keys(detector._detect_entities_ner_chunked(text))
+            uncached_time = time.perf_counter() - start
+
+            detector.ner_cache = NERCache(Path(cache_dir) / f"{name}.sqlite")
+            runs = []
+            for _ in range(2):  # cold: repeated chunks within the document hit, warm: every chunk hits
+                start = time.perf_counter()
+                entities = entity_keys(detector._detect_entities_ner_chunked(text))
+                runs.append((time.perf_counter() - start, detector.ner_cache.stats()['hit_rate'], entities == reference))
+            detector.ner_cache.close()
+            (cold_time, cold_hits, cold_same), (warm_time, warm_hits, warm_same) = runs
+            print(f"{name:45} {uncached_time:>11.2f} {cold_time:>8.2f} {cold_hits:>10.1%} {warm_time:>8.2f} "
+                  f"{warm_hits:>10.1%} {str(cold_same and warm_same):>10}")
+# output NER time and hit rate per run and whether cached entities are identical
+
+
+# input documents plus a templated document (form letter repeated), compares NER with and without sentence dedup
+def benchmark_sentence_dedup(args):
+    from components.entity_detector import EntityDetector
+
+    detector = EntityDetector(args.model, confidence_threshold=args.threshold)
+    documents = load_documents(args.documents, args.max_chars)
+    letter = ("Dear customer,\nJohn Smith from Acme Corp in New York will contact you about your order.\n"
+              "Please call 555-123-4567 with any questions.\nKind regards,\nMary Johnson\n")
+    documents.append(("form_letters (synthetic)", "".join(letter.replace("order", f"order {i}") for i in range(500))))
+
+    print(f"{'document':45} {'ratio':>6} {'plain s':>8} {'dedup s':>8} {'est. saved s':>13} {'agreement':>10}")
+    for name, text in documents:
+        detector.sentence_dedup = False
+        start = time.perf_counter()
+        plain = set(entity_keys(detector._detect_entities_ner_chunked(text)))
+        plain_time = time.perf_counter() - start
+
+        detector.sentence_dedup = True
+        start = time.perf_counter()
+        deduplicated = set(entity_keys(detector._detect_entities_ner_chunked(text)))
+        dedup_time = time.perf_counter() - start
+        stats = detector.sentence_deduplicator.stats
+
+        # sentences lose their neighbours as context, so a few entities may differ
+        agreement = len(plain & deduplicated) / len(plain | deduplicated) if plain | deduplicated else 1.0
+        print(f"{name:45} {stats['dedup_ratio']:>6.1%} {plain_time:>8.2f} {dedup_time:>8.2f} "
+              f"{stats['estimated_time_saved']:>13.2f} {agreement:>10.1%}")
+# output dedup ratio, NER time of both modes, the estimate of time saved and entity agreement
+
+
+# input documents, NER entities propagated with one automaton scan vs one regex search per surface form
+def benchmark_propagation(args):
+    from components.entity_detector import EntityDetector
+
+    detector = EntityDetector(args.model, confidence_threshold=args.threshold, overlap_tokens=args.overlap_tokens)
+    print(f"{'document':45} {'entities':>9} {'forms':>6} {'added':>6} {'automaton s':>12} {'per-form s':>11}")
+    for name, text in load_documents(args.documents, args.max_chars):
+        entities = detector._deduplicate_entities(detector._detect_entities_regex_chunked(text) +
+                                                  detector._detect_entities_ner_chunked(text))
+
+        start = time.perf_counter()
+        propagated = detector._propagate_entities(text, entities)
+        automaton_time = time.perf_counter() - start
+        stats = detector.propagation_stats
+
+        start = time.perf_counter()
+        forms = {e.text for e in entities if e.label not in detector.patterns and len(e.text.strip()) >= 3
+                 and any(c.isalnum() for c in e.text)}
+        # lookahead, so overlapping occurrences count like in the automaton
+        naive = sum(1 for form in forms for _ in re.finditer(rf"(?<!\w)(?={re.escape(form)}(?!\w))", text))
+        naive_time = time.perf_counter() - start
+        assert naive == stats['occurrences']
+        print(f"{name:45} {len(entities):>9} {stats['surface_forms']:>6} {len(propagated) - len(entities):>6} "
+              f"{automaton_time:>12.3f} {naive_time:>11.3f}")
+# output surface forms, entities added and the time of both scans
+
+
+# input documents and a synthetic gazetteer, compiling the automaton once vs loading it from the cache
+def benchmark_gazetteer(args):
+    import random
+    import tempfile
+    from components.gazetteer import Gazetteer
+
+    rng = random.Random(0)
+    def word(low, high):
+        return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(low, high))).title()
+    first_names = [word(3, 8) for _ in range(3000)]
+    last_names = [word(4, 10) for _ in range(5000)]
+    names = {f"{rng.choice(first_names)} {rng.choice(last_names)}" for _ in range(args.terms)}
+
+    with tempfile.TemporaryDirectory() as workdir:
+        names_path = Path(workdir) / "employees.txt"
+        names_path.write_text("\n".join(sorted(names)), encoding="utf-8")
+        timings = []
+        for _ in range(2):  # first run compiles and saves, second run loads
+            start = time.perf_counter()
+            gazetteer = Gazetteer({"PER": names_path}, cache_dir=workdir)
+            timings.append(time.perf_counter() - start)
+        print(f"{len(gazetteer)} terms: compile {timings[0]:.2f}s, load {timings[1]:.2f}s, "
+              f"{gazetteer.cache_path.stat().st_size / 1024 / 1024:.1f} MB on disk")
+
+        print(f"{'document':45} {'MB':>6} {'scan s':>8} {'MB/s':>6} {'hits':>6}")
+        for name, text in load_documents(args.documents, args.max_chars):
+            start = time.perf_counter()
+            hits = gazetteer.scan(text)
+            elapsed = time.perf_counter() - start
+            size_mb = len(text) / 1024 / 1024
+            print(f"{name:45} {size_mb:>6.2f} {elapsed:>8.3f} {size_mb / elapsed:>6.2f} {len(hits):>6}")
+# output compile and load time of the automaton and the scan throughput per document
+
+
+# input small documents, a fresh process-style run (load model + detect) vs a job on the resident model server
+def benchmark_server(args):
+    import statistics
+    from components.entity_detector import EntityDetector
+    from components.model_server import ModelClient, ModelServer
+
+    documents = [text[:args.doc_chars] for _, text in load_documents(args.documents)]
+    start = time.perf_counter()
+    detector = EntityDetector(args.model, confidence_threshold=args.threshold)
+    load_time = time.perf_counter() - start
+    start = time.perf_counter()
+    detector.detect_entities_full_text(documents[0])
+    cold_run = load_time + time.perf_counter() - start
+
+    server = ModelServer(detector, port=0)
+    server.start()
+    client = ModelClient(server.url)
+    latencies = []
+    for _ in range(args.rounds):
+        for text in documents:
+            start = time.perf_counter()
+            client.anonymize(text)
+            latencies.append(time.perf_counter() - start)
+    server.shutdown()
+
+    latencies.sort()
+    print(f"model load {load_time:.2f}s, cold run (load + detect) {cold_run:.2f}s")
+    print(f"server jobs ({args.doc_chars} chars): {len(latencies)} requests, p50 {statistics.median(latencies) * 1000:.1f} ms, "
+          f"p99 {latencies[int(0.99 * (len(latencies) - 1))] * 1000:.1f} ms")
+# output cold-run time vs per-request latency of the resident server
+
+
+def request_texts(documents, count, min_chars=40, max_chars=400):
+    """Short, distinct lines of the documents standing in for chat messages and tickets."""
+    texts, seen = [], set()
+    for _, text in documents:
+        for line in text.splitlines():
+            line = line.strip()
+            if min_chars <= len(line) <= max_chars and line not in seen:
+                seen.add(line)
+                texts.append(line)
+                if len(texts) == count:
+                    return texts
+    return texts
+
+
+# input short requests, compares one forward pass per request with the micro-batching async API
+def benchmark_async(args):
+    import asyncio
+    from components.async_api import AsyncEntityDetector, percentile
+    from components.entity_detector import EntityDetector
+
+    texts = request_texts(load_documents(args.documents), args.requests)
+    detector = EntityDetector(args.model, confidence_threshold=args.threshold)
+    detector.detect_entities_full_text(texts[0])  # warm-up
+
+    latencies = []
+    start = time.perf_counter()
+    sequential = []
+    for text in texts:
+        request_start = time.perf_counter()
+        sequential.append(detector.detect_entities_full_text(text))
+        latencies.append(time.perf_counter() - request_start)
+    sequential_time = time.perf_counter() - start
+    latencies.sort()
+
+    async def run():
+        async with AsyncEntityDetector(detector, max_batch_size=args.max_batch, max_wait=args.max_wait_ms / 1000) as api:
+            in_flight = asyncio.Semaphore(args.concurrency)
+
+            async def request(text):
+                async with in_flight:
+                    return await api.detect_entities_full_text(text)
+
+            start = time.perf_counter()
+            results = await asyncio.gather(*(request(text) for text in texts))
+            return results, time.perf_counter() - start, api.stats()
+
+    batched, batched_time, stats = asyncio.run(run())
+    identical = [entity_keys(e) for e in sequential] == [entity_keys(e) for e in batched]
+    print(f"{len(texts)} requests, {args.concurrency} in flight, max batch {args.max_batch}, max wait {args.max_wait_ms} ms")
+    print(f"{'mode':22} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'avg batch':>10}")
+    print(f"{'one request at a time':22} {len(texts) / sequential_time:>8.1f} {percentile(latencies, 0.5) * 1000:>8.1f} "
+          f"{percentile(latencies, 0.99) * 1000:>8.1f} {1.0:>10.1f}")
+    print(f"{'async micro-batches':22} {len(texts) / batched_time:>8.1f} {stats['p50_latency'] * 1000:>8.1f} "
+          f"{stats['p99_latency'] * 1000:>8.1f} {stats['average_batch_size']:>10.1f}")
+    print(f"identical entities: {identical}")
+# output throughput and p50/p99 latency of both modes, and whether they find the same entities
+
+
+# input document sizes and entity counts, compares substring collision checks with the token index (no model needed)
+def benchmark_mapping(args):
+    from components.entities import EntityMatch
+    from components.entity_mapper import EntityMapper
+
+    class ScanningMapper(EntityMapper):
+        """The previous collision check: a substring scan of the whole text per new placeholder, kept as the baseline."""
+
+        def set_original_text(self, text):
+            self.original_text = text
+
+        def _generate_safe_placeholder(self, label, text):
+            counter = self.counters[label] + 1
+            while f"[{label}_{counter}]" in self.placeholder_to_entity or f"[{label}_{counter}]" in self.original_text:
+                counter += 1
+            self.counters[label] = counter
+            return f"[{label}_{counter}]"
+
+    corpus = "\n".join(text for _, text in load_documents(args.documents))
+    print(f"{'document MB':>11} {'entities':>9} {'scan s':>8} {'index s':>8} {'identical':>10}")
+    for size_mb in args.sizes_mb:
+        text = (corpus * (size_mb * 1024 * 1024 // len(corpus) + 1))[:size_mb * 1024 * 1024]
+        for count in args.entities:
+            entities = [EntityMatch(f"Person {i}", 'PER', 0, 1, 0.9) for i in range(count)]
+            timings, placeholders = [], []
+            for mapper in (ScanningMapper(), EntityMapper()):
+                start = time.perf_counter()
+                mapper.set_original_text(text)
+                placeholders.append([mapper.get_or_create_placeholder(e) for e in entities])
+                timings.append(time.perf_counter() - start)
+            identical = placeholders[0] == placeholders[1]
+            print(f"{size_mb:>11} {count:>9} {timings[0]:>8.2f} {timings[1]:>8.3f} {str(identical):>10}")
+# output mapping time with both collision checks; the index grows with entities, not with the document
+
+
+# input documents, compares one mapper call per entity with one batch per document on a thread pool (no model needed)
+def benchmark_placeholders(args):
+    from concurrent.futures import ThreadPoolExecutor
+    from components.cascade import HeuristicChunkScorer
+    from components.entity_mapper import EntityMapper
+
+    documents = [HeuristicChunkScorer().score(text) for _, text in load_documents(args.documents, args.max_chars)]
+    total = sum(len(entities) for entities in documents)
+
+    def per_entity(mapper, entities):
+        return [mapper.get_or_create_placeholder(entity) for entity in entities]
+
+    def batched(mapper, entities):
+        return mapper.get_or_create_placeholders(entities)
+
+    print(f"{total} entities in {len(documents)} documents, {args.threads} threads")
+    print(f"{'mode':22} {'seconds':>8} {'entities/s':>12}")
+    for mode, map_document in (("one call per entity", per_entity), ("one batch per document", batched)):
+        mapper = EntityMapper()  # shared by every thread, as in a pool anonymizing the chunks of one corpus
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as executor:
+            list(executor.map(lambda entities: map_document(mapper, entities), documents))
+        elapsed = time.perf_counter() - start
+        print(f"{mode:22} {elapsed:>8.3f} {total / elapsed:>12.0f}")
+# output mapping time with per-entity lock acquisitions vs one acquisition per document
+
+
+# input a number of stored entities, times bulk allocation and cold/warm lookups of the pseudonym store (no model needed)
+def benchmark_pseudonyms(args):
+    import random
+    import tempfile
+    import tracemalloc
+    from components.pseudonym_store import PseudonymStore
+
+    labels = ("PER", "ORG", "LOC")
+    keys = [(f"entity {i}", labels[i % 3]) for i in range(args.entries)]
+    with tempfile.TemporaryDirectory() as cache_dir:
+        path = Path(cache_dir) / "case.sqlite"
+        store = PseudonymStore(path, cache_entries=args.cache_entries)
+        start = time.perf_counter()
+        for i in range(0, len(keys), 10000):  # one bulk call per 10 000-entity document
+            store.get_or_create([(key, key[0].title()) for key in keys[i:i + 10000]])
+        insert_time = time.perf_counter() - start
+        store.close()
+        print(f"{args.entries} entities allocated in {insert_time:.2f}s ({args.entries / insert_time:.0f}/s), "
+              f"file {path.stat().st_size / 1024 / 1024:.1f} MB")
+
+        rng = random.Random(0)
+        hot = keys[:args.cache_entries // 2]
+        lookups = [rng.choice(hot) if rng.random() < 0.9 else rng.choice(keys) for _ in range(args.lookups)]
+        tracemalloc.start()
+        store = PseudonymStore(path, cache_entries=args.cache_entries)
+        print(f"{'pass':6} {'lookups/s':>10} {'disk hits':>10}")
+        for name in ("cold", "warm"):
+            store.reset_stats()
+            start = time.perf_counter()
+            for i in range(0, len(lookups), 1000):
+                store.lookup_many(lookups[i:i + 1000])
+            elapsed = time.perf_counter() - start
+            print(f"{name:6} {len(lookups) / elapsed:>10.0f} {store.stats()['disk_hits']:>10}")
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        store.close()
+        print(f"peak Python memory while looking up: {peak / 1024 / 1024:.1f} MB (LRU of {args.cache_entries} entries)")
+# output allocation rate, file size, lookup rate with a cold and a warm LRU, memory stays bounded by the LRU
+
+
+# input a number of distinct entities, compares counter numbering with keyed placeholders by digest length (no model needed)
+def benchmark_keyed(args):
+    from components.entities import EntityMatch
+    from components.entity_mapper import EntityMapper
+
+    entities = [EntityMatch(f"Person {i}", "PER", i, i + 1, 0.9) for i in range(args.entities)]
+    print(f"{'placeholders':22} {'seconds':>8} {'collisions':>11} {'avg length':>11}")
+    for name, mapper in [("numbered", EntityMapper())] + [
+            (f"keyed, {chars} hex chars", EntityMapper(key="benchmark-key", digest_chars=chars)) for chars in args.digest_chars]:
+        start = time.perf_counter()
+        placeholders = mapper.get_or_create_placeholders(entities)
+        elapsed = time.perf_counter() - start
+        average_length = sum(map(len, placeholders)) / len(placeholders)
+        print(f"{name:22} {elapsed:>8.2f} {mapper.keyed_collisions:>11} {average_length:>11.1f}")
+# output mapping time, collision fallbacks and placeholder length; each fallback is a possible cross-run conflict
+
+
+
+def _rescan_statistics(entities, entity_mapping):
+    """generate_statistics before the aggregator: one scan of all entities per label."""
+    from collections import Counter
+    by_category = Counter(e.label for e in entities)
+    confidence_stats = {}
+    for label in by_category:
+        confidences = [e.confidence for e in entities if e.label == label]
+        confidence_stats[label] = {'average confidence': sum(confidences) / len(confidences),
+                                   'min confidence': min(confidences), 'max confidence': max(confidences)}
+    return {'total_entities': len(entities), 'unique_entities': len(entity_mapping), 'by_category': dict(by_category),
+            'confidence_stats': confidence_stats, 'entity_types_found': list(by_category.keys())}
+
+
+# input a number of entities and labels, compares the per-label rescan with the online aggregator (no model needed)
+def benchmark_statistics(args):
+    import random
+    from components.entities import EntityMatch
+    from components.statistics_generator import StatisticsAggregator, StatisticsGenerator
+
+    rng = random.Random(0)
+    labels = [f"LABEL_{i}" for i in range(args.labels)]
+    entities = [EntityMatch("x", rng.choice(labels), i, i + 1, rng.betavariate(8, 2)) for i in range(args.entities)]
+    start = time.perf_counter()
+    reference = _rescan_statistics(entities, {})
+    rescan_time = time.perf_counter() - start
+    start = time.perf_counter()
+    statistics = StatisticsGenerator.generate_statistics(entities, {})
+    aggregator_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    shards = [StatisticsAggregator() for _ in range(args.shards)]  # e.g. one per worker or document
+    for i in range(0, len(entities), args.chunk):
+        shards[(i // args.chunk) % args.shards].add(entities[i:i + args.chunk])
+    merged = StatisticsAggregator()
+    for shard in shards:
+        merged.merge(shard)
+    sharded_time = time.perf_counter() - start
+
+    def close(a, b):
+        return a["by_category"] == b["by_category"] and all(
+            abs(a["confidence_stats"][label][k] - v) <= 1e-12 for label, s in b['confidence_stats'].items() for k, v in s.items())
+    print(f"{args.entities} entities, {args.labels} labels, {args.shards} shards of {args.chunk}-entity chunks")
+    print(f"{'mode':24} {'seconds':>8} {'identical':>10}")
+    print(f"{'per-label rescan':24} {rescan_time:>8.2f} {'-':>10}")
+    print(f"{'aggregator':24} {aggregator_time:>8.2f} {str(statistics == {**statistics, **reference}):>10}")
+    print(f"{'merged shard aggregators':24} {sharded_time:>8.2f} {str(close(merged.statistics(), reference)):>10}")
+    quantiles = statistics['confidence_quantiles'][labels[0]]
+    exact = sorted(e.confidence for e in entities if e.label == labels[0])
+    print(f"{labels[0]} p50/p90/p99 approx {quantiles['p50']:.3f}/{quantiles['p90']:.3f}/{quantiles['p99']:.3f}, "
+          f"exact {exact[len(exact) // 2]:.3f}/{exact[int(len(exact) * 0.9)]:.3f}/{exact[int(len(exact) * 0.99)]:.3f}")
+# output rescan vs one-pass time (same averages), merged shards agree to rounding, quantiles are within a bin
+
+
+
+# input a number of entities, compares a list of EntityMatch with an EntityTable: memory, anonymization, statistics, files (no model needed)
+def benchmark_entity_table(args):
+    import json
+    import random
+    import tempfile
+    import tracemalloc
+    from components.anonymizer import Anonymizer
+    from components.entities import EntityMatch
+    from components.entity_mapper import EntityMapper
+    from components.entity_table import EntityTable
+    from components.model_server import entity_from_dict, entity_to_dict
+    from components.statistics_generator import StatisticsGenerator
+
+    rng = random.Random(0)
+    names = [(f"Person {i}", "PER") for i in range(args.distinct // 2)] + [(f"Company {i}", "ORG") for i in range(args.distinct // 2)]
+    parts, entity_spans, position = [], [], 0
+    for _ in range(args.entities):
+        text, label = rng.choice(names)
+        parts.append("met ")
+        position += 4
+        parts.append(text + " ")
+        entity_spans.append((text, label, position, position + len(text), rng.betavariate(8, 2)))
+        position += len(text) + 1
+    source = "".join(parts)
+
+    tracemalloc.start()
+    entities = [EntityMatch(text, label, start, end, confidence) for text, label, start, end, confidence in entity_spans]
+    list_mb = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+    tracemalloc.stop()
+    del entity_spans
+    tracemalloc.start()
+    table = EntityTable.from_entities(entities, source)
+    table.normalized_keys()
+    table_mb = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+    tracemalloc.stop()
+
+    def timed(function):
+        start = time.perf_counter()
+        result = function()
+        return time.perf_counter() - start, result
+
+    def anonymize(items):
+        anonymizer = Anonymizer(source, items, EntityMapper())
+        anonymizer.anonymize()
+        return anonymizer.result_text, anonymizer.mapper.get_mapping()
+
+    list_anonymize, list_result = timed(lambda: anonymize(entities))
+    table_anonymize, table_result = timed(lambda: anonymize(table))
+    list_statistics, list_stats = timed(lambda: StatisticsGenerator.generate_statistics(entities, {}))
+    table_statistics, table_stats = timed(lambda: StatisticsGenerator.generate_statistics(table, {}))
+    with tempfile.TemporaryDirectory() as directory:
+        json_path, table_path = Path(directory) / "entities.json", Path(directory) / "entities.npz"
+        json_save, _ = timed(lambda: json_path.write_text(json.dumps([entity_to_dict(e) for e in entities]), encoding="utf-8"))
+        json_load, loaded = timed(lambda: [entity_from_dict(d) for d in json.loads(json_path.read_text(encoding="utf-8"))])
+        table_save, _ = timed(lambda: table.save(table_path, include_source=False))
+        table_load, loaded_table = timed(lambda: EntityTable.load(table_path, source=source))
+        sizes = json_path.stat().st_size / 1024 / 1024, table_path.stat().st_size / 1024 / 1024
+    identical = (table_result == list_result and table_stats == list_stats
+                 and loaded_table.starts.tolist() == [e.start for e in loaded])
+
+    print(f"{args.entities} entities, {args.distinct} distinct, {len(source) / 1024 / 1024:.1f} MB source")
+    print(f"{'':22} {'memory MB':>10} {'anonymize s':>12} {'statistics s':>13} {'save s':>7} {'load s':>7} {'file MB':>8}")
+    print(f"{'list of EntityMatch':22} {list_mb:>10.1f} {list_anonymize:>12.2f} {list_statistics:>13.2f} "
+          f"{json_save:>7.2f} {json_load:>7.2f} {sizes[0]:>8.1f}")
+    print(f"{'EntityTable':22} {table_mb:>10.1f} {table_anonymize:>12.2f} {table_statistics:>13.2f} "
+          f"{table_save:>7.2f} {table_load:>7.2f} {sizes[1]:>8.1f}")
+    print(f"identical: {identical}")
+# output memory held by the entities, time per consumer, JSON vs binary table files; results must be identical
+
+
+IMPORT_PROFILES = {
+    "deanonymize-only": "from components import TextDeanonymizer, EntityMapper, StatisticsGenerator",
+    "regex-only detector": "from components import EntityDetector; EntityDetector(use_ner=False)",
+    "NER stack (torch + transformers)": "import torch, transformers.pipelines",
+}
+
+
+# input nothing, times each import profile in fresh interpreters (no model needed)
+def benchmark_imports(args):
+    import subprocess
+    import statistics
+
+    print(f"{'profile':35} {'median s':>9} {'budget s':>9}")
+    for profile, code in IMPORT_PROFILES.items():
+        timings = []
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], cwd=project_root, check=True, capture_output=True)
+            timings.append(time.perf_counter() - start)
+        budget = f"{args.budget:.2f}" if profile == "deanonymize-only" else "-"
+        print(f"{profile:35} {statistics.median(timings):>9.2f} {budget:>9}")
+        if profile == "deanonymize-only" and statistics.median(timings) > args.budget:
+            print(f"deanonymize-only startup is over the {args.budget:.2f}s budget")
+            sys.exit(1)
+# output interpreter start + import time per profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI_anonymizer performance benchmarks")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="NER model name or local path")
+    parser.add_argument("--threshold", type=float, default=0.8, help="NER confidence threshold")
+    parser.add_argument("--documents", type=Path, default=DEFAULT_DOCUMENTS, help="Directory with .txt documents")
+    parser.add_argument("--max-chars", type=int, default=None, help="Truncate every document to this many characters")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    batching = subparsers.add_parser("batching", help="Chunk-at-a-time vs batched NER throughput")
+    batching.add_argument("--batch-size", type=int, default=8)
+    batching.set_defaults(func=benchmark_batching)
+
+    workers = subparsers.add_parser("workers", help="Single-process vs multi-process NER throughput")
+    workers.add_argument("--workers", type=int, default=4)
+    workers.add_argument("--threads-per-worker", type=int, default=1)
+    workers.set_defaults(func=benchmark_workers)
+
+    tokenization = subparsers.add_parser("tokenization", help="Pipeline NER vs direct inference on token windows")
+    tokenization.set_defaults(func=benchmark_tokenization)
+
+    quantization = subparsers.add_parser("quantization", help="fp32 vs dynamic int8 model: latency, memory, agreement")
+    quantization.add_argument("--cache-dir", default=None, help="Where the int8 weights are cached")
+    quantization.set_defaults(func=benchmark_quantization)
+
+    rewrite = subparsers.add_parser("rewrite", help="Slice-and-concatenate vs one-pass anonymizer rewrite")
+    rewrite.set_defaults(func=benchmark_rewrite)
+
+    deanonymize = subparsers.add_parser("deanonymize", help="Per-placeholder passes vs single-scan deanonymization")
+    deanonymize.set_defaults(func=benchmark_deanonymize)
+
+    streaming = subparsers.add_parser("streaming", help="In-memory vs streaming anonymization: peak memory by input size")
+    streaming.add_argument("--copies", type=int, nargs="+", default=[1, 2, 4], help="Input sizes as copies of the corpus")
+    streaming.set_defaults(func=benchmark_streaming)
+
+    regex = subparsers.add_parser("regex", help="Per-pattern passes vs combined regex scanner")
+    regex.set_defaults(func=benchmark_regex)
+
+    cache = subparsers.add_parser("cache", help="NER without a cache vs cold and warm NER result cache")
+    cache.set_defaults(func=benchmark_cache)
+
+    sentence_dedup = subparsers.add_parser("sentence-dedup", help="NER on every sentence vs once per distinct sentence")
+    sentence_dedup.set_defaults(func=benchmark_sentence_dedup)
+
+    propagation = subparsers.add_parser("propagation", help="Entity propagation: automaton vs per-form regex")
+    propagation.add_argument("--overlap-tokens", type=int, default=25, help="Tokens shared by neighbouring NER chunks")
+    propagation.set_defaults(func=benchmark_propagation)
+
+    gazetteer = subparsers.add_parser("gazetteer", help="Gazetteer automaton: compile vs cached load, scan throughput")
+    gazetteer.add_argument("--terms", type=int, default=300000, help="Number of synthetic gazetteer names")
+    gazetteer.set_defaults(func=benchmark_gazetteer)
+
+    server = subparsers.add_parser("server", help="Cold run (model load + detect) vs resident model server latency")
+    server.add_argument("--doc-chars", type=int, default=2000, help="Size of every small document")
+    server.add_argument("--rounds", type=int, default=5)
+    server.set_defaults(func=benchmark_server)
+
+    imports = subparsers.add_parser("imports", help="Startup time of deanonymize-only, regex-only and NER imports")
+    imports.add_argument("--rounds", type=int, default=5)
+    imports.add_argument("--budget", type=float, default=0.5, help="Seconds allowed for deanonymize-only startup")
+    imports.set_defaults(func=benchmark_imports)
+
+    async_api = subparsers.add_parser("async", help="One forward pass per request vs micro-batching async API")
+    async_api.add_argument("--requests", type=int, default=200, help="Number of short requests")
+    async_api.add_argument("--concurrency", type=int, default=32, help="Requests in flight at once")
+    async_api.add_argument("--max-batch", type=int, default=8, help="Chunks per micro-batch")
+    async_api.add_argument("--max-wait-ms", type=float, default=10.0, help="Milliseconds a chunk waits for its batch to fill")
+    async_api.set_defaults(func=benchmark_async)
+
+    mapping = subparsers.add_parser("mapping", help="Substring scan vs indexed placeholder collision checks")
+    mapping.add_argument("--sizes-mb", type=int, nargs="+", default=[1, 4, 16], help="Document sizes in MB")
+    mapping.add_argument("--entities", type=int, nargs="+", default=[1000, 5000], help="Unique entity counts")
+    mapping.set_defaults(func=benchmark_mapping)
+
+    placeholders = subparsers.add_parser("placeholders", help="Per-entity vs batched placeholder mapping on a thread pool")
+    placeholders.add_argument("--threads", type=int, default=4)
+    placeholders.set_defaults(func=benchmark_placeholders)
+
+    pseudonyms = subparsers.add_parser("pseudonyms", help="Pseudonym store: bulk allocation, cold vs warm lookups")
+    pseudonyms.add_argument("--entries", type=int, default=1000000, help="Entities stored in the case file")
+    pseudonyms.add_argument("--lookups", type=int, default=200000)
+    pseudonyms.add_argument("--cache-entries", type=int, default=100000, help="Size of the in-memory LRU")
+    pseudonyms.set_defaults(func=benchmark_pseudonyms)
+
+    keyed = subparsers.add_parser("keyed", help="Numbered vs keyed (HMAC) placeholders: time and collisions")
+    keyed.add_argument("--entities", type=int, default=1000000, help="Distinct entities of one label")
+    keyed.add_argument("--digest-chars", type=int, nargs="+", default=[6, 8, 10, 12], help="HMAC hex characters kept")
+    keyed.set_defaults(func=benchmark_keyed)
+
+    statistics = subparsers.add_parser("statistics", help="Per-label rescan vs online, mergeable statistics aggregator")
+    statistics.add_argument("--entities", type=int, default=1000000)
+    statistics.add_argument("--labels", type=int, default=18, help="Distinct labels, the rescan is one pass per label")
+    statistics.add_argument("--shards", type=int, default=4, help="Aggregators merged at the end, e.g. one per worker")
+    statistics.add_argument("--chunk", type=int, default=500, help="Entities added per call, e.g. per chunk")
+    statistics.set_defaults(func=benchmark_statistics)
+
+    entity_table = subparsers.add_parser("entity-table", help="List of EntityMatch vs columnar EntityTable")
+    entity_table.add_argument("--entities", type=int, default=1000000)
+    entity_table.add_argument("--distinct", type=int, default=20000, help="Distinct entity texts")
+    entity_table.set_defaults(func=benchmark_entity_table)
+
+    cascade = subparsers.add_parser("cascade", help="Cascade escalation rate of the heuristic and model tiers")
+    cascade.add_argument("--cascade-model", default=None, help="Small NER model for the model tier (heuristic only if unset)")
+    cascade.add_argument("--bounds", type=float, nargs=2, default=[0.5, 0.95], metavar=("LOWER", "UPPER"))
+    cascade.add_argument("--chunk-chars", type=int, default=1600, help="Chunk size without a cascade model, about one 400-token NER chunk")
+    cascade.set_defaults(func=benchmark_cascade)
+
+    dedup = subparsers.add_parser("dedup", help="Pairwise vs sweep-line overlap resolution")
+    dedup.set_defaults(func=benchmark_dedup)
+
+    args = parser.parse_args()
+    logging.disable(logging.INFO)  # keep per-chunk logging out of the report
+    args.func(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,14 +8,33 @@ This package provides modular components for:
 - Statistics generation
 - Deanonymization capabilities
 """
-from .input_text import InputTextHandler
-from .entity_detector import EntityDetector
-from .chunk_processor import ChunkProcessor
-from .entity_mapper import EntityMapper
-from .statistics_generator import StatisticsGenerator
-from .deanonymizer import TextDeanonymizer
-from .entities import EntityMatch
-from .anonymizer import Anonymizer
+import importlib
+
+# public name -> module; modules are imported on first access, so e.g. a deanonymize-only
+# job never loads the NER stack (torch and transformers are only imported by a model-backed EntityDetector)
+_LAZY_IMPORTS = {
+    'InputTextHandler': '.input_text',
+    'EntityDetector': '.entity_detector',
+    'ChunkProcessor': '.chunk_processor',
+    'EntityMapper': '.entity_mapper',
+    'StatisticsGenerator': '.statistics_generator',
+    'TextDeanonymizer': '.deanonymizer',
+    'EntityMatch': '.entities',
+    'EntityTable': '.entity_table',
+    'Anonymizer': '.anonymizer',
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+    globals()[name] = value  # later accesses skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
 
 __all__ = [
     'InputTextHandler',
@@ -25,6 +44,7 @@ __all__ = [
     'StatisticsGenerator',
     'TextDeanonymizer',
     'EntityMatch',
+    'EntityTable',
     'AnonymizationResult',
     'Anonymizer'
 ]
@@ -0,0 +1,101 @@
+"""
+Aho-Corasick automaton for finding many literal strings in one pass.
+All patterns are compiled into one trie with failure links, so a text is
+scanned once, in time linear in its length plus the number of matches,
+however many patterns there are. Transitions are kept in one flat dict and
+the automaton pickles compactly, so lists with hundreds of thousands of
+entries can be compiled once and reloaded quickly.
+"""
+
+from array import array
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+CHAR_BITS = 21  # enough for every Unicode code point
+
+
+def is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+
+def fold_case(text: str) -> str:
+    """Case-folded text of the same length, characters that fold to several ('ß' -> 'ss') are kept."""
+    folded = text.casefold()
+    if len(folded) == len(text):
+        return folded
+    return ''.join(c.casefold() if len(c.casefold()) == 1 else c for c in text)
+
+
+class AhoCorasick:
+    """Trie of the patterns with failure and output links."""
+
+    def __init__(self, patterns: Iterable[str], case_insensitive: bool = False):
+        self.case_insensitive = case_insensitive
+        self.patterns: List[str] = []
+        self.transitions: Dict[int, int] = {}  # state << CHAR_BITS | code point -> next state, state 0 is the root
+        self.fail = array('l', [0])  # state -> longest proper suffix that is also a trie state
+        self.output: Dict[int, Tuple[int, ...]] = {}  # state -> patterns ending here and in its suffixes (if any)
+        parents = array('l', [0])  # state -> (parent, code point), only needed while linking
+        codes = array('l', [0])
+        depths = array('l', [0])
+        for pattern in patterns:
+            self._add(pattern, parents, codes, depths)
+        self._link(parents, codes, depths)
+
+    def _add(self, pattern: str, parents: array, codes: array, depths: array):
+        if not pattern:
+            return
+        state = 0
+        for char in (fold_case(pattern) if self.case_insensitive else pattern):
+            key = state << CHAR_BITS | ord(char)
+            next_state = self.transitions.get(key)
+            if next_state is None:
+                next_state = len(self.fail)
+                self.transitions[key] = next_state
+                self.fail.append(0)
+                parents.append(state)
+                codes.append(ord(char))
+                depths.append(depths[state] + 1)
+            state = next_state
+        self.output[state] = self.output.get(state, ()) + (len(self.patterns),)
+        self.patterns.append(pattern)
+
+    def _link(self, parents: array, codes: array, depths: array):
+        """Failure links by depth, so a state's suffix states are done before it."""
+        transitions, fail, output = self.transitions, self.fail, self.output
+        for state in sorted(range(1, len(fail)), key=depths.__getitem__):
+            parent = parents[state]
+            if parent == 0:
+                continue  # depth 1 falls back to the root
+            code = codes[state]
+            fallback = fail[parent]
+            while fallback and (fallback << CHAR_BITS | code) not in transitions:
+                fallback = fail[fallback]
+            fail[state] = transitions.get(fallback << CHAR_BITS | code, 0)
+            inherited = output.get(fail[state])
+            if inherited:
+                output[state] = output.get(state, ()) + inherited
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    # input text to scan
+    def iter_matches(self, text: str, whole_words: bool = False) -> Iterator[Tuple[int, int, int]]:
+        """Every occurrence of every pattern, overlapping ones included."""
+        text_to_scan = fold_case(text) if self.case_insensitive else text  # same length, so positions carry over
+        transitions, fail, output, patterns = self.transitions, self.fail, self.output, self.patterns
+        state = 0
+        for i, char in enumerate(text_to_scan):
+            code = ord(char)
+            while state and (state << CHAR_BITS | code) not in transitions:
+                state = fail[state]
+            state = transitions.get(state << CHAR_BITS | code, 0)
+            if state not in output:
+                continue
+            end = i + 1
+            for index in output[state]:
+                start = end - len(patterns[index])
+                if whole_words and ((start > 0 and is_word_char(text[start - 1]))
+                                    or (end < len(text) and is_word_char(text[end]))):
+                    continue
+                yield start, end, index
+    # output (start, end, pattern index), ordered by end position
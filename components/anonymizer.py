@@ -1,26 +1,68 @@
+from typing import TextIO, Union
+
 from components.entity_mapper import EntityMapper
 from components.entities import EntityMatch
+from components.entity_table import EntityTable
+from components.span_rewriter import rewrite_spans, spans_are_disjoint
 
 # input text, entities, and mapper
 class Anonymizer:
-    def __init__(self, text: str, entities: list[EntityMatch], mapper: EntityMapper):
+    SUPPORTED_LABELS = frozenset({'PER', 'ORG', 'LOC', 'EMAIL', 'PHONE', 'MISC', 'IBAN', 'CREDIT_CARD', 'SSN', 'IP'})
+
+    def __init__(self, text: str, entities: Union[list[EntityMatch], EntityTable], mapper: EntityMapper):
         self.text = text
         self.entities = entities
         self.mapper = mapper
-        self.supported_labels = {'PER', 'ORG', 'LOC', 'EMAIL', 'PHONE', 'MISC'}
+        self.supported_labels = set(self.SUPPORTED_LABELS)
         self.result_text = None
         self.filtered_entities = None
-        
+        self.offset_map = None  # original <-> anonymized positions of every replaced entity
+
         # Set original text in mapper for collision detection
         self.mapper.set_original_text(text)
 
     def anonymize(self):
-        valid_entities = [e for e in self.entities if e.label in self.supported_labels] # gets entites for labels
+        self.result_text = self._rewrite()
+
+    def anonymize_to(self, output: TextIO):
+        """Anonymize and write the result straight to a file handle instead of keeping it in memory."""
+        self._rewrite(output)
+
+    def _rewrite(self, output: TextIO = None):
+        if isinstance(self.entities, EntityTable):
+            spans = self._table_spans()
+        else:
+            valid_entities = [e for e in self.entities if e.label in self.supported_labels] # gets entites for labels
+            ordered = sorted(valid_entities, key=lambda e: e.start, reverse=True) # sorts entities by start position
+            ordered.reverse() # document order for the forward pass
+            # one mapper call for the whole document, placeholders are numbered in document order
+            placeholders = self.mapper.get_or_create_placeholders(ordered)
+            spans = [(entity.start, entity.end, placeholder) for entity, placeholder in zip(ordered, placeholders)]
+            self.filtered_entities = valid_entities
+
+        if spans_are_disjoint(spans):
+            # one forward pass over the sorted spans
+            result_text, self.offset_map = rewrite_spans(self.text, spans, output)
+            return result_text
+
+        # overlapping spans: keep the replace-from-the-end behaviour, no offset map
         result_text = self.text
-        for entity in sorted(valid_entities, key=lambda e: e.start, reverse=True): # sorts entities by start position
-            placeholder = self.mapper.get_or_create_placeholder(entity)
-            result_text = result_text[:entity.start] + placeholder + result_text[entity.end:] # replaces entity with placeholder in reversed text
-        self.result_text = result_text
-        self.filtered_entities = valid_entities
+        for start, end, placeholder in reversed(spans):
+            result_text = result_text[:start] + placeholder + result_text[end:] # replaces entity with placeholder in reversed text
+        self.offset_map = None
+        if output is not None:
+            output.write(result_text)
+            return None
+        return result_text
+
+    def _table_spans(self):
+        """Spans of an EntityTable, without creating an EntityMatch per row."""
+        valid = self.entities.select_labels(self.supported_labels)
+        placeholders = self.mapper.get_or_create_table_placeholders(valid)  # one lookup per distinct entity
+        starts, ends = valid.starts.tolist(), valid.ends.tolist()
+        order = sorted(range(len(valid)), key=starts.__getitem__, reverse=True)
+        order.reverse()  # same order as the list path, also for entities that start at the same position
+        self.filtered_entities = valid
+        return [(starts[i], ends[i], placeholders[i]) for i in order]
 
-# output anonymized text with entities replaced by placeholders
\ No newline at end of file
+# output anonymized text with entities replaced by placeholders
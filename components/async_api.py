@@ -0,0 +1,186 @@
+"""
+Async detection API with micro-batching.
+Many small concurrent requests (chat messages, tickets) would each run their
+own batch-size-1 forward pass. AsyncEntityDetector queues the NER chunks of
+all callers and runs them as one padded batch once max_batch_size chunks are
+waiting or the oldest has waited max_wait seconds, whichever comes first.
+Tokenization and inference run on a single background thread, off the event
+loop, under the detector's model_lock, and every caller gets back the entities
+of its own chunks.
+
+This path runs regex, gazetteer, NER micro-batches, deduplication and
+propagation. It does not use the detector's cascade, ner_cache,
+sentence_dedup, direct_inference or num_workers: every chunk goes through the
+pipeline in this process, so results can differ from detect_entities_full_text
+of a detector configured with those.
+
+    async with AsyncEntityDetector(detector, max_batch_size=8, max_wait=0.01) as api:
+        entities = await api.detect_entities_full_text(text)
+"""
+
+import time
+import asyncio
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .entities import EntityMatch
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Percentile of already sorted values, rounded down to an observed value (0.0 when empty)."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[int(fraction * (len(sorted_values) - 1))]
+
+
+class AsyncEntityDetector:
+    """Micro-batching asyncio front end of an EntityDetector; one instance per event loop."""
+
+    def __init__(self, detector, max_batch_size: int = 8, max_wait: float = 0.01, latency_window: int = 10000):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.detector = detector
+        self.max_batch_size = max_batch_size  # chunks per forward pass
+        self.max_wait = max_wait  # seconds the oldest queued chunk waits for the batch to fill
+        self.latencies = deque(maxlen=latency_window)  # seconds per request, the most recent ones
+        self.requests = 0
+        self.batches = 0
+        self.batched_chunks = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ner-batch")  # the model runs one batch at a time
+        skipped = self._skipped_features()
+        if skipped:
+            logger.warning(f"AsyncEntityDetector doesn't use {', '.join(skipped)} of the detector")
+
+    def _skipped_features(self) -> List[str]:
+        """Detector options that the micro-batching path ignores."""
+        detector = self.detector
+        options = {
+            'cascade': getattr(detector, 'cascade', None) is not None,
+            'ner_cache': getattr(detector, 'ner_cache', None) is not None,
+            'sentence_dedup': getattr(detector, 'sentence_dedup', False),
+            'direct_inference': getattr(detector, 'direct_inference', False),
+            'num_workers': getattr(detector, 'num_workers', 1) > 1,
+        }
+        return [name for name, enabled in options.items() if enabled]
+
+    async def start(self):
+        if self._batcher is None:
+            self._queue = asyncio.Queue()
+            self._batcher = asyncio.get_running_loop().create_task(self._run_batches())
+
+    async def close(self):
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+            self._batcher = None
+        self._executor.shutdown(wait=True)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    # input text of one request
+    async def detect_entities_full_text(self, text: str) -> List[EntityMatch]:
+        if not text or not text.strip():
+            return []
+        await self.start()
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        # regex and gazetteer are per request, on the default executor; tokenization shares the
+        # model's thread, since a concurrent pipeline call changes the fast tokenizer's truncation
+        entities = await asyncio.to_thread(self._prepare, text)
+        chunks = await loop.run_in_executor(self._executor, self._chunk, text) if self.detector.use_ner else []
+        futures = []
+        for chunk in chunks:
+            future = loop.create_future()
+            self._queue.put_nowait((chunk, future))
+            futures.append(future)
+        for chunk_entities in await asyncio.gather(*futures):
+            entities.extend(chunk_entities)
+        result = await asyncio.to_thread(self._finish, text, entities)
+        self.requests += 1
+        self.latencies.append(time.perf_counter() - start)
+        return result
+    # output deduplicated entities, as detect_entities_full_text returns them without cascade, cache or sentence dedup
+
+    def _prepare(self, text: str) -> List[EntityMatch]:
+        entities = self.detector._detect_entities_regex_chunked(text)
+        entities.extend(self.detector._detect_entities_gazetteer(text))
+        return entities
+
+    def _chunk(self, text: str) -> List[Tuple[str, int, int]]:
+        with self.detector.model_lock:  # other threads may run the same detector synchronously
+            return self.detector._create_ner_chunks(text)
+
+    def _detect_batch(self, chunks: List[Tuple[str, int, int]]) -> List[List[EntityMatch]]:
+        with self.detector.model_lock:
+            return self.detector._detect_entities_ner_batched(chunks, self.max_batch_size)
+
+    def _finish(self, text: str, entities: List[EntityMatch]) -> List[EntityMatch]:
+        entities = self.detector._deduplicate_entities(entities)
+        if self.detector.propagate_entities:
+            entities = self.detector._propagate_entities(text, entities)
+        return entities
+
+    async def _collect_batch(self) -> List[Tuple[Tuple[str, int, int], asyncio.Future]]:
+        """Wait for a first chunk, then for more until the batch is full or its deadline passes."""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return [(chunk, future) for chunk, future in batch if not future.done()]  # skip callers that were cancelled
+
+    async def _run_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+            if not batch:
+                continue
+            chunks = [chunk for chunk, _ in batch]
+            try:
+                results = await loop.run_in_executor(self._executor, self._detect_batch, chunks)
+            except Exception as e:
+                logger.warning(f"Micro-batch of {len(chunks)} chunks failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.batched_chunks += len(chunks)
+            for (_, future), chunk_entities in zip(batch, results):
+                if not future.done():
+                    future.set_result(chunk_entities)
+
+    def stats(self) -> Dict:
+        """Request count, batch sizes and p50/p99 latency in seconds over the latency window."""
+        latencies = sorted(self.latencies)
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'average_batch_size': self.batched_chunks / self.batches if self.batches else 0.0,
+            'p50_latency': percentile(latencies, 0.50),
+            'p99_latency': percentile(latencies, 0.99),
+            'max_latency': latencies[-1] if latencies else 0.0,
+        }
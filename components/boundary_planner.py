@@ -0,0 +1,165 @@
+"""
+Chunk boundary planning over a precomputed index of protected spans.
+Emails, URLs and phone numbers (spans a cut must not split) are indexed once
+per text, starting from cheap literal triggers ('@', 'http', 'www.', digit
+groups) so the full patterns only run next to them. Every boundary check
+afterwards is a bisect into that index. A lazy planner indexes only the
+windows around the boundaries it is asked about, with the same result there.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterable, List, Optional, Tuple
+import re
+
+EMAIL_PATTERN = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+URL_PATTERN = re.compile(r'https?://[^\s]+|www\.[^\s]+')
+PHONE_PATTERN = re.compile(r'\+?1?[-.\s]?\(?[0-9]{3}\)?[-.\s]?[0-9]{3}[-.\s]?[0-9]{4}')
+# digits and phone separators, at least as long as the shortest phone number
+PHONE_CANDIDATE_PATTERN = re.compile(r'[0-9][0-9\s().-]{8,}[0-9]')
+PHONE_RUN_CHARACTER = re.compile(r'[0-9\s().-]')  # characters a phone candidate is made of
+SENTENCE_END_PATTERN = re.compile(r'[.!?]+["\'”’)\]]*(?=\s|$)')  # including closing quotes and brackets
+
+EMAIL_CONTEXT = 64  # longest local part looked at before an '@'
+EMAIL_DOMAIN_CONTEXT = 256  # longest domain looked at after an '@'
+
+
+class BoundaryPlanner:
+    """Protected-span and sentence-end index of one text."""
+
+    def __init__(self, text: str, lazy: bool = False):
+        self.text = text
+        self.span_starts = array('q')
+        self.span_ends = array('q')
+        self._sentence_ends = None  # built on first use, only token windows need it
+        self.lazy = lazy  # True = spans are indexed per index_window() call, not for the whole text up front
+        if not lazy:
+            self._add_spans(self._find_protected_spans(text))
+
+    # input window [lo, hi] of cuts a lazy planner will be asked about
+    def index_window(self, lo: int, hi: int):
+        """Index every protected span that touches [lo, hi], including spans merged with those."""
+        if not self.lazy:
+            return
+        lo, hi = max(0, lo), min(len(self.text), hi)
+        spans = self._find_protected_spans(self.text, lo, hi)
+        while spans:  # a span reaching out of the window may overlap more spans outside it
+            outer_lo = min(lo, min(start for start, _ in spans))
+            outer_hi = max(hi, max(end for _, end in spans))
+            if (outer_lo, outer_hi) == (lo, hi):
+                break
+            lo, hi = outer_lo, outer_hi
+            spans = self._find_protected_spans(self.text, lo, hi)
+        self._add_spans(spans)
+    # output spans added to the index, bisect lookups inside the window are as for the whole text
+
+    def _add_spans(self, spans: List[Tuple[int, int]]):
+        if not spans:
+            return
+        spans = self._merge(spans)
+        if self.span_ends and spans[0][0] < self.span_ends[-1]:  # not strictly after the index (repeated window)
+            spans = self._merge(list(zip(self.span_starts, self.span_ends)) + spans)
+            self.span_starts, self.span_ends = array('q'), array('q')
+        for start, end in spans:
+            self.span_starts.append(start)
+            self.span_ends.append(end)
+
+    @staticmethod
+    def _find_protected_spans(text: str, lo: int = 0, hi: Optional[int] = None) -> List[Tuple[int, int]]:
+        """Protected spans touching [lo, hi] (the whole text by default), possibly a few more."""
+        hi = len(text) if hi is None else hi
+        spans = []
+
+        # emails around every '@'; an email touching the window has its '@' at most this far outside
+        at = text.find('@', max(0, lo - EMAIL_DOMAIN_CONTEXT), hi + EMAIL_CONTEXT + 1)
+        while at != -1:
+            position = max(0, at - EMAIL_CONTEXT)
+            while True:
+                match = EMAIL_PATTERN.search(text, position, at + EMAIL_DOMAIN_CONTEXT)
+                if match is None or match.start() > at:
+                    break
+                if at < match.end():
+                    spans.append((match.start(), match.end()))
+                    break
+                position = match.end()
+            at = text.find('@', at + 1, hi + EMAIL_CONTEXT + 1)
+
+        # URLs from every 'http' / 'www.'; a URL has no whitespace, so it starts in the word around lo or later
+        url_lo = lo
+        while url_lo > 0 and not text[url_lo - 1].isspace():
+            url_lo -= 1
+        for prefix in ('http', 'www.'):
+            position = text.find(prefix, url_lo, hi + len(prefix))
+            while position != -1:
+                match = URL_PATTERN.match(text, position)
+                if match:
+                    spans.append((match.start(), match.end()))
+                position = text.find(prefix, position + 1, hi + len(prefix))
+
+        # phone numbers inside digit groups; a number may start up to three characters earlier ("+1 (").
+        # Candidates are scanned from the start of the digit/separator run around lo, so they are the
+        # same ones a scan of the whole text finds
+        phone_lo, phone_hi = lo, min(len(text), hi + 3)
+        while phone_lo > 0 and PHONE_RUN_CHARACTER.match(text, phone_lo - 1):
+            phone_lo -= 1
+        while phone_hi < len(text) and PHONE_RUN_CHARACTER.match(text, phone_hi):
+            phone_hi += 1
+        for candidate in PHONE_CANDIDATE_PATTERN.finditer(text, phone_lo, phone_hi):
+            for match in PHONE_PATTERN.finditer(text, max(0, candidate.start() - 3), candidate.end()):
+                spans.append((match.start(), match.end()))
+
+        return spans
+
+    @staticmethod
+    def _merge(spans: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Sorted, non-overlapping union of the spans."""
+        merged = []
+        for start, end in sorted(spans):
+            if merged and start < merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    @property
+    def sentence_ends(self) -> array:
+        """Positions right after a sentence end, sentence ends inside protected spans left out."""
+        if self._sentence_ends is None:
+            self.index_window(0, len(self.text))  # every sentence end is checked
+            self._sentence_ends = array('q', (m.end() for m in SENTENCE_END_PATTERN.finditer(self.text)
+                                              if self.is_safe_cut(m.end())))
+        return self._sentence_ends
+
+    def protected_span_at(self, cut: int) -> Optional[Tuple[int, int]]:
+        """(start, end) of the protected span a cut at this position would split, or None."""
+        i = bisect_left(self.span_starts, cut) - 1  # last span starting before the cut
+        if i >= 0 and self.span_ends[i] > cut:
+            return self.span_starts[i], self.span_ends[i]
+        return None
+
+    def is_safe_cut(self, cut: int) -> bool:
+        """True if cutting the text at this position splits no protected span."""
+        return self.protected_span_at(cut) is None
+
+    # input search range [lo, hi) for the break character and the characters that may end a chunk
+    def last_safe_break(self, lo: int, hi: int, break_chars: Iterable[str]) -> Optional[int]:
+        """Cut right after the last break character in [lo, hi) that isn't inside a protected span."""
+        i = hi - 1
+        while i >= lo:
+            span = self.protected_span_at(i + 1)
+            if span is not None:
+                i = span[0] - 1  # skip the whole span
+                continue
+            if self.text[i] in break_chars:
+                return i + 1
+            i -= 1
+        return None
+    # output cut position or None
+
+    def last_sentence_end(self, lo: int, hi: int) -> Optional[int]:
+        """Last sentence end in [lo, hi], or None."""
+        sentence_ends = self.sentence_ends
+        i = bisect_right(sentence_ends, hi) - 1
+        if i >= 0 and sentence_ends[i] >= lo:
+            return sentence_ends[i]
+        return None
@@ -0,0 +1,164 @@
+"""
+Two-tier cascade for NER chunks.
+A cheap tier looks at every chunk first and decides whether the full NER
+model has to run on it.
+
+The heuristic tier (no model) has no calibrated confidences: it escalates
+every chunk with a capitalised word besides common ones like "The", and only
+skips chunks without any. On prose and news nearly every chunk escalates.
+
+The model tier (a small token-classification model) honours both bounds:
+entities at or above upper_bound are kept as they are, entities below
+lower_bound are dropped as noise, anything in between escalates the chunk.
+A recall guard escalates a chunk the model tier would skip or accept when
+the heuristic sees a name-like run there that no kept entity covers.
+"""
+
+import re
+import logging
+from typing import Dict, List, Tuple
+
+from .entities import EntityMatch
+
+logger = logging.getLogger(__name__)
+
+
+class HeuristicChunkScorer:
+    """Cheap tier without a model: capitalised word runs scored by how name-like they look."""
+    provides_labels = False  # candidates only say "something might be here", never final entities
+
+    # runs of capitalised words, e.g. "Acme Corporation", "New York City", "IBM"
+    CANDIDATE_PATTERN = re.compile(r"\b[A-Z][\w'’&-]*(?:[ \t]+[A-Z][\w'’&-]*)*")
+    SENTENCE_START_PATTERN = re.compile(r"(?:^|[.!?:;\"“”'‘’(\[\n]\s*)$")
+    COMMON_WORDS = {
+        'A', 'An', 'The', 'I', 'It', 'He', 'She', 'We', 'They', 'You', 'This', 'That', 'These', 'Those',
+        'In', 'On', 'At', 'But', 'And', 'Or', 'If', 'So', 'As', 'For', 'To', 'Of', 'My', 'His', 'Her',
+        'Our', 'Their', 'Its', 'What', 'When', 'Where', 'Why', 'How', 'Who', 'Yes', 'No', 'Not', 'Oh',
+        'Mr', 'Mrs', 'Ms', 'Dr', 'Sir', 'Dear', 'Best', 'Thank', 'Please', 'There', 'Then', 'Now',
+    }
+
+    # input chunk text and its offset in the document
+    def score(self, text: str, chunk_offset: int = 0) -> List[EntityMatch]:
+        candidates = []
+        for match in self.CANDIDATE_PATTERN.finditer(text):
+            words = match.group().split()
+            # leading common words ("The Acme Corp") don't count towards the run
+            while words and words[0] in self.COMMON_WORDS:
+                words = words[1:]
+            if not words:
+                continue
+
+            sentence_start = bool(self.SENTENCE_START_PATTERN.search(text[max(0, match.start() - 3):match.start()]))
+            if len(words) > 1:
+                confidence = 0.8  # multi-word capitalised run, very likely a name
+            elif len(words[0]) > 1 and words[0].isupper():
+                confidence = 0.7  # acronym
+            elif sentence_start:
+                confidence = 0.3  # a single capitalised word may just start the sentence
+            else:
+                confidence = 0.6  # capitalised word inside a sentence
+
+            candidates.append(EntityMatch(
+                text=match.group(),
+                label='MISC',
+                start=match.start() + chunk_offset,
+                end=match.end() + chunk_offset,
+                confidence=confidence
+            ))
+        return candidates
+    # output candidate entities with heuristic confidence
+
+
+class ModelChunkScorer:
+    """Cheap tier with a small local token-classification model; its confident entities are kept as they are."""
+    provides_labels = True
+
+    def __init__(self, model_name: str, map_label=None):
+        from transformers import pipeline
+
+        self.model_name = model_name
+        self.map_label = map_label or (lambda label: label)
+        self.ner_pipeline = pipeline("ner", model=model_name, tokenizer=model_name,
+                                     aggregation_strategy="simple", device=-1)
+        logger.info(f"Loaded cascade model: {model_name}")
+
+    # input chunk text and its offset in the document
+    def score(self, text: str, chunk_offset: int = 0) -> List[EntityMatch]:
+        candidates = []
+        for entity in self.ner_pipeline(text):
+            actual_text = text[entity['start']:entity['end']]
+            if actual_text.strip():
+                candidates.append(EntityMatch(
+                    text=actual_text,
+                    label=self.map_label(entity['entity_group']),
+                    start=entity['start'] + chunk_offset,
+                    end=entity['end'] + chunk_offset,
+                    confidence=float(entity['score'])
+                ))
+        return candidates
+    # output entities found by the small model
+
+
+class CascadeFilter:
+    """Decides per chunk whether the full NER model has to run."""
+
+    GUARD_CONFIDENCE = 0.5  # recall guard candidates: multi-word runs, acronyms, capitalised words inside a sentence
+
+    def __init__(self, scorer, lower_bound: float = 0.5, upper_bound: float = 0.95, recall_guard=None):
+        if not 0.0 <= lower_bound <= upper_bound:
+            raise ValueError("cascade bounds must satisfy 0 <= lower_bound <= upper_bound")
+        self.scorer = scorer
+        self.lower_bound = lower_bound  # model tier entities below this are noise (heuristic tier: unused)
+        self.upper_bound = upper_bound  # model tier entities at or above this are trusted (heuristic tier: unused)
+        self.recall_guard = recall_guard  # heuristic scorer checked against the model tier, None = no guard
+        self.stats: Dict[str, int] = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Start a new run of per-chunk counters."""
+        self.stats = {
+            'chunks_total': 0,
+            'chunks_escalated': 0,  # sent to the full model
+            'chunks_accepted': 0,  # cheap tier entities kept, full model skipped
+            'chunks_skipped': 0,  # no candidates (or only noise below lower_bound), full model skipped
+            'recall_guard_escalations': 0,  # escalated only because the guard saw a name the model tier missed
+        }
+
+    def _route(self, chunk_text: str, chunk_offset: int) -> Tuple[str, List[EntityMatch]]:
+        """'escalate', 'guard', 'accept' or 'skip', with the entities an accepted chunk keeps."""
+        candidates = self.scorer.score(chunk_text, chunk_offset)
+        if not self.scorer.provides_labels:  # heuristic scores aren't probabilities, any candidate escalates
+            return ('escalate' if candidates else 'skip'), []
+
+        kept = [c for c in candidates if c.confidence >= self.lower_bound]
+        if any(c.confidence < self.upper_bound for c in kept):
+            return 'escalate', []
+        if self.recall_guard is not None:
+            for guess in self.recall_guard.score(chunk_text, chunk_offset):
+                if guess.confidence >= self.GUARD_CONFIDENCE and not any(
+                        c.start < guess.end and c.end > guess.start for c in kept):
+                    return 'guard', []
+        return ('accept' if kept else 'skip'), kept
+
+    # input chunks as (chunk_text, chunk_offset, token_count)
+    def select(self, chunks: List[Tuple[str, int, int]]) -> Tuple[List[int], List[EntityMatch]]:
+        """Return indices of the chunks that need the full model and the cheap tier entities that were accepted."""
+        escalated = []
+        accepted = []
+        for i, (chunk_text, chunk_offset, _) in enumerate(chunks):
+            route, entities = self._route(chunk_text, chunk_offset)
+            self.stats['chunks_total'] += 1
+            if route in ('escalate', 'guard'):
+                escalated.append(i)
+                self.stats['chunks_escalated'] += 1
+                self.stats['recall_guard_escalations'] += route == 'guard'
+            elif route == 'accept':
+                accepted.extend(entities)
+                self.stats['chunks_accepted'] += 1
+            else:
+                self.stats['chunks_skipped'] += 1
+
+        logger.info(f"Cascade: {self.stats['chunks_escalated']}/{self.stats['chunks_total']} chunks escalated, "
+                    f"{self.stats['chunks_accepted']} accepted from cheap tier, {self.stats['chunks_skipped']} skipped")
+        return escalated, accepted
+    # output indices of chunks for the full model, accepted cheap tier entities
@@ -4,9 +4,10 @@ Optimized text chunking processor for anonymization system.
 Supports multiple chunking strategies for different use cases.
 """
 
-import re
 import logging      # logging for debug info
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+
+from .boundary_planner import BoundaryPlanner
 
 logger = logging.getLogger(__name__)
 
@@ -18,8 +19,14 @@ class ChunkProcessor:
         self.overlap_size = overlap_size
 
     #input text, sets up tokenizer that will be used, number of tokens in chunk, and overlap tokens
-    def create_tokenized_chunks(self, text: str, tokenizer, max_tokens: int = 400, overlap_tokens: int = 25) -> List[Tuple[str, int]]:
-        """Create chunks based on tokenizer boundaries with precise offset mapping."""
+    def create_tokenized_chunks(self, text: str, tokenizer, max_tokens: int = 400, overlap_tokens: int = 25,
+                                return_token_counts: bool = False, align_boundaries: bool = False) -> List[Tuple[str, int]]:
+        """Create chunks based on tokenizer boundaries with precise offset mapping.
+
+        With return_token_counts=True each chunk is returned as (chunk_text, chunk_offset, token_count).
+        With align_boundaries=True a chunk may end up to a quarter of max_tokens early, at a sentence end
+        or at least outside an email, URL or phone number.
+        """
         # Ensure text is not empty
         if not text:
             return []
@@ -38,28 +45,141 @@ class ChunkProcessor:
         tokens = tokenized['input_ids'] 
         offset_mapping = tokenized['offset_mapping']
         
+        planner = BoundaryPlanner(text) if align_boundaries else None
         chunks = []
-        start_token = 0
-        
-        while start_token < len(tokens):
-            # returns either start token + chunk size in create_tokenized_chunks if there is more tokens to processor end token
-            end_token = min(start_token + effective_max_tokens, len(tokens))
-
+        for start_token, end_token in self._plan_token_windows(len(tokens), effective_max_tokens, overlap_tokens,
+                                                               offset_mapping, planner):
             # uses offset_mapping to increment start and end positions of next chunk
             chunk_char_start = offset_mapping[start_token][0]
             chunk_char_end = offset_mapping[end_token - 1][1]
             chunk_text = text[chunk_char_start:chunk_char_end]
             chunk_offset = chunk_char_start
 
-            chunks.append((chunk_text, chunk_offset)) # append tuple of chunk and its start position
-
-            # Move to next chunk with overlap
-            if end_token >= len(tokens):
-                break
-            start_token = max(0, end_token - overlap_tokens) # increment start token for next chunk minus the overlap
+            if return_token_counts:
+                chunks.append((chunk_text, chunk_offset, end_token - start_token)) # token count is used for length bucketing
+            else:
+                chunks.append((chunk_text, chunk_offset)) # append tuple of chunk and its start position
 
         logger.info(f"Created {len(chunks)} tokenized chunks for NER processing (max {effective_max_tokens} tokens each)")
         return chunks
+    # input text, tokenizer, number of tokens in window, and overlap tokens
+    def create_token_windows(self, text: str, tokenizer, max_tokens: int = 400, overlap_tokens: int = 25,
+                             align_boundaries: bool = False) -> List[Tuple[List[int], List[Tuple[int, int]], int]]:
+        """Create the same windows as create_tokenized_chunks, but keep the token ids and offsets.
+
+        Every window is (input_ids, offset_mapping, chunk_offset), offsets are absolute character
+        positions in text, so the model can run on the ids without tokenizing the chunk text again.
+        """
+        if not text:
+            return []
+
+        effective_max_tokens = min(max_tokens, 400)
+        tokenized = tokenizer(
+            text,
+            add_special_tokens=False,
+            truncation=False,
+            return_offsets_mapping=True
+        )
+        tokens = tokenized['input_ids']
+        offset_mapping = tokenized['offset_mapping']
+
+        # Tokens of the first and last word of a window can differ from what tokenizing the chunk text
+        # on its own would give (e.g. a missing leading space), so only those edge pieces are tokenized
+        # again. Interior tokens are reused as they are.
+        planner = BoundaryPlanner(text) if align_boundaries else None
+        windows = []
+        pieces = []  # (window index, position, char_start, char_end) of every edge piece
+        for start_token, end_token in self._plan_token_windows(len(tokens), effective_max_tokens, overlap_tokens,
+                                                               offset_mapping, planner):
+            window_offsets = [tuple(offset) for offset in offset_mapping[start_token:end_token]]
+            # word boundaries are gaps between two non-empty tokens (whitespace not covered by any token)
+            gaps = [j for j in range(1, len(window_offsets))
+                    if window_offsets[j][0] > window_offsets[j - 1][1]
+                    and window_offsets[j][1] > window_offsets[j][0]
+                    and window_offsets[j - 1][1] > window_offsets[j - 1][0]]
+            w = len(windows)
+            if gaps:
+                head_end, tail_start = gaps[0], gaps[-1]
+                pieces.append((w, 'head', window_offsets[0][0], window_offsets[head_end - 1][1]))
+                pieces.append((w, 'tail', window_offsets[tail_start - 1][1], window_offsets[-1][1]))
+                middle = (tokens[start_token + head_end:start_token + tail_start], window_offsets[head_end:tail_start])
+            else:
+                pieces.append((w, 'head', window_offsets[0][0], window_offsets[-1][1]))
+                middle = ([], [])
+            windows.append({'head': ([], []), 'middle': middle, 'tail': ([], []), 'offset': window_offsets[0][0]})
+
+        if pieces:
+            piece_tokens = tokenizer(
+                [text[char_start:char_end] for _, _, char_start, char_end in pieces],
+                add_special_tokens=False,
+                truncation=False,
+                return_offsets_mapping=True
+            )
+            for (w, position, char_start, _), piece_ids, piece_offsets in zip(
+                    pieces, piece_tokens['input_ids'], piece_tokens['offset_mapping']):
+                windows[w][position] = (piece_ids, [(char_start + piece_start, char_start + piece_end)
+                                            for piece_start, piece_end in piece_offsets])
+
+        windows = [
+            (window['head'][0] + window['middle'][0] + window['tail'][0],
+             window['head'][1] + window['middle'][1] + window['tail'][1],
+             window['offset'])
+            for window in windows
+        ]
+
+        logger.info(f"Created {len(windows)} token windows for NER processing (max {effective_max_tokens} tokens each)")
+        return windows
+    # output list of (input_ids, offset_mapping, chunk_offset)
+
+    # input number of tokens in the text, tokens per window, overlap tokens, token offsets and boundary index
+    def _plan_token_windows(self, token_count: int, max_tokens: int, overlap_tokens: int,
+                            offset_mapping=None, planner: Optional[BoundaryPlanner] = None) -> List[Tuple[int, int]]:
+        """Return (start_token, end_token) for every window, consecutive windows overlap by overlap_tokens."""
+        # how many tokens a window may give up to end at a better place (never so many that it stops advancing)
+        slack = 0
+        if planner is not None and offset_mapping is not None:
+            slack = max(0, min(max_tokens // 4, max_tokens - overlap_tokens - 1))
+
+        windows = []
+        start_token = 0
+        while start_token < token_count:
+            # returns either start token + chunk size if there is more tokens to process or the end token
+            end_token = min(start_token + max_tokens, token_count)
+            if slack and end_token < token_count:
+                end_token = self._aligned_end_token(end_token, end_token - slack, offset_mapping, planner)
+            windows.append((start_token, end_token))
+
+            # Move to next window with overlap
+            if end_token >= token_count:
+                break
+            start_token = max(0, end_token - overlap_tokens) # increment start token for next window minus the overlap
+        return windows
+
+    @staticmethod
+    def _aligned_end_token(end_token: int, lowest_end: int, offset_mapping, planner: BoundaryPlanner) -> int:
+        """Latest end token in [lowest_end, end_token] that ends at a sentence end, else outside protected spans."""
+        sentence_end = planner.last_sentence_end(offset_mapping[lowest_end - 1][1], offset_mapping[end_token - 1][1])
+        if sentence_end is not None:
+            for candidate in range(end_token, lowest_end - 1, -1):
+                if offset_mapping[candidate - 1][1] <= sentence_end:
+                    return candidate
+        for candidate in range(end_token, lowest_end - 1, -1):
+            if planner.is_safe_cut(offset_mapping[candidate - 1][1]):
+                return candidate
+        return end_token
+    # output end token of the window
+
+    # input token count of every chunk and number of chunks per batch
+    def create_length_buckets(self, token_counts: List[int], batch_size: int) -> List[List[int]]:
+        """Group chunk indices into batches of similar token length (longest first) to minimise padding."""
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        # sort by token count (longest first), ties keep document order
+        order = sorted(range(len(token_counts)), key=lambda i: -token_counts[i])
+        return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+    # output list of batches, each batch is a list of indices into the original chunk list
+
     # input text, chunk size, and overlap size
     def create_regex_safe_chunks(self, text: str, chunk_size: int = 5000, overlap_size: int = 200) -> List[Tuple[str, int]]:
         """Create chunks that avoid breaking regex patterns at boundaries."""
@@ -72,6 +192,7 @@ class ChunkProcessor:
 
         # Characters that commonly are good break points
         safe_break_chars = {' ', '\n', '\t', '.', '!', '?', ';', '\r'}
+        planner = BoundaryPlanner(text, lazy=True)  # protected spans near the boundaries only
         
         while start < text_length:
             end = min(start + chunk_size, text_length)
@@ -82,15 +203,14 @@ class ChunkProcessor:
                 search_start = max(end - 50, start + chunk_size // 2)
                 # end search in overlap territory
                 search_end = min(end + 50, text_length)
-                # in this search range, look for safe break points
-                best_break = end
-                for i in range(search_end - 1, search_start - 1, -1):
-                    if text[i] in safe_break_chars:
-                        # Additional check: avoid breaking URLs, emails, phone numbers
-                        if not self._is_inside_pattern(text, i):
-                            best_break = i + 1
-                            break
-                
+                # in this search range, look for safe break points (bisect lookups into the span index)
+                planner.index_window(search_start, max(search_end, end))
+                best_break = planner.last_safe_break(search_start, search_end, safe_break_chars)
+                if best_break is None:
+                    # no break character: at least don't cut through an email, URL or phone number
+                    span = planner.protected_span_at(end)
+                    best_break = span[0] if span is not None and span[0] > start else end
+
                 end = best_break
             
             chunk = text[start:end]
@@ -106,27 +226,3 @@ class ChunkProcessor:
 
         logger.info(f"Created {len(chunks)} regex-safe chunks")
         return chunks
-    # input text and position from create_regex_safe_chunks chunks.append((chunk, start))
-    def _is_inside_pattern(self, text: str, position: int) -> bool:
-        """Check if position is inside a potential regex pattern."""
-        # Check a small window around the position of a letter in the text
-        window_start = max(0, position - 30) # overlap with previous chunk if it exists
-        window_end = min(len(text), position + 30) # overlap with next after chunk if it exists
-        window = text[window_start:window_end]  # extract the window of text
-
-        # Look for patterns that shouldn't be broken
-        patterns_to_avoid = [
-            r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}',  # Email
-            r'https?://[^\s]+ www\.[^\s]+',  # URL
-            r'\+?1?[-.\s]?\(?[0-9]{3}\)?[-.\s]?[0-9]{3}[-.\s]?[0-9]{4}',  # Phone
-        ]
-        # input patterns to avoid
-        for pattern in patterns_to_avoid: # if it matches a pattern to avoid breaking
-            for match in re.finditer(pattern, window): # if the pattern to avoid is found in the window
-                match_start = window_start + match.start()  # determine start of match
-                match_end = window_start + match.end()  # determine end of match
-                if match_start <= position <= match_end:    # check if position is within match
-                    return True  # if it is, return True
-
-        return False  # else return False
-
@@ -1,20 +1,37 @@
-from typing import Dict
+from typing import Dict, TextIO
 import re
 
 
 class TextDeanonymizer:
     """Class for reversing the anonymization process with collision-safe replacement."""
 
+    # a placeholder token: brackets around text without brackets, e.g. [PER_12]
+    TOKEN_PATTERN = re.compile(r'\[[^\[\]]*\]')
+
     # input anonymized text and entity mapping
     @staticmethod
-    def deanonymize_text(anonymized_text: str,  
-                        entity_mapping: Dict[str, str]) -> str: 
-        result = anonymized_text
-        
+    def deanonymize_text(anonymized_text: str,
+                        entity_mapping: Dict[str, str]) -> str:
         # Filter to only well-formed placeholders (start with [ and end with ])
         valid_placeholders = {k: v for k, v in entity_mapping.items()  # initiates two variables to hold start and end positions of placeholders
                             if k.startswith('[') and k.endswith(']')}
-        
+
+        if TextDeanonymizer._single_pass_safe(valid_placeholders):
+            # one scan over the text, every placeholder token resolved with a dict lookup
+            result = TextDeanonymizer.TOKEN_PATTERN.sub(
+                lambda m: valid_placeholders.get(m.group(), m.group()), anonymized_text)
+            if not TextDeanonymizer._has_placeholders(result, valid_placeholders):
+                return result
+
+        # replacements can form new placeholders: keep the one-placeholder-at-a-time passes
+        return TextDeanonymizer._deanonymize_sequential(anonymized_text, valid_placeholders)
+    # output text with placeholders replaced by the original entities
+
+    @staticmethod
+    def _deanonymize_sequential(anonymized_text: str, valid_placeholders: Dict[str, str]) -> str:
+        """One replacement pass per placeholder, longest first."""
+        result = anonymized_text
+
         # Sort placeholders by length (longest first) to avoid partial replacements
         sorted_placeholders = sorted(valid_placeholders.keys(), key=len, reverse=True)
 
@@ -23,6 +40,70 @@ class TextDeanonymizer:
             original_entity = valid_placeholders[placeholder]
             # Use word boundary regex to ensure exact match only
             escaped_placeholder = re.escape(placeholder)
-            result = re.sub(escaped_placeholder, original_entity, result)
-        
-        return result
\ No newline at end of file
+            result = re.sub(escaped_placeholder, lambda m, value=original_entity: value, result) # literal replacement
+
+        return result
+
+    @staticmethod
+    def _single_pass_safe(valid_placeholders: Dict[str, str]) -> bool:
+        """True if every placeholder is a single bracket token and no original text contains brackets.
+
+        Tokens of that shape can't overlap each other, so finding them once gives the same
+        result as replacing them longest first.
+        """
+        for placeholder, original in valid_placeholders.items():
+            if not TextDeanonymizer.TOKEN_PATTERN.fullmatch(placeholder) or '[' in original or ']' in original:
+                return False
+        return True
+
+    @staticmethod
+    def _has_placeholders(text: str, valid_placeholders: Dict[str, str]) -> bool:
+        """True if a placeholder appears in already deanonymized text (brackets around a replaced entity)."""
+        return any(m.group() in valid_placeholders for m in TextDeanonymizer.TOKEN_PATTERN.finditer(text))
+
+    # input anonymized file handle, output file handle, entity mapping
+    @staticmethod
+    def deanonymize_stream(anonymized_file: TextIO, output_file: TextIO,
+                           entity_mapping: Dict[str, str], chunk_size: int = 1 << 20) -> int:
+        """Deanonymize from one file handle to another, holding at most one chunk (plus a partial token) in memory."""
+        valid_placeholders = {k: v for k, v in entity_mapping.items() if k.startswith('[') and k.endswith(']')}
+        if not TextDeanonymizer._single_pass_safe(valid_placeholders):
+            # placeholders that aren't single tokens need the whole text
+            text = TextDeanonymizer.deanonymize_text(anonymized_file.read(), entity_mapping)
+            output_file.write(text)
+            return len(text)
+
+        max_length = max((len(k) for k in valid_placeholders), default=0)
+        replace = lambda m: valid_placeholders.get(m.group(), m.group())
+        pending = ''  # unfinished token at the end of the last chunk
+        output_tail = ''  # unfinished token at the end of the written output
+        written = 0
+
+        while True:
+            chunk = anonymized_file.read(chunk_size)
+            text = pending + chunk
+            if chunk:
+                # a token can only contain '[' at its start, so a token cut by the chunk end starts at the last '['
+                cut = text.rfind('[')
+                if cut == -1 or ']' in text[cut:] or len(text) - cut >= max_length:
+                    cut = len(text)
+                text, pending = text[:cut], text[cut:]
+
+            piece = TextDeanonymizer.TOKEN_PATTERN.sub(replace, text)
+            output_tail = TextDeanonymizer._check_output(output_tail, piece, valid_placeholders, max_length)
+            output_file.write(piece)
+            written += len(piece)
+            if not chunk:
+                return written
+    # output number of characters written
+
+    @staticmethod
+    def _check_output(output_tail: str, piece: str, valid_placeholders: Dict[str, str], max_length: int) -> str:
+        """Fail if written output contains a placeholder again; return the unfinished token at its end."""
+        text = output_tail + piece
+        if TextDeanonymizer._has_placeholders(text, valid_placeholders):
+            raise ValueError("Deanonymized text forms placeholders again, use deanonymize_text on the whole text")
+        start = text.rfind('[')
+        if start == -1 or ']' in text[start:] or len(text) - start >= max_length:
+            return ''
+        return text[start:]
@@ -1,55 +1,137 @@
-import re 
+import time
 import logging
-import torch
-from transformers import AutoTokenizer, AutoModelForTokenClassification, pipeline
+import threading
+import numpy as np
 from .entities import EntityMatch
+from .entity_table import EntityTable
 from .chunk_processor import ChunkProcessor
-from typing import List, Dict
+from .ner_worker_pool import NERWorkerPool
+from .ner_decoding import decode_token_logits
+from .inference_backends import TorchBackend, OnnxBackend, load_quantized_model
+from .cascade import CascadeFilter, HeuristicChunkScorer, ModelChunkScorer
+from .overlap_resolver import OverlapResolver, POLICIES
+from .pattern_registry import PatternRegistry, default_registry, scan_chunks_parallel
+from .ner_cache import NERCache
+from .sentence_dedup import SentenceDeduplicator
+from .aho_corasick import AhoCorasick
+from .gazetteer import Gazetteer
+from typing import List, Dict, Iterable, Iterator, Optional, Sequence, Tuple
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+REGEX_PARALLEL_MIN_CHARS = 2_000_000  # below this, forking workers costs more than the scan
+
 class EntityDetector:
     """Handles entity detection using transformer models and regex patterns."""
+    BACKENDS = ("torch", "onnx", "int8")
     # model default parameters
     def __init__(self, model_name: str = "Jean-Baptiste/roberta-large-ner-english", 
-                 confidence_threshold: float = 0.8):
+                 confidence_threshold: float = 0.8, batch_size: int = 1, num_threads: int = 2,
+                 num_workers: int = 1, threads_per_worker: int = 1, direct_inference: bool = False,
+                 backend: str = "torch", model_cache_dir: str = None, cascade: bool = False,
+                 cascade_model_name: str = None, cascade_bounds: Tuple[float, float] = (0.5, 0.95),
+                 overlap_policy: str = "confidence", regex_workers: int = 1,
+                 pattern_registry: PatternRegistry = None, ner_cache: NERCache = None,
+                 sentence_dedup: bool = False, propagate_entities: bool = False, overlap_tokens: int = 25,
+                 gazetteer: Gazetteer = None, use_ner: bool = True, align_chunk_boundaries: bool = False):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {self.BACKENDS}")
+        if overlap_policy not in POLICIES:
+            raise ValueError(f"Unknown overlap policy '{overlap_policy}', expected one of {tuple(POLICIES)}")
         self.model_name = model_name
         self.confidence_threshold = confidence_threshold
+        self.batch_size = batch_size  # number of NER chunks per forward pass (1 = one chunk at a time)
+        self.num_threads = num_threads  # torch threads in the main process
+        self.num_workers = num_workers  # NER worker processes (1 = run in this process)
+        self.threads_per_worker = threads_per_worker  # torch threads in every worker process
+        self.direct_inference = direct_inference  # run the model on ChunkProcessor's token ids instead of the pipeline
+        self.backend = backend  # "torch" (eager PyTorch), "onnx" (ONNX Runtime) or "int8" (dynamically quantized PyTorch)
+        self.model_cache_dir = model_cache_dir  # where exported models are kept (default ~/.cache/ai_anonymizer)
+        self.overlap_policy = overlap_policy  # "confidence", "prefer_regex" or "longest" wins overlapping entities
+        self.regex_workers = regex_workers  # processes for regex chunks of multi-MB inputs (1 = this process)
+        self.pattern_registry = pattern_registry  # regex entity types (default: default_registry())
+        self.ner_cache = ner_cache  # NER results of chunks seen before (None = always run the model)
+        self.sentence_dedup = sentence_dedup  # run NER once per distinct sentence, stats in sentence_deduplicator.stats
+        self.sentence_deduplicator = SentenceDeduplicator()
+        self.propagate_entities = propagate_entities  # find every other occurrence of accepted NER entities
+        self.propagation_min_length = 3  # shorter surface forms ("He", "US") are too ambiguous to propagate
+        self.propagation_stats = {}
+        self.overlap_tokens = overlap_tokens  # tokens shared by neighbouring NER chunks
+        self.align_chunk_boundaries = align_chunk_boundaries  # end NER chunks at sentence ends / outside protected spans
+        self.gazetteer = gazetteer  # customer term lists that are always anonymized (None = no deny-list)
+        self.use_ner = use_ner  # False = regex-only profile: no model, torch and transformers are never imported
+        self._ner_failures = 0  # failed model calls in this process; results of a run with failures aren't cached
+        # one NER pass at a time: threads sharing this detector (model server, batch, async API) would otherwise
+        # race on the fast tokenizer's truncation state and on the per-run stats below
+        self.model_lock = threading.RLock()
         self.chunk_processor = ChunkProcessor()
         
-        self._setup_model()
+        if use_ner:
+            self._setup_model()
+        else:
+            self.tokenizer = self.model = self.ner_pipeline = self.inference_backend = None
+            logger.info("Regex-only profile, NER model not loaded")
         self._setup_patterns()
+        self._setup_cascade(cascade, cascade_model_name, cascade_bounds)
     
     def _setup_model(self): # setting up the model
+        # imported here, so regex-only use and the rest of the package never pay for torch and transformers
+        import torch
+        from transformers import AutoTokenizer, AutoModelForTokenClassification, pipeline
         try:
-            torch.set_num_threads(2)  # Limit CPU threads
+            torch.set_num_threads(self.num_threads)  # Limit CPU threads
             
             self.tokenizer = AutoTokenizer.from_pretrained(self.model_name) 
-            self.model = AutoModelForTokenClassification.from_pretrained(self.model_name) 
-            self.ner_pipeline = pipeline(
-                "ner", # task type
-                model=self.model,
-                tokenizer=self.tokenizer, 
-                aggregation_strategy="simple", 
-                device=-1,  # Force CPU
-                torch_dtype=torch.float32 # use basic float32 for precision
-            )
-            logger.info(f"Loaded NER model: {self.model_name}") # log that its loaded
+            if self.backend == "onnx":
+                # exported graph is cached on disk, the torch weights are only loaded for the first export
+                self.inference_backend = OnnxBackend(self.model_name, cache_dir=self.model_cache_dir,
+                                                     num_threads=self.num_threads)
+                self.model = None
+                self.ner_pipeline = None  # NER runs on token windows through the backend
+            else:
+                if self.backend == "int8":
+                    # Linear layers quantized to int8, quantized weights are cached on disk
+                    self.model = load_quantized_model(self.model_name, cache_dir=self.model_cache_dir)
+                else:
+                    self.model = AutoModelForTokenClassification.from_pretrained(self.model_name) 
+                self.inference_backend = TorchBackend(self.model, quantized=self.backend == "int8")
+                self.ner_pipeline = pipeline(
+                    "ner", # task type
+                    model=self.model,
+                    tokenizer=self.tokenizer, 
+                    aggregation_strategy="simple", 
+                    device=-1,  # Force CPU
+                    torch_dtype=torch.float32 # use basic float32 for precision
+                )
+            self.id2label = self.inference_backend.id2label
+            logger.info(f"Loaded NER model: {self.model_name} ({self.backend} backend)") # log that its loaded
         except Exception as e:
             logger.error(f"Failed to load model {self.model_name}: {e}")
             raise
     
+    def _setup_cascade(self, enabled: bool, cascade_model_name: str, bounds: Tuple[float, float]):
+        """Setup the cheap first tier that decides which chunks need the full model."""
+        self.cascade = None
+        if not enabled or not self.use_ner:
+            return
+        if cascade_model_name:
+            scorer = ModelChunkScorer(cascade_model_name, map_label=self._map_label) # small local NER model
+            self.cascade = CascadeFilter(scorer, lower_bound=bounds[0], upper_bound=bounds[1],
+                                         recall_guard=HeuristicChunkScorer())
+            logger.info(f"Cascade enabled ({type(scorer).__name__}, bounds {bounds[0]}-{bounds[1]})")
+        else:
+            # no model, capitalised word runs; bounds don't apply, only chunks without candidates are skipped
+            self.cascade = CascadeFilter(HeuristicChunkScorer(), lower_bound=bounds[0], upper_bound=bounds[1])
+            logger.info("Cascade enabled (HeuristicChunkScorer, skips only chunks without capitalised words)")
+
     def _setup_patterns(self): # setting up regex patterns
         """Setup regex patterns for additional entity types.""" 
         try:
-            self.patterns = {
-                'EMAIL': re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'),
-                'PHONE': re.compile(r'\b(?:\+?1[-.\s]?)?\(?[2-9]\d{2}\)?[-.\s]?\d{3}[-.\s]?\d{4}\b|'
-                                r'\b1-800-[A-Z]{7}\b'),
-                'URL': re.compile(r'https?://(?:[-\w.])+(?:[:\d]+)?(?:/(?:[\w/_.])*(?:\?(?:[\w&=%.])*)?)?')
-            }
-            logger.info("Loaded regex patterns for EMAIL, PHONE, and URL detection")
+            if self.pattern_registry is None:
+                self.pattern_registry = default_registry()
+            self.patterns = self.pattern_registry.compiled_patterns()
+            logger.info(f"Loaded regex patterns for {', '.join(self.pattern_registry.labels)} detection")
         except Exception as e:
             logger.error(f"Failed to setup regex patterns: {e}")
             raise
@@ -59,47 +141,279 @@ class EntityDetector:
         if not text or not text.strip():
             return []
         
-        entities = []
-        
-        # logging regex detection with pattern-aware chunking
-        logger.info("Phase 1/2: Regex detection with pattern-aware chunking...")
-        entities.extend(self._detect_entities_regex_chunked(text))
-
-        # logging NER detection on tokenized chunks
-        logger.info("Phase 2/2: NER detection with precise tokenized chunking...")
-        entities.extend(self._detect_entities_ner_chunked(text))
-        
+        entities = [entity for stage in self._detect_raw_stages(text) for entity in stage]
         logger.info(f"Raw entities found: {len(entities)}")
         logger.info("Deduplicating entities...")
         deduplicated = self._deduplicate_entities(entities)
+        if self.propagate_entities:
+            logger.info("Propagating NER entities to every occurrence...")
+            deduplicated = self._propagate_entities(text, deduplicated)
         logger.info(f"Final entities after deduplication: {len(deduplicated)}")
         
         return deduplicated
     
+    def _detect_raw_stages(self, text: str) -> Iterator[List[EntityMatch]]:
+        """Regex, gazetteer and NER entities of the whole text, one stage at a time, before deduplication."""
+        # logging regex detection with pattern-aware chunking
+        logger.info("Phase 1/2: Regex detection with pattern-aware chunking...")
+        yield self._detect_entities_regex_chunked(text)
+        yield self._detect_entities_gazetteer(text)
+
+        # logging NER detection on tokenized chunks
+        logger.info("Phase 2/2: NER detection with precise tokenized chunking...")
+        yield self._detect_entities_ner_chunked(text)
+
+    # input text
+    def detect_entity_table(self, text: str) -> EntityTable:
+        """detect_entities_full_text as a columnar EntityTable over text (texts are sliced from it on demand).
+
+        Every stage's entity list becomes a table as soon as the stage returns, so only one stage's
+        EntityMatch objects are alive at a time; deduplication and propagation work on the columns.
+        """
+        if not text or not text.strip():
+            return EntityTable.from_entities([], text)
+        table = EntityTable.concat([EntityTable.from_entities(stage, text) for stage in self._detect_raw_stages(text)], text)
+        logger.info(f"Raw entities found: {len(table)}")
+        logger.info("Deduplicating entity table...")
+        resolver = OverlapResolver(self.overlap_policy, regex_labels=self.patterns.keys())
+        table = resolver.resolve_table(table)
+        self._log_deduplication(resolver)
+        if self.propagate_entities:
+            logger.info("Propagating NER entities to every occurrence...")
+            table = self._propagate_table(text, table)
+        logger.info(f"Final entities after deduplication: {len(table)}")
+        return table
+    # output deduplicated entities, one table row each
+
+    # input one window of a larger text and its offset in that text
+    def detect_raw_entities(self, text: str, offset: int = 0) -> List[EntityMatch]:
+        """Regex and NER entities of a window, not deduplicated, positions relative to the whole text."""
+        if not text or not text.strip():
+            return []
+        entities = self._detect_entities_regex_chunked(text)
+        entities.extend(self._detect_entities_gazetteer(text))
+        entities.extend(self._detect_entities_ner_chunked(text))
+        for entity in entities:
+            entity.start += offset
+            entity.end += offset
+        return entities
+    # output raw entities (the caller resolves duplicates and overlaps)
+
     def _detect_entities_ner_chunked(self, text: str) -> List[EntityMatch]:
+        """NER detection with tokenized chunking, once per distinct sentence if sentence_dedup is on."""
+        if not self.use_ner:
+            return []
+        with self.model_lock:
+            if self.sentence_dedup:
+                return self.sentence_deduplicator.detect(text, self._detect_entities_ner_text)
+            return self._detect_entities_ner_text(text)
+
+    def _detect_entities_ner_text(self, text: str) -> List[EntityMatch]:
         """NER detection with tokenized chunking for optimal transformer performance."""
+        if self.direct_inference or self.ner_pipeline is None:
+            return self._detect_entities_ner_direct(text)
+
         # Use ChunkProcessor for tokenized chunking
-        chunks = self.chunk_processor.create_tokenized_chunks(text, self.tokenizer, max_tokens=400, overlap_tokens=25)
+        chunks = self._create_ner_chunks(text)
         
         entities = []
-        total_chunks = len(chunks)
+        cascade_entities = []
+        if self.cascade is not None: # only chunks the cheap tier is unsure about go to the full model
+            self.cascade.reset_stats()
+            escalated, cascade_entities = self.cascade.select(chunks)
+            chunks = [chunks[i] for i in escalated]
+        cached_results, cache_keys = [], []
+        if self.ner_cache is not None: # chunks seen before skip the model, only the misses are run
+            cache_keys, cached_results = self._lookup_ner_cache([(chunk_text, chunk_offset, ())
+                                                                  for chunk_text, chunk_offset, _ in chunks])
+            missing = [i for i, cached in enumerate(cached_results) if cached is None]
+            model_chunks = [chunks[i] for i in missing]
+        else:
+            model_chunks = chunks
+        total_chunks = len(model_chunks)
+        failures_before = self._ner_failures
+        start_time = time.perf_counter()
 
-        for i, (chunk_text, chunk_offset) in enumerate(chunks, 1): # chunked text and starting position in specific chunk
-            logger.info(f"Processing NER chunk {i}/{total_chunks} (offset: {chunk_offset})") # log chunk processing
-            ner_entities = self._detect_entities_ner(chunk_text, chunk_offset)
-            entities.extend(ner_entities) # extend the list with new entities
-            logger.info(f"Found {len(ner_entities)} entities in chunk {i}")
+        use_worker_pool = self.num_workers > 1
+        if use_worker_pool and not NERWorkerPool.is_supported():
+            logger.warning("NER worker pool needs the 'fork' start method, running in a single process")
+            use_worker_pool = False
+
+        if use_worker_pool:
+            # forked worker processes share the loaded model copy-on-write
+            logger.info(f"Running NER on {total_chunks} chunks with {self.num_workers} worker processes")
+            pool = NERWorkerPool(self, num_workers=self.num_workers, threads_per_worker=self.threads_per_worker)
+            chunk_entities = pool.detect(text, model_chunks)
+        elif self.batch_size > 1:
+            # batched inference, results come back in original chunk order
+            chunk_entities = self._detect_entities_ner_batched(model_chunks)
+        else:
+            chunk_entities = []
+            for i, (chunk_text, chunk_offset, _) in enumerate(model_chunks, 1): # chunked text and starting position in specific chunk
+                logger.info(f"Processing NER chunk {i}/{total_chunks} (offset: {chunk_offset})") # log chunk processing
+                ner_entities = self._detect_entities_ner(chunk_text, chunk_offset)
+                chunk_entities.append(ner_entities)
+                logger.info(f"Found {len(ner_entities)} entities in chunk {i}")
+
+        if self.ner_cache is not None:
+            chunk_entities = self._store_ner_cache(cache_keys, cached_results, missing, chunk_entities,
+                                                   [chunk_offset for _, chunk_offset, _ in chunks], failures_before)
+        for ner_entities in chunk_entities: # chunk order, cached or not
+            entities.extend(ner_entities)
+        entities.extend(cascade_entities)
         
-        logger.info(f"NER processing complete: {len(entities)} total entities from {total_chunks} chunks")
+        elapsed = time.perf_counter() - start_time
+        throughput = total_chunks / elapsed if elapsed > 0 else 0.0
+        logger.info(f"NER processing complete: {len(entities)} total entities from {total_chunks} chunks "
+                    f"({throughput:.2f} chunks/sec, batch size {self.batch_size})")
         return entities
 
+    def _create_ner_chunks(self, text: str) -> List[Tuple[str, int, int]]:
+        """Tokenized NER chunks of text as (chunk_text, chunk_offset, token_count)."""
+        return self.chunk_processor.create_tokenized_chunks(text, self.tokenizer, max_tokens=400, overlap_tokens=self.overlap_tokens,
+                                                            return_token_counts=True, align_boundaries=self.align_chunk_boundaries)
+
+    def _detect_entities_ner_batched(self, chunks: List[Tuple[str, int, int]], batch_size: Optional[int] = None) -> List[List[EntityMatch]]:
+        """Run NER over length-bucketed, padded batches and map results back to the original chunks."""
+        # input chunks as (chunk_text, chunk_offset, token_count)
+        if self.ner_pipeline is None: # backend without a pipeline, one chunk at a time
+            return [self._detect_entities_ner(chunk_text, chunk_offset) for chunk_text, chunk_offset, _ in chunks]
+        results: List[List[EntityMatch]] = [[] for _ in chunks]
+        buckets = self.chunk_processor.create_length_buckets([count for _, _, count in chunks], batch_size or self.batch_size)
+
+        for b, indices in enumerate(buckets, 1):
+            batch_texts = [chunks[i][0] for i in indices]
+            logger.info(f"Processing NER batch {b}/{len(buckets)} ({len(indices)} chunks)")
+            try:
+                batch_results = self.ner_pipeline(batch_texts, batch_size=len(batch_texts)) # one padded forward pass
+            except Exception as e:
+                logger.warning(f"Batched NER failed, falling back to single chunks: {e}")
+                self._ner_failures += 1
+                for i in indices:
+                    results[i] = self._detect_entities_ner(chunks[i][0], chunks[i][1])
+                continue
+
+            for i, ner_results in zip(indices, batch_results): # map each result back to its chunk
+                chunk_text, chunk_offset, _ = chunks[i]
+                results[i] = self._entities_from_ner_results(chunk_text, ner_results, chunk_offset)
+        # output entities per chunk, in the same order as the input chunks
+        return results
+
+    def _detect_entities_ner_direct(self, text: str) -> List[EntityMatch]:
+        """NER detection on the token windows from a single tokenization of the whole text (no pipeline)."""
+        # input text, tokenized once, windows keep their input_ids and absolute offsets
+        windows = self.chunk_processor.create_token_windows(text, self.tokenizer, max_tokens=400, overlap_tokens=self.overlap_tokens,
+                                                            align_boundaries=self.align_chunk_boundaries)
+        cascade_entities = []
+        if self.cascade is not None: # only windows the cheap tier is unsure about go to the full model
+            self.cascade.reset_stats()
+            escalated, cascade_entities = self.cascade.select(
+                [(text[offsets[0][0]:offsets[-1][1]], offsets[0][0], len(ids)) for ids, offsets, _ in windows])
+            windows = [windows[i] for i in escalated]
+        all_windows = windows
+        if self.ner_cache is not None: # windows seen before skip the model, only the misses are run
+            # keyed by token ids too, a window's first token depends on the text before it
+            cache_keys, cached_results = self._lookup_ner_cache(
+                [(text[offsets[0][0]:offsets[-1][1]], offsets[0][0], ids) for ids, offsets, _ in windows])
+            missing = [i for i, cached in enumerate(cached_results) if cached is None]
+            windows = [windows[i] for i in missing]
+        buckets = self.chunk_processor.create_length_buckets([len(ids) for ids, _, _ in windows], max(1, self.batch_size))
+        id2label = self.id2label
+
+        window_entities: List[List[EntityMatch]] = [[] for _ in windows]
+        failures_before = self._ner_failures
+        start_time = time.perf_counter()
+        for b, indices in enumerate(buckets, 1):
+            logger.info(f"Processing NER windows batch {b}/{len(buckets)} ({len(indices)} windows)")
+            try:
+                logits, prefix_length = self._token_logits([windows[i][0] for i in indices])
+            except Exception as e:
+                logger.warning(f"NER model detection failed: {e}")
+                self._ner_failures += 1
+                continue
+
+            for row, i in enumerate(indices): # decode every window with its saved offset mapping
+                input_ids, offsets, _ = windows[i]
+                window_logits = logits[row, prefix_length:prefix_length + len(input_ids)]
+                ner_results = decode_token_logits(window_logits, offsets, id2label)
+                window_entities[i] = self._entities_from_ner_results(text, ner_results) # offsets are already absolute
+
+        if self.ner_cache is not None:
+            window_entities = self._store_ner_cache(cache_keys, cached_results, missing, window_entities,
+                                                    [offsets[0][0] for _, offsets, _ in all_windows], failures_before)
+        entities = [entity for chunk_entities in window_entities for entity in chunk_entities]
+        entities.extend(cascade_entities)
+        elapsed = time.perf_counter() - start_time
+        throughput = len(windows) / elapsed if elapsed > 0 else 0.0
+        logger.info(f"NER processing complete: {len(entities)} total entities from {len(windows)} windows "
+                    f"({throughput:.2f} chunks/sec, direct inference)")
+        # output entities in window order, same as the pipeline path
+        return entities
+
+    # input chunks as (chunk_text, chunk_offset, token_ids); token ids only where the text alone doesn't fix them
+    def _lookup_ner_cache(self, chunks: List[Tuple[str, int, Sequence[int]]]) -> Tuple[List[str], List[Optional[List[EntityMatch]]]]:
+        """Cache key of every chunk and its cached entities (rebased onto the chunk offset), None where missing."""
+        self.ner_cache.reset_stats()
+        keys, results = [], []
+        for chunk_text, chunk_offset, token_ids in chunks:
+            key = NERCache.make_key(chunk_text, self.model_name, self.confidence_threshold,
+                                    self.inference_backend.version, token_ids)
+            keys.append(key)
+            results.append(self.ner_cache.get(key, chunk_offset))
+        logger.info(f"NER cache: {self.ner_cache.hits} hits, {self.ner_cache.misses} misses")
+        return keys, results
+    # output cache keys and cached entities, both in chunk order
+
+    def _store_ner_cache(self, keys: List[str], cached_results: List[Optional[List[EntityMatch]]], missing: List[int],
+                         model_results: List[List[EntityMatch]], chunk_offsets: List[int],
+                         failures_before: int) -> List[List[EntityMatch]]:
+        """Cache the model results of the missed chunks and merge them with the hits, in chunk order."""
+        store = self._ner_failures == failures_before  # an empty result of a failed call must not be cached
+        if not store:
+            logger.warning("NER model failed during this run, its results are not cached")
+        results = list(cached_results)
+        for i, chunk_entities in zip(missing, model_results):
+            if store:
+                self.ner_cache.put(keys[i], chunk_entities, chunk_offsets[i])
+            results[i] = chunk_entities
+        return results
+
+    def _token_logits(self, batch_ids: List[List[int]]) -> Tuple[np.ndarray, int]:
+        """Run the inference backend on token ids (special tokens and padding added here)."""
+        # input token ids without special tokens, one list per window
+        # same layout the pipeline's tokenizer produces: <s> tokens </s> (RoBERTa) or [CLS] tokens [SEP] (BERT)
+        prefix = [self.tokenizer.cls_token_id] if self.tokenizer.cls_token_id is not None else []
+        suffix = [self.tokenizer.sep_token_id] if self.tokenizer.sep_token_id is not None else []
+        sequences = [prefix + list(ids) + suffix for ids in batch_ids]
+        prefix_length = len(prefix)
+        max_length = max(len(sequence) for sequence in sequences)
+
+        pad_id = self.tokenizer.pad_token_id if self.tokenizer.pad_token_id is not None else 0
+        input_ids = np.full((len(sequences), max_length), pad_id, dtype=np.int64)
+        attention_mask = np.zeros((len(sequences), max_length), dtype=np.int64)
+        for row, sequence in enumerate(sequences):
+            input_ids[row, :len(sequence)] = sequence
+            attention_mask[row, :len(sequence)] = 1
+
+        logits = self.inference_backend.logits(input_ids, attention_mask)
+        # output logits as numpy (batch, tokens, labels) and number of leading special tokens
+        return logits, prefix_length
+
     def _detect_entities_regex_chunked(self, text: str) -> List[EntityMatch]: 
         """Regex detection with character-based chunking that respects pattern boundaries."""
         chunks = self.chunk_processor.create_regex_safe_chunks(text, chunk_size=5000, overlap_size=200) # chunk logic in chunk_processor
         
         entities = []
         total_chunks = len(chunks)
-        
+
+        if self.regex_workers > 1 and len(text) >= REGEX_PARALLEL_MIN_CHARS and NERWorkerPool.is_supported():
+            # multi-MB input: chunks are scanned in forked processes sharing the text
+            logger.info(f"Scanning {total_chunks} regex chunks with {self.regex_workers} worker processes")
+            for regex_entities in scan_chunks_parallel(self.pattern_registry, text, chunks, self.regex_workers):
+                entities.extend(regex_entities)
+            logger.info(f"Regex processing complete: {len(entities)} total entities from {total_chunks} chunks")
+            return entities
+
         for i, (chunk_text, chunk_offset) in enumerate(chunks, 1): # chunked text and starting position in specific chunk
             logger.info(f"Processing regex chunk {i}/{total_chunks} (offset: {chunk_offset})")
             regex_entities = self._detect_entities_regex(chunk_text, chunk_offset)
@@ -109,102 +423,162 @@ class EntityDetector:
         logger.info(f"Regex processing complete: {len(entities)} total entities from {total_chunks} chunks")
         return entities
 
+    def _detect_entities_gazetteer(self, text: str) -> List[EntityMatch]:
+        """Gazetteer terms in one automaton pass over the whole text (no chunking needed)."""
+        if self.gazetteer is None:
+            return []
+        entities = self.gazetteer.scan(text)
+        logger.info(f"Gazetteer: {len(entities)} entities from {len(self.gazetteer)} terms")
+        return entities
+
     def _detect_entities_ner(self, text: str, chunk_offset: int = 0) -> List[EntityMatch]:
         """Detect entities using NER model."""
         entities = []
         # input text chunk
         try:
-            ner_results = self.ner_pipeline(text) # result of text processing through NER pipeline
-            for entity in ner_results: # iterate through NER results
-                if entity['score'] >= self.confidence_threshold: # confidence score
-                    label = self._map_label(entity['entity_group']) # NER labels
-                    start_pos = entity['start'] + chunk_offset  # start position adjusted for chunking
-                    end_pos = entity['end'] + chunk_offset  # end position adjusted for chunking
-                    
-                    # Use exact text from original source instead of entity['word']
-                    # This preserves exact spacing and avoids tokenizer artifacts
-                    actual_text = text[entity['start']:entity['end']]
-                    
-                    if actual_text and actual_text.strip():  # Only check if not empty after stripping
-                        entities.append(EntityMatch(
-                            text=actual_text,
-                            label=label,
-                            start=start_pos,
-                            end=end_pos,
-                            confidence=entity['score']
-                        ))
+            if self.ner_pipeline is None: # backend without a pipeline, tokenize the chunk and decode the logits
+                ner_results = self._ner_results_from_backend(text)
+            else:
+                ner_results = self.ner_pipeline(text) # result of text processing through NER pipeline
+            entities = self._entities_from_ner_results(text, ner_results, chunk_offset)
         except Exception as e:
             logger.warning(f"NER model detection failed: {e}")
+            self._ner_failures += 1
         # output entities
         return entities
 
-    def _detect_entities_regex(self, text: str, chunk_offset: int = 0) -> List[EntityMatch]:
-        """Detect entities using regex patterns."""
+    def _ner_results_from_backend(self, text: str) -> List[Dict]:
+        """Pipeline-style NER results for one chunk, computed with the inference backend."""
+        tokenized = self.tokenizer(text, add_special_tokens=False, truncation=False, return_offsets_mapping=True)
+        input_ids = tokenized['input_ids']
+        if not input_ids:
+            return []
+        logits, prefix_length = self._token_logits([input_ids])
+        return decode_token_logits(logits[0, prefix_length:prefix_length + len(input_ids)],
+                                   tokenized['offset_mapping'], self.id2label)
+
+    def _entities_from_ner_results(self, text: str, ner_results: List[Dict], chunk_offset: int = 0) -> List[EntityMatch]:
+        """Turn aggregated NER pipeline output for one chunk into EntityMatch objects."""
         entities = []
-        #input text chunk
-        for label, pattern in self.patterns.items(): # loads regex patterns
-            for match in pattern.finditer(text): # find all matches in text
-                entity_text = match.group()
-                if entity_text.strip():  # Only check if not empty
+        for entity in ner_results: # iterate through NER results
+            if entity['score'] >= self.confidence_threshold: # confidence score
+                label = self._map_label(entity['entity_group']) # NER labels
+                start_pos = entity['start'] + chunk_offset  # start position adjusted for chunking
+                end_pos = entity['end'] + chunk_offset  # end position adjusted for chunking
+                
+                # Use exact text from original source instead of entity['word']
+                # This preserves exact spacing and avoids tokenizer artifacts
+                actual_text = text[entity['start']:entity['end']]
+                
+                if actual_text and actual_text.strip():  # Only check if not empty after stripping
                     entities.append(EntityMatch(
-                        text=entity_text,
+                        text=actual_text,
                         label=label,
-                        start=match.start() + chunk_offset,
-                        end=match.end() + chunk_offset,
-                        confidence=1.0
+                        start=start_pos,
+                        end=end_pos,
+                        confidence=entity['score']
                     ))
-        # output entities
         return entities
 
+    def _detect_entities_regex(self, text: str, chunk_offset: int = 0) -> List[EntityMatch]:
+        """Detect entities using regex patterns."""
+        #input text chunk
+        # one pass with a combined scanner over the entries whose triggers occur in the chunk
+        return self.pattern_registry.scan(text, chunk_offset)
+        # output entities
+
     def _deduplicate_entities(self, entities: List[EntityMatch]) -> List[EntityMatch]:
         """Remove duplicate and overlapping entities (improved for chunking)."""
         # input entities from EntityMatch
         if not entities: # check if entities list is empty
             return entities
-        
-        # Remove exact positional duplicates (same entity found multiple times at same position)
-        # This handles chunking overlap where the same entity appears in multiple chunks
-        seen_positions = set()
-        position_deduplicated = []
-        exact_duplicate_count = 0
-        # iterate through entities from EntityMatch
-        for entity in entities:
-            # Use position + text + label as key for exact duplicates
-            key = (entity.start, entity.end, entity.text.lower(), entity.label)
-            if key not in seen_positions:
-                seen_positions.add(key)
-                position_deduplicated.append(entity)
-                # utput unique entity with start, end, text and label
-            else:
-                exact_duplicate_count += 1
-
-
-        # Handle overlapping entities (keep highest confidence)
-        # Sort by start position, then by confidence (highest first)
-        position_deduplicated.sort(key=lambda x: (x.start, -x.confidence)) # sort first by earlier start position and more confidence
-        final_entities = []
-        overlap_removed_count = 0
-        # input position_deduplicated from previous step
-        for entity in position_deduplicated: # iterate through deduplicated entities
-            overlaps = False
-            for existing in final_entities: # finding overals
-                if (entity.start < existing.end and entity.end > existing.start): # Check for overlap
-                    if entity.confidence > existing.confidence: # If current entity has higher confidence
-                        final_entities.remove(existing) # Remove existing
-                        overlap_removed_count += 1
-                        break
-                    else:
-                        overlaps = True # If existing entity has higher confidence
-                        overlap_removed_count += 1
-                        break # do nothing, skip adding current entity
-
-            if not overlaps: # If no overlap, add
-                final_entities.append(entity)
-        logger.info(f"Deduplication: Removed {exact_duplicate_count} exact duplicates.")
-        logger.info(f"Deduplication: Removed {overlap_removed_count} overlapping entities (lower confidence).")
+
+        # exact positional duplicates (chunk overlap) go first, then a sweep over start positions
+        # keeps the entity the overlap policy prefers (highest confidence by default)
+        resolver = OverlapResolver(self.overlap_policy, regex_labels=self.patterns.keys())
+        final_entities = resolver.resolve(entities)
+        self._log_deduplication(resolver)
         return final_entities
     # output deduplicated entities + logging
 
+    def _log_deduplication(self, resolver: OverlapResolver):
+        logger.info(f"Deduplication: Removed {resolver.exact_duplicate_count} exact duplicates.")
+        logger.info(f"Deduplication: Removed {resolver.overlap_removed_count} overlapping entities "
+                    f"(policy: {self.overlap_policy}).")
+
+    def _propagate_entities(self, text: str, entities: List[EntityMatch]) -> List[EntityMatch]:
+        """Add every whole-word occurrence of an accepted NER entity that the model missed."""
+        # input full text and deduplicated entities
+        with self.model_lock:  # propagation_stats belongs to this run
+            hits = [EntityMatch(text[start:end], label, start, end, confidence) for start, end, label, confidence in
+                    self._propagation_hits(text, ((e.text, e.label, e.start, e.end, e.confidence) for e in entities))]
+            if not hits:
+                return entities
+
+            # hits overlapping a detected entity are settled by the overlap policy like any other overlap
+            merged = self._deduplicate_entities(entities + hits)
+            # hits that survived the merge; a hit can replace several shorter entities, so don't diff the lengths
+            hit_ids = {id(hit) for hit in hits}
+            self.propagation_stats['added'] = sum(1 for entity in merged if id(entity) in hit_ids)
+            self._log_propagation()
+            return merged
+        # output entities including the propagated occurrences
+
+    def _propagate_table(self, text: str, table: EntityTable) -> EntityTable:
+        """_propagate_entities on the columns of a deduplicated table."""
+        with self.model_lock:
+            rows = zip(map(table.text, range(len(table))), [table.labels[i] for i in table.label_ids.tolist()],
+                       table.starts.tolist(), table.ends.tolist(), table.confidences.tolist())
+            hits = self._propagation_hits(text, rows)
+            if not hits:
+                return table
+
+            starts, ends, labels, confidences = zip(*hits)
+            label_index = {label: i for i, label in enumerate(dict.fromkeys(labels))}
+            hit_table = EntityTable(text, starts, ends, [label_index[label] for label in labels], confidences,
+                                    list(label_index))
+            resolver = OverlapResolver(self.overlap_policy, regex_labels=self.patterns.keys())
+            merged = resolver.resolve_table(EntityTable.concat([table, hit_table], text))
+            self._log_deduplication(resolver)
+            # hits never share a span with a detected entity, so every new span is a surviving hit
+            detected = set(zip(table.starts.tolist(), table.ends.tolist()))
+            self.propagation_stats['added'] = sum(1 for span in zip(merged.starts.tolist(), merged.ends.tolist())
+                                                  if span not in detected)
+            self._log_propagation()
+            return merged
+        # output table including the propagated occurrences
+
+    def _propagation_hits(self, text: str, rows: Iterable[Tuple[str, str, int, int, float]]) -> List[Tuple[int, int, str, float]]:
+        """(start, end, label, confidence) of missed occurrences; rows are (text, label, start, end, confidence)."""
+        # caller holds model_lock; resets propagation_stats for this run
+        # one surface form -> the label and confidence of its most confident detection
+        sources: Dict[str, Tuple[str, float]] = {}
+        covered = set()
+        for entity_text, label, start, end, confidence in rows:
+            covered.add((start, end))
+            if label in self.patterns:
+                continue  # regex entities are found everywhere already
+            if len(entity_text.strip()) < self.propagation_min_length or not any(c.isalnum() for c in entity_text):
+                continue
+            if entity_text not in sources or confidence > sources[entity_text][1]:
+                sources[entity_text] = (label, confidence)
+        self.propagation_stats = {'surface_forms': len(sources), 'occurrences': 0, 'added': 0}
+        if not sources:
+            return []
+
+        automaton = AhoCorasick(sources)  # one linear scan of the text for all surface forms
+        hits = []
+        for start, end, index in automaton.iter_matches(text, whole_words=True):
+            self.propagation_stats['occurrences'] += 1
+            if (start, end) not in covered:
+                label, confidence = sources[automaton.patterns[index]]
+                hits.append((start, end, label, confidence))
+        return hits
+
+    def _log_propagation(self):
+        logger.info(f"Propagation: {self.propagation_stats['surface_forms']} surface forms, "
+                    f"{self.propagation_stats['occurrences']} occurrences, {self.propagation_stats['added']} entities added")
+
     # labels refactoring
     def _map_label(self, model_label: str) -> str:
         """Map model-specific labels to standard labels."""
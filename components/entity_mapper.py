@@ -1,24 +1,52 @@
-from typing import Dict
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 from collections import defaultdict
 import threading
+import logging
+import hashlib
+import hmac
 import re
 from .entities import EntityMatch  # Import from dedicated entities module
 
+logger = logging.getLogger(__name__)
+
+# anything shaped like a placeholder, e.g. [PER_1]
+PLACEHOLDER_TOKEN = re.compile(r'\[[^\[\]\s]+\]')
+
 
 class EntityMapper: # class for mapping entities to placeholders
     """Maintains consistent entity mappings across document chunks with thread-safety and collision detection."""
     
-    def __init__(self): # constructor for entity mapper that will connect entities to placeholders
-        self.entity_to_placeholder: Dict[EntityMatch, str] = {} # makes dictionary for holding entity as key and placeholder as value
+    def __init__(self, store=None, key: Optional[Union[str, bytes]] = None, digest_chars: int = 10): # constructor for entity mapper that will connect entities to placeholders
+        if store is not None and key is not None:
+            raise ValueError("a mapper uses either a pseudonym store or a placeholder key, not both")
+        if not 4 <= digest_chars <= 64:
+            raise ValueError("digest_chars must be between 4 and 64")
+        self.entity_to_placeholder: Dict[Tuple[str, str], str] = {} # makes dictionary for holding normalized entity key as key and placeholder as value
         self.placeholder_to_entity: Dict[str, str] = {} # makes dictionary for holding placeholder as key and entity text as value
         self.counters: Dict[str, int] = defaultdict(int)    # makes counter for each entity label
         self._lock = threading.Lock()  # Thread-safe lock for concurrent access
         self.original_text = None  # Store original text to check for collisions
+        self.reserved_placeholders = set()  # placeholder-shaped tokens found in text that isn't kept in memory
+        self.text_placeholders = set()  # placeholder-shaped tokens of original_text, indexed once per text
+        self.store = store  # PseudonymStore shared by every document of a case file, None numbers per mapper
+        # secret for keyed placeholders [LABEL_<truncated HMAC>]: every process holding it agrees without talking to the others
+        self.key = key.encode('utf-8') if isinstance(key, str) else key
+        self.digest_chars = digest_chars  # hex characters of the HMAC kept in a keyed placeholder
+        self.keyed_collisions = 0  # keyed placeholders that needed a longer digest
+        self.document_aliases = 0  # stored placeholders written literally in the text, replaced by a per-document alias
+
+    def reserve_placeholders(self, tokens):
+        """Never hand out these placeholders (e.g. tokens found by a pre-scan of a streamed file)."""
+        with self._lock:
+            self.reserved_placeholders.update(tokens)
 
     def set_original_text(self, text: str):
         """Set the original text to check for placeholder collisions."""
+        # one regex pass instead of a substring scan of the whole text per new placeholder
+        tokens = set(PLACEHOLDER_TOKEN.findall(text)) if text else set()
         with self._lock:
             self.original_text = text
+            self.text_placeholders = tokens
 
     def _generate_safe_placeholder(self, label: str, text: str) -> str:
         """Generate a placeholder that doesn't exist in the original text."""
@@ -33,8 +61,13 @@ class EntityMapper: # class for mapping entities to placeholders
                 base_counter += 1
                 continue
             
+            # Check if this placeholder appears in text that was only pre-scanned
+            if placeholder in self.reserved_placeholders:
+                base_counter += 1
+                continue
+
             # Check if this placeholder appears naturally in the original text
-            if self.original_text and placeholder in self.original_text:
+            if placeholder in self.text_placeholders:
                 base_counter += 1
                 continue
             
@@ -42,21 +75,107 @@ class EntityMapper: # class for mapping entities to placeholders
             self.counters[label] = base_counter
             return placeholder
 
+    def _generate_keyed_placeholder(self, label: str, key_text: str) -> str:
+        """[LABEL_<HMAC of label and normalized text>], with a longer digest if the short one is taken."""
+        digest = hmac.new(self.key, f"{label}\0{key_text}".encode('utf-8'), hashlib.sha256).hexdigest()
+        for length in range(self.digest_chars, len(digest) + 1, 4):
+            placeholder = f"[{label}_{digest[:length]}]"
+            if placeholder in self.placeholder_to_entity or self._is_reserved(placeholder):
+                continue
+            if length > self.digest_chars:  # other processes only agree if they saw the same collision
+                self.keyed_collisions += 1
+                logger.info(f"Keyed placeholder collision for {label}, using {length} digest characters")
+            return placeholder
+        raise RuntimeError(f"No free keyed placeholder for a {label} entity")
+
+    @staticmethod
+    def _entity_key(entity: EntityMatch) -> Tuple[str, str]:
+        """Normalized identity of an entity, the same one EntityMatch.__eq__ uses."""
+        return (entity.text.lower(), entity.label)
+
+    def _is_reserved(self, placeholder: str) -> bool:
+        return placeholder in self.reserved_placeholders or placeholder in self.text_placeholders
+
+    def _fetch_from_store(self, keys: Sequence[Tuple[str, str]], entities: Sequence[EntityMatch]):
+        """Placeholders of keys not mapped yet, from the store in one bulk call; the caller holds the lock."""
+        new = {}  # key -> text of its first occurrence
+        for key, entity in zip(keys, entities):
+            if key not in self.entity_to_placeholder:
+                new.setdefault(key, entity.text)
+        if not new:
+            return
+        stored = self.store.get_or_create(list(new.items()), self._is_reserved)
+        for (key, text), placeholder in zip(new.items(), stored):
+            if self._is_reserved(placeholder):
+                # assigned by an earlier document but written literally in this one: using it would make the
+                # literal token deanonymize to the entity, so this document gets its own alias instead
+                alias = self._document_alias(key[1])
+                logger.warning(f"Stored placeholder {placeholder} occurs literally in this text, "
+                               f"using {alias} for it in this document only")
+                placeholder = alias
+            self.entity_to_placeholder[key] = placeholder
+            self.placeholder_to_entity[placeholder] = text
+
+    def _document_alias(self, label: str) -> str:
+        """A placeholder free in this text, this mapping and the store; the caller holds the lock."""
+        while True:
+            placeholder = self._generate_safe_placeholder(label, "")
+            if not self.store.texts([placeholder]):
+                break
+        self.reserved_placeholders.add(placeholder)  # later store allocations for this document skip it
+        self.document_aliases += 1
+        return placeholder
+
+    def _placeholder_for(self, key: Tuple[str, str], entity: EntityMatch) -> str:
+        """Existing or new placeholder of key; the caller holds the lock."""
+        placeholder = self.entity_to_placeholder.get(key)
+        if placeholder is None and self.store is not None:
+            self._fetch_from_store([key], [entity])
+            placeholder = self.entity_to_placeholder[key]
+        if placeholder is None:
+            # Generate collision-safe placeholder
+            if self.key is not None:
+                placeholder = self._generate_keyed_placeholder(entity.label, key[0])
+            else:
+                placeholder = self._generate_safe_placeholder(entity.label, entity.text)
+            self.entity_to_placeholder[key] = placeholder # create a mapping entity to placeholder
+            self.placeholder_to_entity[placeholder] = entity.text # create a mapping placeholder to entity text
+        return placeholder
+
     def get_or_create_placeholder(self, entity: EntityMatch) -> str: # function that will return existing placeholder or create new one for new entity
         """Get existing placeholder or create new one for entity (thread-safe)."""
-        
+        key = self._entity_key(entity)
         with self._lock:  # Ensure thread-safe access to shared state
-            if entity in self.entity_to_placeholder:       # if the entity already has a placeholder (uses EntityMatch.__hash__)
-                return self.entity_to_placeholder[entity]  # give it the same placeholder
-            
-            # Generate collision-safe placeholder
-            placeholder = self._generate_safe_placeholder(entity.label, entity.text)
+            return self._placeholder_for(key, entity)
+
+    # input entities of one document (any order)
+    def get_or_create_placeholders(self, entities: Sequence[EntityMatch]) -> List[str]:
+        """Placeholders of many entities under one lock acquisition; new ones are numbered in document order."""
+        keys = [self._entity_key(entity) for entity in entities]  # normalized before taking the lock
+        order = sorted(range(len(entities)), key=lambda i: (entities[i].start, entities[i].end))
+        placeholders = [None] * len(entities)
+        with self._lock:
+            if self.store is not None:
+                self._fetch_from_store([keys[i] for i in order], [entities[i] for i in order])
+            for i in order:
+                placeholders[i] = self._placeholder_for(keys[i], entities[i])
+        return placeholders
+    # output placeholders in the same order as the input entities
+
+    # input an EntityTable of one document
+    def get_or_create_table_placeholders(self, table) -> List[str]:
+        """Like get_or_create_placeholders, but one mapper lookup per distinct key of the table."""
+        key_ids, keys = table.normalized_keys()
+        distinct = [(key_id, keys[key_id], table[row]) for key_id, row in table.first_occurrences()]
+        by_key = [None] * len(keys)
+        with self._lock:
+            if self.store is not None:
+                self._fetch_from_store([key for _, key, _ in distinct], [entity for _, _, entity in distinct])
+            for key_id, key, entity in distinct:  # document order, so new placeholders are numbered as in the list path
+                by_key[key_id] = self._placeholder_for(key, entity)
+        return [by_key[key_id] for key_id in key_ids.tolist()]
+    # output placeholders in table row order
 
-            self.entity_to_placeholder[entity] = placeholder # create a mapping entity to placeholder
-            self.placeholder_to_entity[placeholder] = entity.text # create a mapping placeholder to entity text
-            
-            return placeholder # return the newly created placeholder
-    
     def get_mapping(self) -> Dict[str, str]: # function for deanonymization
         """Get the complete placeholder to entity mapping (thread-safe)."""
         with self._lock:  # Ensure consistent snapshot of mappings
@@ -0,0 +1,158 @@
+"""
+Columnar storage of detected entities.
+An EntityTable keeps start, end, label id and confidence of every entity in
+NumPy arrays next to the source text. Entity text is sliced from the source
+only when it is asked for, and the normalized (lower-cased text, label) keys
+are interned once per table, so a large corpus run doesn't keep millions of
+EntityMatch objects and their copied strings alive.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .entities import EntityMatch
+
+
+class EntityTable:
+    """Entities as parallel arrays; rows read back as EntityMatch when needed."""
+
+    def __init__(self, source: Optional[str], starts, ends, label_ids, confidences, labels: Sequence[str],
+                 texts: Optional[Dict[int, str]] = None):
+        self.source = source
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        self.label_ids = np.asarray(label_ids, dtype=np.int32)
+        self.confidences = np.asarray(confidences, dtype=np.float64)
+        self.labels = list(labels)  # label id -> label
+        self.texts = dict(texts or {})  # row -> text, only for entities whose text isn't source[start:end]
+        self._key_ids = None  # row -> id into _keys, built on first use
+        self._keys: Optional[List[Tuple[str, str]]] = None  # interned (lower-cased text, label) keys
+
+    # input EntityMatch objects and the text they were found in
+    @classmethod
+    def from_entities(cls, entities: Iterable[EntityMatch], source: Optional[str] = None) -> "EntityTable":
+        starts, ends, label_ids, confidences, texts = [], [], [], [], {}
+        label_index: Dict[str, int] = {}
+        for row, entity in enumerate(entities):
+            starts.append(entity.start)
+            ends.append(entity.end)
+            label_ids.append(label_index.setdefault(entity.label, len(label_index)))
+            confidences.append(entity.confidence)
+            if source is None or source[entity.start:entity.end] != entity.text:
+                texts[row] = entity.text
+        return cls(source, starts, ends, label_ids, confidences, list(label_index), texts)
+    # output a table; only text that differs from its source span is stored
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def text(self, row: int) -> str:
+        text = self.texts.get(row)
+        if text is None:
+            text = self.source[self.starts[row]:self.ends[row]]
+        return text
+
+    def label(self, row: int) -> str:
+        return self.labels[self.label_ids[row]]
+
+    def __getitem__(self, row: int) -> EntityMatch:
+        return EntityMatch(self.text(row), self.label(row), int(self.starts[row]), int(self.ends[row]),
+                           float(self.confidences[row]))
+
+    def __iter__(self) -> Iterator[EntityMatch]:
+        for row in range(len(self)):
+            yield self[row]
+
+    def to_entities(self) -> List[EntityMatch]:
+        return list(self)
+
+    def normalized_keys(self) -> Tuple[np.ndarray, List[Tuple[str, str]]]:
+        """Key id of every row and the interned (text.lower(), label) keys, the identity EntityMatch.__eq__ uses."""
+        if self._key_ids is None:
+            key_index: Dict[Tuple[str, str], int] = {}
+            key_ids = np.empty(len(self), dtype=np.int32)
+            for row in range(len(self)):
+                key = (self.text(row).lower(), self.label(row))
+                key_ids[row] = key_index.setdefault(key, len(key_index))
+            self._key_ids, self._keys = key_ids, list(key_index)
+        return self._key_ids, self._keys
+
+    def take(self, rows) -> "EntityTable":
+        """A table of the given rows, in the given order (labels and interned keys are shared)."""
+        rows = np.asarray(rows, dtype=np.int64)
+        texts = {}
+        if self.texts:
+            for new_row, row in enumerate(rows.tolist()):
+                if row in self.texts:
+                    texts[new_row] = self.texts[row]
+        table = EntityTable(self.source, self.starts[rows], self.ends[rows], self.label_ids[rows],
+                            self.confidences[rows], self.labels, texts)
+        if self._key_ids is not None:
+            table._key_ids, table._keys = self._key_ids[rows], self._keys
+        return table
+
+    # input tables over the same source text
+    @classmethod
+    def concat(cls, tables: Sequence["EntityTable"], source: Optional[str] = None) -> "EntityTable":
+        """The rows of every table, in order, with their label ids mapped onto one label list."""
+        label_index: Dict[str, int] = {}
+        label_ids, texts, offset = [], {}, 0
+        for table in tables:
+            mapping = np.array([label_index.setdefault(label, len(label_index)) for label in table.labels] or [0],
+                               dtype=np.int32)
+            label_ids.append(mapping[table.label_ids])
+            texts.update((offset + row, text) for row, text in table.texts.items())
+            offset += len(table)
+        if not tables:
+            return cls(source, [], [], [], [], [])
+        return cls(source, np.concatenate([table.starts for table in tables]), np.concatenate([table.ends for table in tables]),
+                   np.concatenate(label_ids), np.concatenate([table.confidences for table in tables]),
+                   list(label_index), texts)
+    # output one table; interned keys are rebuilt on first use
+
+    def select_labels(self, labels: Iterable[str]) -> "EntityTable":
+        """Rows whose label is one of labels, in table order."""
+        labels = set(labels)
+        wanted = [label_id for label_id, label in enumerate(self.labels) if label in labels]
+        return self.take(np.flatnonzero(np.isin(self.label_ids, wanted)))
+
+    def document_order(self) -> np.ndarray:
+        """Rows sorted by (start, end); rows with equal spans keep their table order."""
+        return np.lexsort((self.ends, self.starts))
+
+    def first_occurrences(self) -> List[Tuple[int, int]]:
+        """(key id, row) of the first occurrence of every distinct key, in document order."""
+        key_ids, _ = self.normalized_keys()
+        order = self.document_order()
+        used, first_positions = np.unique(key_ids[order], return_index=True)
+        by_position = np.argsort(first_positions)
+        return list(zip(used[by_position].tolist(), order[first_positions[by_position]].tolist()))
+
+    def confidences_by_label(self) -> Dict[str, List[float]]:
+        """label -> confidences in row order, labels in order of first appearance (StatisticsAggregator input)."""
+        if not len(self):
+            return {}
+        label_ids, first_rows = np.unique(self.label_ids, return_index=True)
+        return {self.labels[label_id]: self.confidences[self.label_ids == label_id].tolist()
+                for label_id in label_ids[np.argsort(first_rows)].tolist()}
+
+    # input a file path, whether to keep the source text in the file
+    def save(self, path, include_source: bool = True):
+        text_rows = np.fromiter(self.texts.keys(), dtype=np.int64, count=len(self.texts))
+        source = self.source.encode('utf-8') if include_source and self.source is not None else b''
+        with open(path, 'wb') as f:  # a file handle, so np.savez doesn't append .npz to the path
+            np.savez(f, starts=self.starts, ends=self.ends, label_ids=self.label_ids, confidences=self.confidences,
+                     labels=np.array(self.labels, dtype=str), text_rows=text_rows,
+                     text_values=np.array(list(self.texts.values()), dtype=str),
+                     has_source=np.array(bool(source)), source=np.frombuffer(source, dtype=np.uint8))
+    # output an uncompressed .npz; without the source, texts come from the source passed to load()
+
+    @classmethod
+    def load(cls, path, source: Optional[str] = None) -> "EntityTable":
+        with np.load(path, allow_pickle=False) as data:
+            if source is None and data['has_source']:
+                source = data['source'].tobytes().decode('utf-8')
+            texts = dict(zip(data['text_rows'].tolist(), data['text_values'].tolist()))
+            return cls(source, data['starts'], data['ends'], data['label_ids'], data['confidences'],
+                       data['labels'].tolist(), texts)
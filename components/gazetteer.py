@@ -0,0 +1,113 @@
+"""
+Gazetteer (deny-list) detection from customer-supplied term lists.
+Every file holds one term per line (employee names, client companies,
+project codenames) for one label. All files are compiled into a single
+Aho-Corasick automaton that is saved in the cache directory under a hash of
+the file contents and the matching options, so later runs only load it.
+"""
+
+import os
+import pickle
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Union
+
+from .aho_corasick import AhoCorasick, fold_case
+from .anonymizer import Anonymizer
+from .entities import EntityMatch
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1  # bump when the saved automaton changes shape
+
+PathList = Union[str, Path, Iterable[Union[str, Path]]]
+
+
+def read_terms(path) -> List[str]:
+    """Terms of a gazetteer file: one per line, blank lines and '#' comments skipped."""
+    terms = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            term = line.strip()
+            if term and not term.startswith('#'):
+                terms.append(term)
+    return terms
+
+
+class Gazetteer:
+    """Term lists by label, matched in one pass with a cached automaton."""
+
+    def __init__(self, files: Dict[str, PathList], case_insensitive: bool = True, whole_words: bool = True,
+                 cache_dir=None):
+        unsupported = set(files) - Anonymizer.SUPPORTED_LABELS
+        if unsupported:
+            # the anonymizer would silently leave these terms in the text
+            raise ValueError(f"Unsupported gazetteer labels {sorted(unsupported)}, "
+                             f"expected some of {sorted(Anonymizer.SUPPORTED_LABELS)}")
+        self.files = {label: [Path(paths)] if isinstance(paths, (str, Path)) else [Path(p) for p in paths]
+                      for label, paths in files.items()}
+        self.case_insensitive = case_insensitive  # "ACME corp" matches "Acme Corp"
+        self.whole_words = whole_words  # "Acme" doesn't match inside "Acmeville"
+        if cache_dir is None:
+            from .inference_backends import DEFAULT_CACHE_DIR
+            cache_dir = DEFAULT_CACHE_DIR
+        self.cache_path = Path(cache_dir) / "gazetteers" / f"{self.cache_key()}.pickle"
+        self.automaton, self.labels = self._load_or_compile()
+
+    def cache_key(self) -> str:
+        """SHA-256 over the file contents, their labels and the matching options."""
+        digest = hashlib.sha256(f"v{FORMAT_VERSION}:{self.case_insensitive}:{self.whole_words}".encode())
+        for label in sorted(self.files):
+            for path in self.files[label]:
+                digest.update(f"\0{label}\0".encode())
+                digest.update(path.read_bytes())
+        return digest.hexdigest()
+
+    def _load_or_compile(self):
+        if self.cache_path.exists():
+            try:
+                with open(self.cache_path, 'rb') as f:
+                    automaton, labels = pickle.load(f)
+                logger.info(f"Loaded gazetteer automaton ({len(automaton)} terms) from {self.cache_path}")
+                return automaton, labels
+            except Exception as e:
+                logger.warning(f"Could not load gazetteer cache {self.cache_path}, compiling again: {e}")
+
+        terms, labels = [], []
+        seen = set()
+        for label, paths in self.files.items():
+            for path in paths:
+                for term in read_terms(path):
+                    key = fold_case(term) if self.case_insensitive else term
+                    if key not in seen:  # a term listed twice keeps its first label
+                        seen.add(key)
+                        terms.append(term)
+                        labels.append(label)
+        logger.info(f"Compiling gazetteer automaton for {len(terms)} terms (one-time)...")
+        automaton = AhoCorasick(terms, case_insensitive=self.case_insensitive)
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(".pickle.tmp")
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((automaton, labels), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.cache_path)  # only complete automata end up in the cache
+        logger.info(f"Saved gazetteer automaton to {self.cache_path}")
+        return automaton, labels
+
+    def __len__(self) -> int:
+        return len(self.automaton)
+
+    # input text and its offset
+    def scan(self, text: str, chunk_offset: int = 0) -> List[EntityMatch]:
+        """Leftmost-longest, non-overlapping term occurrences as confidence-1.0 entities."""
+        matches = sorted(self.automaton.iter_matches(text, self.whole_words), key=lambda m: (m[0], -m[1]))
+        entities = []
+        covered_until = 0
+        for start, end, index in matches:
+            if start < covered_until:
+                continue  # inside a longer term found at an earlier or the same start
+            entities.append(EntityMatch(text[start:end], self.labels[index], start + chunk_offset,
+                                        end + chunk_offset, 1.0))
+            covered_until = end
+        return entities
+    # output entities in text order
@@ -0,0 +1,149 @@
+"""
+Inference backends for the token-classification model.
+A backend turns padded token ids into per-token logits; everything around it
+(chunking, decoding, thresholding, label mapping, dedup) stays in EntityDetector.
+"""
+
+import os
+import sys
+import logging
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path(os.environ.get("AI_ANONYMIZER_CACHE", Path.home() / ".cache" / "ai_anonymizer"))
+
+
+def model_cache_path(cache_dir, model_name: str, filename: str) -> Path:
+    """Local path for a derived model file (exported graph, quantized weights, ...)."""
+    safe_name = model_name.strip("/").replace("/", "--").replace("\\", "--")
+    return Path(cache_dir or DEFAULT_CACHE_DIR) / safe_name / filename
+
+
+class TorchBackend:
+    """Eager PyTorch inference with the loaded transformers model."""
+    name = "torch"
+
+    def __init__(self, model, quantized: bool = False):
+        import torch
+        self.model = model
+        self.model.eval()
+        self.id2label: Dict[int, str] = dict(model.config.id2label)
+        self.version = f"torch-{torch.__version__}" + ("-int8" if quantized else "")
+
+    # input padded token ids and attention mask, shape (batch, tokens)
+    def logits(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        import torch
+        with torch.no_grad():
+            outputs = self.model(input_ids=torch.from_numpy(input_ids), attention_mask=torch.from_numpy(attention_mask))
+        return outputs.logits.float().numpy()
+    # output logits (batch, tokens, labels)
+
+
+def _move_transformers_modules_last():
+    """Make pickle find torch before transformers when it looks up torch.qscheme values.
+
+    qscheme values (in every quantized tensor) have no __module__, so pickle scans sys.modules in order for
+    them. transformers' lazy alias modules import optional vision dependencies when scanned, which fails if
+    transformers was imported before torch (e.g. only a tokenizer was loaded first).
+    """
+    for name in [name for name in sys.modules if name == "transformers" or name.startswith("transformers.")]:
+        sys.modules[name] = sys.modules.pop(name)
+
+
+# input model name and cache directory for the quantized weights
+def load_quantized_model(model_name: str, cache_dir=None):
+    """fp32 model with dynamic int8 quantization on every Linear layer, weights cached on disk for fast reload."""
+    import torch
+    from transformers import AutoConfig, AutoModelForTokenClassification
+    from torch.ao.quantization import quantize_dynamic
+
+    weights_path = model_cache_path(cache_dir, model_name, "model-int8.pt")
+    if weights_path.exists():
+        # rebuild the quantized module structure from the config, then load the saved int8 weights
+        model = AutoModelForTokenClassification.from_config(AutoConfig.from_pretrained(model_name))
+        model.eval()
+        model = quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        model.load_state_dict(torch.load(weights_path, weights_only=True))
+        logger.info(f"Loaded int8 weights from {weights_path}")
+        return model
+
+    logger.info(f"Quantizing {model_name} to int8 (one-time)...")
+    model = AutoModelForTokenClassification.from_pretrained(model_name)
+    model.eval()
+    model = quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    weights_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = weights_path.with_suffix(".pt.tmp")
+    _move_transformers_modules_last()
+    torch.save(model.state_dict(), tmp_path)
+    os.replace(tmp_path, weights_path)  # only complete weights end up in the cache
+    logger.info(f"Saved int8 weights to {weights_path}")
+    return model
+# output quantized model, usable by TorchBackend and the transformers pipeline
+
+
+class OnnxBackend:
+    """ONNX Runtime inference (CPU provider, all graph optimizations) on a graph exported once and cached on disk."""
+    name = "onnx"
+
+    def __init__(self, model_name: str, cache_dir=None, num_threads: int = 2):
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError("The 'onnx' backend needs onnxruntime (pip install onnxruntime onnx)") from e
+
+        from transformers import AutoConfig
+
+        self.model_name = model_name
+        self.onnx_path = model_cache_path(cache_dir, model_name, "model.onnx")
+        if not self.onnx_path.exists():
+            self.export(model_name, self.onnx_path)
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = num_threads
+        self.session = onnxruntime.InferenceSession(str(self.onnx_path), options, providers=["CPUExecutionProvider"])
+        self.id2label = {int(k): v for k, v in AutoConfig.from_pretrained(model_name).id2label.items()}
+        self.version = f"onnxruntime-{onnxruntime.__version__}"
+        logger.info(f"Loaded ONNX graph from {self.onnx_path}")
+
+    @staticmethod
+    def export(model_name: str, onnx_path: Path):
+        """Export the token-classification model to ONNX (dynamic batch and sequence axes)."""
+        import torch
+        from transformers import AutoModelForTokenClassification
+
+        logger.info(f"Exporting {model_name} to ONNX (one-time), this can take a while...")
+        model = AutoModelForTokenClassification.from_pretrained(model_name)
+        model.eval()
+        model.config.return_dict = False  # plain tuple outputs trace cleanly
+
+        onnx_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = onnx_path.with_suffix(".onnx.tmp")
+        dummy_ids = torch.ones((1, 8), dtype=torch.long)
+        dummy_mask = torch.ones((1, 8), dtype=torch.long)
+        torch.onnx.export(
+            model,
+            (dummy_ids, dummy_mask),
+            str(tmp_path),
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch", 1: "sequence"},
+            },
+            opset_version=17,
+            dynamo=False,
+        )
+        os.replace(tmp_path, onnx_path)  # only a complete export ends up in the cache
+        logger.info(f"Saved ONNX graph to {onnx_path}")
+
+    # input padded token ids and attention mask, shape (batch, tokens)
+    def logits(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        return self.session.run(["logits"], {"input_ids": input_ids, "attention_mask": attention_mask})[0]
+    # output logits (batch, tokens, labels)
@@ -1,3 +1,19 @@
+import bz2
+import gzip
+import lzma
+
+# compressed inputs are recognised by their extension
+COMPRESSED_OPENERS = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}
+
+
+def open_text(file_path, encoding='utf-8'):
+    """Open a text file for reading, decompressing .gz/.bz2/.xz files on the fly."""
+    for extension, opener in COMPRESSED_OPENERS.items():
+        if str(file_path).lower().endswith(extension):
+            return opener(file_path, 'rt', encoding=encoding)
+    return open(file_path, 'r', encoding=encoding)
+
+
 class InputTextHandler:
     def __init__(self, default_file_path=None):
         self.default_file_path = default_file_path
@@ -39,7 +55,7 @@ Direct: 555-987-6543"
             elif choice == "3":
                 file_path = self.default_file_path or input("Enter file path: ").strip()
                 try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
+                    with open_text(file_path) as f:
                         text = f.read()
                     print(f"Loaded text from '{file_path}' ({len(text)} characters)")
                     self.last_loaded_text = text
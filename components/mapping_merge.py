@@ -0,0 +1,89 @@
+"""
+Merging placeholder mappings written by independent runs.
+Processes that anonymize parts of one corpus with the same placeholder key
+(EntityMapper(key=...)) agree on placeholders without talking to each other;
+their mapping files are merged afterwards. Two kinds of conflict are
+reported: one placeholder standing for different entities, and one entity
+that ended up with different placeholders (e.g. after a keyed collision
+fallback in only one of the runs).
+
+    python -m components.mapping_merge output/run1/*.json output/run2/*.json --output merged.json
+"""
+
+import re
+import json
+import argparse
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+# one line of main.py's entity_mappings.txt: [PER_1] → 'John Smith'
+MAPPING_LINE = re.compile(r"^(\[[^\[\]]+\]) → '(.*)'$")
+
+
+def load_mapping(path) -> Dict[str, str]:
+    """placeholder -> original text from a mapping JSON, a batch_anonymize.py result or entity_mappings.txt."""
+    path = Path(path)
+    if path.suffix.lower() == '.json':
+        data = json.loads(path.read_text(encoding='utf-8'))
+        return data['mapping'] if isinstance(data.get('mapping'), dict) else data
+    mapping = {}
+    for line in path.read_text(encoding='utf-8').splitlines():
+        match = MAPPING_LINE.match(line)
+        if match:
+            mapping[match.group(1)] = match.group(2)
+    return mapping
+
+
+def placeholder_label(placeholder: str) -> str:
+    return placeholder[1:-1].rsplit('_', 1)[0]
+
+
+# input (source name, mapping) pairs
+def merge_mappings(mappings: Iterable[Tuple[str, Dict[str, str]]]) -> Tuple[Dict[str, str], List[Dict]]:
+    merged: Dict[str, str] = {}
+    texts = defaultdict(lambda: defaultdict(list))  # placeholder -> normalized text -> sources
+    placeholders = defaultdict(lambda: defaultdict(list))  # (label, normalized text) -> placeholder -> sources
+    for source, mapping in mappings:
+        for placeholder, text in mapping.items():
+            merged.setdefault(placeholder, text)  # the first source wins a conflicting placeholder
+            texts[placeholder][text.lower()].append(source)
+            placeholders[(placeholder_label(placeholder), text.lower())][placeholder].append(source)
+
+    conflicts = []
+    for placeholder, by_text in texts.items():
+        if len(by_text) > 1:
+            conflicts.append({'type': 'placeholder', 'placeholder': placeholder, 'kept': merged[placeholder],
+                              'texts': {text: sorted(set(sources)) for text, sources in by_text.items()}})
+    for (label, text), by_placeholder in placeholders.items():
+        if len(by_placeholder) > 1:
+            conflicts.append({'type': 'entity', 'label': label, 'text': text,
+                              'placeholders': {p: sorted(set(sources)) for p, sources in by_placeholder.items()}})
+    return merged, conflicts
+# output merged placeholder -> text mapping and the conflicts found on the way
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge placeholder mappings of independent runs and report conflicts")
+    parser.add_argument("inputs", nargs="+", type=Path, help="Mapping JSON, batch_anonymize.py results or entity_mappings.txt")
+    parser.add_argument("--output", type=Path, required=True, help="Merged placeholder -> text mapping (JSON)")
+    parser.add_argument("--report", type=Path, default=None, help="Write the conflicts here as JSON")
+    args = parser.parse_args(argv)
+
+    merged, conflicts = merge_mappings((str(path), load_mapping(path)) for path in args.inputs)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(merged, ensure_ascii=False, indent=2), encoding='utf-8')
+    if args.report:
+        args.report.write_text(json.dumps(conflicts, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f"Merged {len(args.inputs)} mappings into {len(merged)} placeholders, {len(conflicts)} conflicts")
+    for conflict in conflicts:
+        if conflict['type'] == 'placeholder':
+            print(f"  {conflict['placeholder']} stands for {len(conflict['texts'])} entities: {', '.join(conflict['texts'])}")
+        else:
+            print(f"  {conflict['label']} '{conflict['text']}' has {len(conflict['placeholders'])} placeholders: "
+                  f"{', '.join(conflict['placeholders'])}")
+    return 1 if conflicts else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
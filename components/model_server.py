@@ -0,0 +1,276 @@
+"""
+Resident model server and its client.
+Loading the tokenizer and the model weights takes most of the wall time of a
+run on a small document. The server loads an EntityDetector once and answers
+detection and anonymization jobs over localhost HTTP; ModelClient talks to
+it with the standard library only, and can stand in for the detector.
+
+    python -m components.model_server --port 8765
+"""
+
+import json
+import time
+import logging
+import argparse
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from .anonymizer import Anonymizer
+from .entities import EntityMatch
+from .entity_mapper import EntityMapper
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+
+def entity_to_dict(entity: EntityMatch) -> Dict:
+    return {'text': entity.text, 'label': entity.label, 'start': entity.start, 'end': entity.end,
+            'confidence': float(entity.confidence)}
+
+
+def entity_from_dict(data: Dict) -> EntityMatch:
+    return EntityMatch(data['text'], data['label'], data['start'], data['end'], data['confidence'])
+
+
+class ServerBusy(Exception):
+    """Every job slot stayed taken for longer than the queue timeout."""
+
+
+class ServerMetrics:
+    """Request counters and latencies of the server (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.rejected = 0  # turned away with 503 because all job slots were taken
+        self.in_flight = 0
+        self.characters = 0
+        self.total_latency = 0.0
+
+    def job_started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def job_finished(self, characters: int, latency: float, failed: bool = False):
+        with self._lock:
+            self.in_flight -= 1
+            self.requests += 1
+            self.errors += failed
+            self.characters += characters
+            self.total_latency += latency
+
+    def job_rejected(self):
+        with self._lock:
+            self.rejected += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'uptime': time.time() - self.started,
+                'requests': self.requests,
+                'errors': self.errors,
+                'rejected': self.rejected,
+                'in_flight': self.in_flight,
+                'characters': self.characters,
+                'average_latency': self.total_latency / self.requests if self.requests else 0.0,
+            }
+
+
+class ModelServer:
+    """Keeps one detector loaded and runs at most max_concurrent jobs on it at a time.
+
+    A local EntityDetector runs one NER pass at a time (its model_lock), so extra slots only overlap
+    regex scanning, deduplication and request I/O of other jobs, never two passes over the model.
+    """
+
+    def __init__(self, detector, host: str = "127.0.0.1", port: int = DEFAULT_PORT, max_concurrent: int = 1,
+                 queue_timeout: float = 30.0):
+        self.detector = detector  # anything with detect_entities_full_text(text)
+        self.max_concurrent = max_concurrent  # jobs running on the model at once, the rest wait for a slot
+        self.queue_timeout = queue_timeout  # seconds a job waits for a slot before it gets 503
+        self.metrics = ServerMetrics()
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self):
+        logger.info(f"Model server listening on {self.url} ({self.max_concurrent} concurrent jobs)")
+        self.httpd.serve_forever()
+
+    def start(self) -> threading.Thread:
+        """Serve from a background thread (tests, benchmarks, embedding in another process)."""
+        thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    # input text of one job
+    def detect(self, text: str) -> List[EntityMatch]:
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            self.metrics.job_rejected()
+            raise ServerBusy(f"all {self.max_concurrent} job slots busy for {self.queue_timeout}s")
+        self.metrics.job_started()
+        start = time.perf_counter()
+        failed = True
+        try:
+            entities = self.detector.detect_entities_full_text(text)
+            failed = False
+            return entities
+        finally:
+            self._slots.release()
+            self.metrics.job_finished(len(text), time.perf_counter() - start, failed)
+    # output deduplicated entities
+
+    def anonymize(self, text: str) -> Dict:
+        """Detect and anonymize with a fresh mapper, so jobs never share placeholders."""
+        start = time.perf_counter()
+        entities = self.detect(text)
+        mapper = EntityMapper()
+        anonymizer = Anonymizer(text, entities, mapper)
+        anonymizer.anonymize()
+        return {
+            'anonymized_text': anonymizer.result_text,
+            'mapping': mapper.get_mapping(),
+            'entities': [entity_to_dict(e) for e in entities],
+            'processing_time': time.perf_counter() - start,
+        }
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/health":
+                    self._reply(200, {'status': 'ok', 'model': getattr(server.detector, 'model_name', None)})
+                elif self.path == "/metrics":
+                    self._reply(200, server.metrics.snapshot())
+                else:
+                    self._reply(404, {'error': f"unknown path {self.path}"})
+
+            def do_POST(self):
+                if self.path not in ("/detect", "/anonymize"):
+                    self._reply(404, {'error': f"unknown path {self.path}"})
+                    return
+                try:
+                    length = int(self.headers.get('Content-Length', 0))
+                except ValueError:
+                    length = -1
+                if length < 0:  # rfile.read(-1) would block until the client closes the connection
+                    self._reply(400, {'error': "invalid Content-Length"})
+                    return
+                if length > MAX_BODY_BYTES:
+                    self._reply(413, {'error': f"body larger than {MAX_BODY_BYTES} bytes"})
+                    return
+                try:
+                    text = json.loads(self.rfile.read(length))['text']
+                except (ValueError, KeyError, TypeError):
+                    self._reply(400, {'error': "expected a JSON body with a 'text' field"})
+                    return
+                try:
+                    if self.path == "/detect":
+                        start = time.perf_counter()
+                        entities = server.detect(text)
+                        self._reply(200, {'entities': [entity_to_dict(e) for e in entities],
+                                          'processing_time': time.perf_counter() - start})
+                    else:
+                        self._reply(200, server.anonymize(text))
+                except ServerBusy as e:
+                    self._reply(503, {'error': str(e)})
+                except Exception as e:
+                    logger.exception("Job failed")
+                    self._reply(500, {'error': str(e)})
+
+            def _reply(self, status: int, payload: Dict):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):  # route access logs through logging instead of stderr
+                logger.debug(format % args)
+
+        return Handler
+
+
+class ModelClient:
+    """Client of a running ModelServer; usable wherever an EntityDetector's full-text detection is."""
+
+    def __init__(self, base_url: str, timeout: float = 300.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def _request(self, path: str, payload: Optional[Dict] = None) -> Dict:
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data,
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            message = json.loads(e.read() or b'{}').get('error', e.reason)
+            if e.code == 503:
+                raise ServerBusy(message) from e
+            raise RuntimeError(f"Model server error {e.code}: {message}") from e
+
+    def is_available(self) -> bool:
+        try:
+            return self.health().get('status') == 'ok'
+        except (OSError, RuntimeError, ValueError):
+            return False
+
+    def health(self) -> Dict:
+        return self._request("/health")
+
+    def metrics(self) -> Dict:
+        return self._request("/metrics")
+
+    def detect_entities_full_text(self, text: str) -> List[EntityMatch]:
+        return [entity_from_dict(e) for e in self._request("/detect", {'text': text})['entities']]
+
+    def anonymize(self, text: str) -> Dict:
+        """anonymized_text, mapping (placeholder -> original), entities and processing_time of one job."""
+        result = self._request("/anonymize", {'text': text})
+        result['entities'] = [entity_from_dict(e) for e in result['entities']]
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep the NER model loaded and serve anonymization jobs")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on (localhost only by default)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--model", default="Jean-Baptiste/roberta-large-ner-english")
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--max-concurrent", type=int, default=1, help="Jobs running on the model at once")
+    parser.add_argument("--queue-timeout", type=float, default=30.0, help="Seconds a job waits for a slot")
+    args = parser.parse_args()
+
+    from .entity_detector import EntityDetector
+    detector = EntityDetector(args.model, confidence_threshold=args.threshold)
+    server = ModelServer(detector, args.host, args.port, args.max_concurrent, args.queue_timeout)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down model server")
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Content-addressed cache of NER results per chunk.
+Entities are stored relative to their chunk under a SHA-256 of the chunk
+text and everything that can change the result (model, threshold, backend
+version). A bounded in-memory LRU sits in front of a SQLite file that is
+evicted by size, so repeated sections (templates, signatures, boilerplate)
+skip the model on every later run.
+"""
+
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+from .entities import EntityMatch
+
+logger = logging.getLogger(__name__)
+
+# (text, label, start, end, confidence) with start/end relative to the chunk
+CachedEntity = Tuple[str, str, int, int, float]
+
+
+class NERCache:
+    """Two-tier (memory LRU + SQLite) store of chunk-relative NER entities."""
+
+    def __init__(self, path=None, memory_entries: int = 4096, max_disk_bytes: int = 256 * 1024 * 1024):
+        if memory_entries < 0:
+            raise ValueError("memory_entries must not be negative")
+        if path is None:
+            from .inference_backends import DEFAULT_CACHE_DIR
+            path = Path(DEFAULT_CACHE_DIR) / "ner_cache.sqlite"
+        self.path = Path(path)
+        self.memory_entries = memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0  # hits that had to go to the SQLite tier
+        self._memory: "OrderedDict[str, List[CachedEntity]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS ner_cache ("
+                         "key TEXT PRIMARY KEY, entities TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS ner_cache_last_used ON ner_cache (last_used)")
+        self._db.commit()
+        self._disk_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM ner_cache").fetchone()[0]
+
+    @staticmethod
+    def make_key(chunk_text: str, model_name: str, threshold: float, backend_version: str,
+                 token_ids: Sequence[int] = ()) -> str:
+        """SHA-256 over the chunk text and every setting that changes its entities (token ids if given)."""
+        digest = hashlib.sha256()
+        for part in (model_name, repr(float(threshold)), backend_version, chunk_text):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        if len(token_ids):
+            digest.update(array('q', token_ids).tobytes())
+        return digest.hexdigest()
+
+    # input cache key and the chunk's offset in the current document
+    def get(self, key: str, chunk_offset: int = 0) -> Optional[List[EntityMatch]]:
+        """Cached entities rebased onto chunk_offset, or None on a miss."""
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                self._memory.move_to_end(key)
+            else:
+                row = self._db.execute("SELECT entities FROM ner_cache WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                cached = [tuple(entity) for entity in json.loads(row[0])]
+                self._db.execute("UPDATE ner_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+                self._db.commit()
+                self._remember(key, cached)
+                self.disk_hits += 1
+            self.hits += 1
+        return [EntityMatch(text, label, start + chunk_offset, end + chunk_offset, confidence)
+                for text, label, start, end, confidence in cached]
+    # output entities with document positions
+
+    # input cache key, entities found in the chunk, the chunk's offset in the document
+    def put(self, key: str, entities: List[EntityMatch], chunk_offset: int = 0):
+        """Store entities relative to their chunk in both tiers."""
+        cached = [(e.text, e.label, e.start - chunk_offset, e.end - chunk_offset, float(e.confidence)) for e in entities]
+        payload = json.dumps(cached)
+        with self._lock:
+            self._remember(key, cached)
+            previous = self._db.execute("SELECT size FROM ner_cache WHERE key = ?", (key,)).fetchone()
+            self._db.execute("INSERT OR REPLACE INTO ner_cache (key, entities, size, last_used) VALUES (?, ?, ?, ?)",
+                             (key, payload, len(payload), time.time()))
+            self._disk_bytes += len(payload) - (previous[0] if previous else 0)
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict()
+            self._db.commit()
+
+    def _remember(self, key: str, cached: List[CachedEntity]):
+        if self.memory_entries == 0:
+            return
+        self._memory[key] = cached
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)  # least recently used
+
+    def _evict(self):
+        """Drop least recently used rows until the file is back under 90% of max_disk_bytes."""
+        target = int(self.max_disk_bytes * 0.9)
+        rows = self._db.execute("SELECT key, size FROM ner_cache ORDER BY last_used").fetchall()
+        evicted = []
+        for key, size in rows:
+            if self._disk_bytes <= target:
+                break
+            evicted.append((key,))
+            self._disk_bytes -= size
+            self._memory.pop(key, None)
+        self._db.executemany("DELETE FROM ner_cache WHERE key = ?", evicted)
+        logger.info(f"NER cache: evicted {len(evicted)} entries")
+
+    @property
+    def disk_bytes(self) -> int:
+        return self._disk_bytes
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'disk_hits': self.disk_hits,
+            'hit_rate': self.hits / total if total else 0.0,
+            'memory_entries': len(self._memory),
+            'disk_bytes': self._disk_bytes,
+        }
+
+    def reset_stats(self):
+        self.hits = self.misses = self.disk_hits = 0
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,62 @@
+"""
+Decoding of token-classification logits into entity spans.
+Mirrors the "simple" aggregation of the transformers NER pipeline, so model
+outputs computed outside the pipeline give the same entity groups.
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+def _get_tag(entity_name: str) -> Tuple[str, str]:
+    """Split a BIO label into (prefix, tag); labels without a prefix count as continuation."""
+    if entity_name.startswith("B-"):
+        return "B", entity_name[2:]
+    if entity_name.startswith("I-"):
+        return "I", entity_name[2:]
+    return "I", entity_name
+
+
+def _group(tokens: List[Dict]) -> Dict:
+    """Merge adjacent tokens of one entity into a single group."""
+    scores = np.nanmean([token['score'] for token in tokens])
+    return {
+        'entity_group': tokens[0]['entity'].split("-", 1)[-1],
+        'score': np.mean(scores),
+        'start': tokens[0]['start'],
+        'end': tokens[-1]['end'],
+    }
+
+
+# input logits for the tokens of one window (special tokens removed), their character offsets and model labels
+def decode_token_logits(logits: np.ndarray, offsets: Sequence[Tuple[int, int]],
+                        id2label: Dict[int, str], ignore_labels=("O",)) -> List[Dict]:
+    """Turn per-token logits into entity groups like the pipeline's aggregation_strategy="simple"."""
+    if len(offsets) == 0:
+        return []
+
+    # softmax over labels, same numerics as the pipeline
+    maxes = np.max(logits, axis=-1, keepdims=True)
+    shifted_exp = np.exp(logits - maxes)
+    scores = shifted_exp / shifted_exp.sum(axis=-1, keepdims=True)
+    label_ids = scores.argmax(axis=-1)
+
+    groups = []
+    current = []
+    for idx, (start, end) in enumerate(offsets):
+        label_id = int(label_ids[idx])
+        token = {'entity': id2label[label_id], 'score': scores[idx][label_id], 'start': start, 'end': end}
+        if current:
+            bi, tag = _get_tag(token['entity'])
+            _, last_tag = _get_tag(current[-1]['entity'])
+            if tag == last_tag and bi != "B":  # same entity continues
+                current.append(token)
+                continue
+            groups.append(_group(current))
+        current = [token]
+    if current:
+        groups.append(_group(current))
+
+    return [group for group in groups if group['entity_group'] not in ignore_labels]
+# output list of dicts with entity_group, score, start, end (same keys the pipeline returns)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Multi-process NER execution for large documents.
+Workers are forked from the process that already holds the loaded model,
+so the weights and the document text are shared copy-on-write instead of
+being loaded or pickled once per worker.
+"""
+
+import gc
+import logging
+import multiprocessing
+from typing import List, Tuple
+
+from .entities import EntityMatch
+
+logger = logging.getLogger(__name__)
+
+# State inherited by forked workers. It is set right before the pool is created
+# and is never sent through a pipe, only chunk spans are.
+_worker_detector = None
+_worker_text = None
+
+
+def _init_worker(threads_per_worker: int):
+    """Limit intra-op threads in every worker so workers don't oversubscribe the CPU."""
+    import torch
+    torch.set_num_threads(threads_per_worker)
+
+
+# input batch of chunk spans (index, start, end, token_count) over the shared text
+def _run_batch(batch: List[Tuple[int, int, int, int]]) -> List[Tuple[int, List[EntityMatch]]]:
+    chunks = [(_worker_text[start:end], start, token_count) for _, start, end, token_count in batch]
+    if len(chunks) == 1:
+        chunk_text, chunk_offset, _ = chunks[0]
+        chunk_entities = [_worker_detector._detect_entities_ner(chunk_text, chunk_offset)]
+    else:
+        chunk_entities = _worker_detector._detect_entities_ner_batched(chunks)
+    return [(index, entities) for (index, _, _, _), entities in zip(batch, chunk_entities)]
+# output entities per chunk index
+
+
+class NERWorkerPool:
+    """Runs NER chunks in a pool of forked worker processes sharing one copy of the model."""
+
+    def __init__(self, detector, num_workers: int = 2, threads_per_worker: int = 1):
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1")
+        if threads_per_worker < 1:
+            raise ValueError("threads_per_worker must be at least 1")
+        self.detector = detector
+        self.num_workers = num_workers
+        self.threads_per_worker = threads_per_worker
+
+    @staticmethod
+    def is_supported() -> bool:
+        """Copy-on-write sharing needs the 'fork' start method (Linux/macOS)."""
+        return "fork" in multiprocessing.get_all_start_methods()
+
+    # input full text and chunks as (chunk_text, chunk_offset, token_count)
+    def detect(self, text: str, chunks: List[Tuple[str, int, int]]) -> List[List[EntityMatch]]:
+        """Detect NER entities for every chunk, returned in the original chunk order."""
+        global _worker_detector, _worker_text
+
+        results: List[List[EntityMatch]] = [[] for _ in chunks]
+        if not chunks:
+            return results
+
+        # chunk spans over the shared text, grouped into length buckets (longest first)
+        spans = [(i, offset, offset + len(chunk_text), token_count)
+                 for i, (chunk_text, offset, token_count) in enumerate(chunks)]
+        buckets = self.detector.chunk_processor.create_length_buckets(
+            [token_count for _, _, token_count in chunks], max(1, self.detector.batch_size))
+        tasks = [[spans[i] for i in bucket] for bucket in buckets]
+
+        _worker_detector, _worker_text = self.detector, text
+        gc.freeze()  # keep the garbage collector from touching (and copying) shared pages in workers
+        try:
+            context = multiprocessing.get_context("fork")
+            with context.Pool(self.num_workers, initializer=_init_worker,
+                              initargs=(self.threads_per_worker,)) as pool:
+                done = 0
+                # chunksize=1 so the longest buckets are handed out first
+                for batch_result in pool.imap_unordered(_run_batch, tasks, chunksize=1):
+                    for index, entities in batch_result:
+                        results[index] = entities
+                    done += len(batch_result)
+                    logger.info(f"NER worker pool: {done}/{len(chunks)} chunks done")
+        finally:
+            gc.unfreeze()
+            _worker_detector, _worker_text = None, None
+        # output entities per chunk, in the same order as the input chunks
+        return results
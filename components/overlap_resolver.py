@@ -0,0 +1,232 @@
+"""
+Sweep-line resolution of duplicate and overlapping entities.
+Entities are visited in start order; only the kept entities that still reach
+past the current start (the active set) are compared, so the cost grows with
+the number of entities times the overlap depth instead of quadratically.
+"""
+
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .entities import EntityMatch
+
+logger = logging.getLogger(__name__)
+
+REGEX_LABELS = frozenset({'EMAIL', 'PHONE', 'URL', 'IBAN', 'CREDIT_CARD', 'SSN', 'IP'})
+
+
+def _confidence_priority(entity: EntityMatch, regex_labels) -> Tuple:
+    return (entity.confidence,)
+
+
+def _prefer_regex_priority(entity: EntityMatch, regex_labels) -> Tuple:
+    return (entity.label in regex_labels, entity.confidence)
+
+
+def _longest_priority(entity: EntityMatch, regex_labels) -> Tuple:
+    return (entity.end - entity.start, entity.confidence)
+
+
+POLICIES: Dict[str, Callable] = {
+    'confidence': _confidence_priority,  # highest confidence wins (default)
+    'prefer_regex': _prefer_regex_priority,  # regex entities win over NER, then confidence
+    'longest': _longest_priority,  # longest span wins, then confidence
+}
+
+
+# the same priorities as columns of an EntityTable, most significant first
+def _confidence_columns(table, regex_labels) -> List[np.ndarray]:
+    return [table.confidences]
+
+
+def _prefer_regex_columns(table, regex_labels) -> List[np.ndarray]:
+    regex_ids = [label_id for label_id, label in enumerate(table.labels) if label in regex_labels]
+    return [np.isin(table.label_ids, regex_ids), table.confidences]
+
+
+def _longest_columns(table, regex_labels) -> List[np.ndarray]:
+    return [table.ends - table.starts, table.confidences]
+
+
+TABLE_POLICIES: Dict[str, Callable] = {
+    'confidence': _confidence_columns,
+    'prefer_regex': _prefer_regex_columns,
+    'longest': _longest_columns,
+}
+
+
+class OverlapResolver:
+    """Removes exact duplicates, then keeps the higher priority entity of every overlapping pair."""
+
+    def __init__(self, policy: str = 'confidence', regex_labels: Iterable[str] = REGEX_LABELS):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overlap policy '{policy}', expected one of {tuple(POLICIES)}")
+        self.policy = policy
+        self.regex_labels = frozenset(regex_labels)
+        self._priority = POLICIES[policy]
+        self.reset()
+
+    def reset(self):
+        """Forget all state of an incremental run."""
+        self.exact_duplicate_count = 0
+        self.overlap_removed_count = 0
+        self._seen: Set[Tuple] = set()  # exact duplicate keys of entities not behind the frontier yet
+        self._pending: List[EntityMatch] = []  # unique entities waiting for the frontier to pass their start
+        self._kept: List[Optional[EntityMatch]] = []  # kept entities in insertion order, None = removed later
+        self._active: List[int] = []  # indices into _kept that may still overlap an upcoming entity
+        self._emitted = 0  # _kept[:_emitted] were already returned
+
+    def _sort_key(self, entity: EntityMatch) -> Tuple:
+        return (entity.start, tuple(-value for value in self._priority(entity, self.regex_labels)))
+
+    # input entities sorted by start (and priority)
+    def _sweep(self, entities: List[EntityMatch]):
+        for entity in entities:
+            # kept entities ending at or before this start can't overlap anything that comes later
+            self._active = [i for i in self._active if self._kept[i].end > entity.start]
+
+            # the earliest kept entity overlapping this one decides
+            winner = True
+            for position, i in enumerate(self._active):
+                existing = self._kept[i]
+                if entity.start < existing.end and entity.end > existing.start:
+                    self.overlap_removed_count += 1
+                    if self._priority(entity, self.regex_labels) > self._priority(existing, self.regex_labels):
+                        self._kept[i] = None  # existing loses
+                        del self._active[position]
+                    else:
+                        winner = False  # existing wins, skip this one
+                    break
+
+            if winner:
+                self._active.append(len(self._kept))
+                self._kept.append(entity)
+
+    def _add_unique(self, entities: Iterable[EntityMatch]):
+        for entity in entities:
+            key = (entity.start, entity.end, entity.text.lower(), entity.label)
+            if key in self._seen:
+                self.exact_duplicate_count += 1
+            else:
+                self._seen.add(key)
+                self._pending.append(entity)
+
+    # input all entities of a document
+    def resolve(self, entities: Iterable[EntityMatch]) -> List[EntityMatch]:
+        """Resolve a complete entity list at once."""
+        self.reset()
+        self._add_unique(entities)
+        self._pending.sort(key=self._sort_key)
+        self._sweep(self._pending)
+        self._pending = []
+        return [entity for entity in self._kept if entity is not None]
+    # output deduplicated entities in start order
+
+    # input an EntityTable of a document
+    def resolve_table(self, table):
+        """resolve() on the table's columns; returns the kept rows as a table sharing the source and keys."""
+        self.reset()
+        if not len(table):
+            return table.take([])
+        # exact duplicates share (start, end, key id); the first row of each group is kept, as in resolve()
+        key_ids, _ = table.normalized_keys()
+        _, first_rows = np.unique(np.stack([table.starts, table.ends, key_ids.astype(np.int64)], axis=1),
+                                  axis=0, return_index=True)
+        rows = np.sort(first_rows)
+        self.exact_duplicate_count = len(table) - len(rows)
+
+        # start order, higher priority first; lexsort is stable, so equal rows keep table order like sort()
+        columns = TABLE_POLICIES[self.policy](table, self.regex_labels)
+        sort_keys = [-column[rows].astype(np.float64) for column in reversed(columns)] + [table.starts[rows]]
+        rows = rows[np.lexsort(sort_keys)]
+        priorities = list(zip(*(column[rows].tolist() for column in columns)))
+        kept = self._sweep_rows(table.starts[rows].tolist(), table.ends[rows].tolist(), priorities)
+        return table.take(rows[kept])
+    # output deduplicated table in start order
+
+    def _sweep_rows(self, starts: List[int], ends: List[int], priorities: List[Tuple]) -> List[int]:
+        """_sweep over parallel columns already in sweep order; returns the positions that are kept."""
+        kept: List[Optional[int]] = []
+        active: List[int] = []
+        for position, (start, end, priority) in enumerate(zip(starts, ends, priorities)):
+            active = [i for i in active if ends[kept[i]] > start]
+
+            winner = True
+            for active_position, i in enumerate(active):
+                existing = kept[i]
+                if start < ends[existing] and end > starts[existing]:
+                    self.overlap_removed_count += 1
+                    if priority > priorities[existing]:
+                        kept[i] = None
+                        del active[active_position]
+                    else:
+                        winner = False
+                    break
+
+            if winner:
+                active.append(len(kept))
+                kept.append(position)
+        return [position for position in kept if position is not None]
+    # output deduplicated table in start order
+
+    # input entities of the next chunk(s) and the frontier: no entity fed later starts before it
+    def feed(self, entities: Iterable[EntityMatch], frontier: int) -> List[EntityMatch]:
+        """Resolve incrementally and return the entities that are final now that the frontier has passed them."""
+        self._add_unique(entities)
+
+        ready = [entity for entity in self._pending if entity.start < frontier]
+        if ready:
+            self._pending = [entity for entity in self._pending if entity.start >= frontier]
+            ready.sort(key=self._sort_key)
+            self._sweep(ready)
+            # keys behind the frontier can't be repeated by later entities
+            self._seen = {key for key in self._seen if key[0] >= frontier}
+
+        # a kept entity is final once nothing that can still arrive starts inside it
+        released = []
+        while self._emitted < len(self._kept):
+            entity = self._kept[self._emitted]
+            if entity is not None:
+                if entity.end > frontier:
+                    break
+                released.append(entity)
+            self._emitted += 1
+        self._compact()
+        return released
+    # output finalized entities in start order
+
+    def flush(self) -> List[EntityMatch]:
+        """End an incremental run and return every entity that is still held back."""
+        self._pending.sort(key=self._sort_key)
+        self._sweep(self._pending)
+        self._pending = []
+        released = [entity for entity in self._kept[self._emitted:] if entity is not None]
+        self.reset_buffers()
+        return released
+    # output remaining entities in start order
+
+    def earliest_held_start(self) -> Optional[int]:
+        """Start of the first kept entity that hasn't been released yet (None if nothing is held)."""
+        for entity in self._kept[self._emitted:]:
+            if entity is not None:
+                return entity.start
+        return None
+
+    def reset_buffers(self):
+        """Drop buffered entities but keep the counters of the finished run."""
+        self._seen = set()
+        self._pending = []
+        self._kept = []
+        self._active = []
+        self._emitted = 0
+
+    def _compact(self):
+        """Drop emitted entities from the buffer so memory stays bounded by the unresolved window."""
+        if self._emitted == 0:
+            return
+        shift = self._emitted
+        self._kept = self._kept[shift:]
+        self._active = [i - shift for i in self._active if i >= shift]
+        self._emitted = 0
@@ -0,0 +1,265 @@
+"""
+Registry of regex PII patterns and the combined scanner built from it.
+Every entry has a label, a pattern, an optional validator (checksums) and
+cheap literal triggers. All entries that can match a chunk are compiled into
+one alternation with named groups, so a chunk is scanned once instead of
+once per label. Entries that say how far a match can reach from a trigger
+are only scanned in the regions around trigger occurrences, not over the
+whole chunk.
+"""
+
+import gc
+import re
+import logging
+import multiprocessing
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .entities import EntityMatch
+
+logger = logging.getLogger(__name__)
+
+DIGITS = tuple('0123456789')
+NON_SPACE_RUN = re.compile(r'\S*')
+
+
+def luhn_valid(text: str) -> bool:
+    """Luhn checksum of the digits in text (credit card numbers)."""
+    digits = [int(c) for c in text if c.isdigit()]
+    if not 13 <= len(digits) <= 19:
+        return False
+    total = 0
+    for i, digit in enumerate(reversed(digits)):
+        if i % 2 == 1:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+    return total % 10 == 0
+
+
+def iban_valid(text: str) -> bool:
+    """ISO 13616 mod-97 check of an IBAN (spaces ignored)."""
+    iban = text.replace(' ', '').upper()
+    if not 15 <= len(iban) <= 34:
+        return False
+    rearranged = iban[4:] + iban[:4]
+    return int(''.join(str(int(c, 36)) for c in rearranged)) % 97 == 1
+
+
+def ipv4_valid(text: str) -> bool:
+    """Four dot-separated octets between 0 and 255."""
+    return all(int(octet) <= 255 for octet in text.split('.'))
+
+
+@dataclass(frozen=True)
+class PatternEntry:
+    """One regex entity type."""
+    label: str
+    pattern: str  # regex source, compiled into the combined scanner
+    validator: Optional[Callable[[str], bool]] = None  # rejects matches that only look right (checksums)
+    triggers: Tuple[str, ...] = ()  # literals, at least one must occur in a chunk for the entry to run (empty = always)
+    flags: int = 0
+    # a match lies within this many characters of one of its triggers, not counting the whitespace-free run
+    # around the trigger (regions are widened to whitespace); None = anywhere in the chunk
+    reach: Optional[int] = None
+
+
+class CombinedScanner:
+    """Single-pass scanner over a fixed set of entries."""
+
+    def __init__(self, entries: List[PatternEntry]):
+        self.entries = entries
+        self.groups = {f"p{i}": entry for i, entry in enumerate(entries)}
+        self.patterns = {group: re.compile(entry.pattern, entry.flags) for group, entry in self.groups.items()}
+        # entries keep their registry order, so at the same start the earlier entry wins
+        self.combined = re.compile("|".join(
+            f"(?P<{group}>{self._scoped(entry)})" for group, entry in self.groups.items()))
+
+    @staticmethod
+    def _scoped(entry: PatternEntry) -> str:
+        """Pattern with its flags applied only inside its own group."""
+        flags = ''.join(letter for flag, letter in ((re.IGNORECASE, 'i'), (re.MULTILINE, 'm'), (re.DOTALL, 's'))
+                        if entry.flags & flag)
+        return f"(?{flags}:{entry.pattern})" if flags else f"(?:{entry.pattern})"
+
+    # input text chunk, its offset and optionally the (start, end) regions that can hold a match
+    def scan(self, text: str, chunk_offset: int = 0, regions: Optional[List[Tuple[int, int]]] = None) -> List[EntityMatch]:
+        entities = []
+        for region_start, region_end in regions if regions is not None else [(0, len(text))]:
+            self._scan_region(text, chunk_offset, region_start, region_end, entities)
+        return entities
+    # output entities in text order
+
+    def _scan_region(self, text: str, chunk_offset: int, position: int, region_end: int, entities: List[EntityMatch]):
+        while True:
+            # regions end at whitespace, so endpos doesn't change what \b sees
+            match = self.combined.search(text, position, region_end)
+            if match is None:
+                return
+            entry, start, end = self.groups[match.lastgroup], match.start(), match.end()
+            if entry.validator is not None and not entry.validator(match.group()):
+                # rejected by its checksum: let the later entries try the same start
+                entry, start, end = self._retry(text, match.start(), match.lastgroup)
+                if entry is None:
+                    position = match.start() + 1
+                    continue
+            if end == start:  # empty match, step over it
+                position = start + 1
+                continue
+            if text[start:end].strip():
+                entities.append(EntityMatch(
+                    text=text[start:end],
+                    label=entry.label,
+                    start=start + chunk_offset,
+                    end=end + chunk_offset,
+                    confidence=1.0
+                ))
+            position = end
+
+    def _retry(self, text: str, start: int, rejected_group: str):
+        """First later entry that matches at start and passes its validator."""
+        later = False
+        for group, pattern in self.patterns.items():
+            if group == rejected_group:
+                later = True
+                continue
+            if not later:
+                continue
+            match = pattern.match(text, start)
+            entry = self.groups[group]
+            if match and (entry.validator is None or entry.validator(match.group())):
+                return entry, match.start(), match.end()
+        return None, start, start
+
+
+class PatternRegistry:
+    """Ordered collection of pattern entries; compiled scanners are cached per active subset."""
+
+    def __init__(self, entries: Iterable[PatternEntry] = ()):
+        self.entries: Dict[str, PatternEntry] = {}
+        self._scanners: Dict[Tuple[str, ...], CombinedScanner] = {}
+        self._trigger_patterns: Dict[Tuple[str, ...], re.Pattern] = {}  # runs of any trigger of an entry
+        for entry in entries:
+            self.register(entry)
+
+    def register(self, entry: PatternEntry):
+        """Add or replace an entry (a replaced entry keeps its position)."""
+        self.entries[entry.label] = entry
+        self._scanners.clear()
+        self._trigger_patterns.clear()
+
+    def unregister(self, label: str):
+        del self.entries[label]
+        self._scanners.clear()
+
+    @property
+    def labels(self) -> List[str]:
+        return list(self.entries)
+
+    def compiled_patterns(self) -> Dict[str, re.Pattern]:
+        """Every entry compiled on its own, by label."""
+        return {label: re.compile(entry.pattern, entry.flags) for label, entry in self.entries.items()}
+
+    def scanner(self, labels: Tuple[str, ...]) -> CombinedScanner:
+        """Combined scanner for these labels (in registry order), compiled once."""
+        if labels not in self._scanners:
+            self._scanners[labels] = CombinedScanner([self.entries[label] for label in labels])
+        return self._scanners[labels]
+
+    def active_labels(self, text: str) -> Tuple[str, ...]:
+        """Labels whose triggers occur in text; the cheap prefilter before the real scan."""
+        present: Dict[str, bool] = {}
+        active = []
+        for label, entry in self.entries.items():
+            if not entry.triggers or any(present.setdefault(t, t in text) for t in entry.triggers):
+                active.append(label)
+        return tuple(active)
+
+    def _trigger_pattern(self, triggers: Tuple[str, ...]) -> re.Pattern:
+        if triggers not in self._trigger_patterns:
+            self._trigger_patterns[triggers] = re.compile(
+                "(?:" + "|".join(re.escape(t) for t in sorted(triggers, key=len, reverse=True)) + ")+")
+        return self._trigger_patterns[triggers]
+
+    def regions(self, text: str, labels: Tuple[str, ...]) -> Optional[List[Tuple[int, int]]]:
+        """Sorted, disjoint (start, end) spans that can hold a match of labels; None = the whole text."""
+        reach: Dict[Tuple[str, ...], int] = {}  # trigger set -> largest reach of its entries
+        for label in labels:
+            entry = self.entries[label]
+            if not entry.triggers or entry.reach is None:
+                return None
+            reach[entry.triggers] = max(reach.get(entry.triggers, 0), entry.reach)
+        spans = sorted((max(0, match.start() - distance), match.end() + distance)
+                       for triggers, distance in reach.items()
+                       for match in self._trigger_pattern(triggers).finditer(text))
+        regions: List[Tuple[int, int]] = []
+        for start, end in spans:
+            end = NON_SPACE_RUN.match(text, min(end, len(text))).end()  # widened to whitespace on both sides
+            if regions and start <= regions[-1][1]:
+                regions[-1] = (regions[-1][0], max(regions[-1][1], end))
+                continue
+            while start > 0 and not text[start - 1].isspace():
+                start -= 1
+            if regions and start <= regions[-1][1]:
+                regions[-1] = (regions[-1][0], max(regions[-1][1], end))
+            else:
+                regions.append((start, end))
+        return regions
+
+    # input text chunk and its offset
+    def scan(self, text: str, chunk_offset: int = 0) -> List[EntityMatch]:
+        labels = self.active_labels(text)
+        if not labels:
+            return []  # no trigger in this chunk, nothing to scan
+        # only the regions around trigger occurrences, e.g. not the prose between two numbers
+        return self.scanner(labels).scan(text, chunk_offset, self.regions(text, labels))
+    # output entities of all active entries
+
+
+def default_registry() -> PatternRegistry:
+    """EMAIL, PHONE and URL as before, plus IBAN, CREDIT_CARD, SSN and IP with validators."""
+    # reach = longest match; EMAIL and URL never contain whitespace, so the run around the trigger is enough
+    return PatternRegistry([
+        PatternEntry('EMAIL', r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', triggers=('@',), reach=0),
+        # checksummed identifiers go before PHONE, whose digit groups would otherwise take them apart
+        PatternEntry('IBAN', r'\b[A-Z]{2}\d{2}(?: ?[A-Z0-9]{4}){2,7}(?: ?[A-Z0-9]{1,3})?\b', iban_valid, DIGITS, reach=43),
+        PatternEntry('CREDIT_CARD', r'\b(?:\d[ -]?){12,18}\d\b', luhn_valid, DIGITS, reach=37),
+        PatternEntry('SSN', r'\b(?!000|666|9\d\d)\d{3}-(?!00)\d{2}-(?!0000)\d{4}\b', triggers=DIGITS, reach=11),
+        PatternEntry('PHONE', r'\b(?:\+?1[-.\s]?)?\(?[2-9]\d{2}\)?[-.\s]?\d{3}[-.\s]?\d{4}\b|'
+                              r'\b1-800-[A-Z]{7}\b', triggers=DIGITS, reach=17),
+        PatternEntry('URL', r'https?://(?:[-\w.])+(?:[:\d]+)?(?:/(?:[\w/_.])*(?:\?(?:[\w&=%.])*)?)?',
+                     triggers=('http',), reach=0),
+        PatternEntry('IP', r'\b(?:\d{1,3}\.){3}\d{1,3}\b', ipv4_valid, DIGITS, reach=15),
+    ])
+
+
+# State inherited by forked workers, like in ner_worker_pool
+_worker_registry = None
+_worker_text = None
+
+
+# input chunk span (start, end) over the shared text
+def _scan_span(span: Tuple[int, int]) -> List[EntityMatch]:
+    start, end = span
+    return _worker_registry.scan(_worker_text[start:end], start)
+# output entities of that chunk
+
+
+# input registry, full text, chunks as (chunk_text, chunk_offset)
+def scan_chunks_parallel(registry: PatternRegistry, text: str, chunks: List[Tuple[str, int]],
+                         num_workers: int) -> List[List[EntityMatch]]:
+    """Scan regex chunks in forked worker processes; the text is shared copy-on-write, only spans are sent."""
+    global _worker_registry, _worker_text
+
+    spans = [(offset, offset + len(chunk_text)) for chunk_text, offset in chunks]
+    _worker_registry, _worker_text = registry, text
+    gc.freeze()
+    try:
+        with multiprocessing.get_context("fork").Pool(num_workers) as pool:
+            # ordered results, so entities come back exactly as a sequential scan returns them
+            return pool.map(_scan_span, spans, chunksize=max(1, len(spans) // (num_workers * 4)))
+    finally:
+        gc.unfreeze()
+        _worker_registry, _worker_text = None, None
+# output entities per chunk, in chunk order
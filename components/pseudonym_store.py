@@ -0,0 +1,185 @@
+"""
+Persistent entity -> placeholder store.
+An EntityMapper numbers placeholders for one run only. With a PseudonymStore
+attached, every document of a case file gets the same placeholder for the
+same entity, across runs and processes. The mapping lives in a SQLite file
+(indexed both ways, so tens of millions of entries never have to be in RAM)
+with a bounded in-memory LRU in front for the hot entities.
+"""
+
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (normalized text, label), the same key EntityMapper uses
+EntityKey = Tuple[str, str]
+
+SQL_BATCH = 400  # keys per IN (...) query, two variables per key stay under SQLite's old 999 limit
+
+
+class PseudonymStore:
+    """Two-tier (memory LRU + SQLite) entity -> placeholder mapping shared by many documents."""
+
+    def __init__(self, path, cache_entries: int = 100000):
+        if cache_entries < 0:
+            raise ValueError("cache_entries must not be negative")
+        self.path = Path(path)
+        self.cache_entries = cache_entries
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0  # hits that had to go to the SQLite tier
+        self._memory: "OrderedDict[EntityKey, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # autocommit; writes take an explicit IMMEDIATE transaction so concurrent processes allocate one at a time
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, timeout=60.0, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS pseudonyms ("
+                         "key TEXT NOT NULL, label TEXT NOT NULL, placeholder TEXT NOT NULL UNIQUE, text TEXT NOT NULL, "
+                         "PRIMARY KEY (key, label)) WITHOUT ROWID")
+        self._db.execute("CREATE TABLE IF NOT EXISTS counters (label TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    # input entity keys
+    def lookup_many(self, keys: Iterable[EntityKey]) -> Dict[EntityKey, str]:
+        """Placeholders of the keys that are already stored; unknown keys are left out."""
+        with self._lock:
+            return self._lookup(list(dict.fromkeys(keys)))
+    # output key -> placeholder
+
+    def insert_many(self, rows: Iterable[Tuple[EntityKey, str, str]]) -> int:
+        """Store (key, placeholder, original text) rows; keys or placeholders that are already taken are skipped."""
+        rows = [(key[0], key[1], placeholder, text) for key, placeholder, text in rows]
+        with self._lock:
+            before = self._db.total_changes
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany("INSERT OR IGNORE INTO pseudonyms (key, label, placeholder, text) VALUES (?, ?, ?, ?)", rows)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            return self._db.total_changes - before
+
+    # input (key, original text) of every entity of a document, a check for placeholders the document can't use
+    def get_or_create(self, items: Sequence[Tuple[EntityKey, str]],
+                      is_reserved: Optional[Callable[[str], bool]] = None) -> List[str]:
+        """Stored placeholders, new ones allocated from the persistent per-label counters in one transaction."""
+        with self._lock:
+            found = self._lookup(list(dict.fromkeys(key for key, _ in items)))
+            missing = {}  # key -> text of its first occurrence
+            for key, text in items:
+                if key not in found:
+                    missing.setdefault(key, text)
+            if missing:
+                self._db.execute("BEGIN IMMEDIATE")
+                try:
+                    found.update(self._select(list(missing)))  # another process may have added them
+                    self._allocate([(key, text) for key, text in missing.items() if key not in found], found, is_reserved)
+                    self._db.execute("COMMIT")
+                except Exception:
+                    self._db.execute("ROLLBACK")
+                    raise
+                for key in missing:
+                    self._remember(key, found[key])
+            return [found[key] for key, _ in items]
+    # output placeholders in the same order as items
+
+    def texts(self, placeholders: Iterable[str]) -> Dict[str, str]:
+        """Original text of stored placeholders, for deanonymizing any document of the case file."""
+        placeholders = list(dict.fromkeys(placeholders))
+        result = {}
+        with self._lock:
+            for i in range(0, len(placeholders), SQL_BATCH):
+                batch = placeholders[i:i + SQL_BATCH]
+                result.update(self._db.execute(
+                    f"SELECT placeholder, text FROM pseudonyms WHERE placeholder IN ({','.join('?' * len(batch))})", batch))
+        return result
+
+    def _lookup(self, keys: List[EntityKey]) -> Dict[EntityKey, str]:
+        found = {}
+        for key in keys:
+            placeholder = self._memory.get(key)
+            if placeholder is not None:
+                self._memory.move_to_end(key)
+                found[key] = placeholder
+        on_disk = self._select([key for key in keys if key not in found])
+        for key, placeholder in on_disk.items():
+            self._remember(key, placeholder)
+        self.hits += len(found) + len(on_disk)
+        self.disk_hits += len(on_disk)
+        self.misses += len(keys) - len(found) - len(on_disk)
+        found.update(on_disk)
+        return found
+
+    def _select(self, keys: List[EntityKey]) -> Dict[EntityKey, str]:
+        found = {}
+        for i in range(0, len(keys), SQL_BATCH):
+            batch = keys[i:i + SQL_BATCH]
+            # CROSS JOIN keeps the wanted keys as the outer loop, so every key is one primary-key search
+            rows = self._db.execute(
+                f"WITH wanted (key, label) AS (VALUES {','.join(['(?, ?)'] * len(batch))}) "
+                f"SELECT p.key, p.label, p.placeholder FROM wanted CROSS JOIN pseudonyms AS p "
+                f"ON p.key = wanted.key AND p.label = wanted.label", [part for key in batch for part in key])
+            found.update(((key, label), placeholder) for key, label, placeholder in rows)
+        return found
+
+    def _allocate(self, missing: List[Tuple[EntityKey, str]], found: Dict[EntityKey, str],
+                  is_reserved: Optional[Callable[[str], bool]]):
+        """Number new keys per label past the stored counter, skipping taken and reserved placeholders."""
+        counters = {}
+        rows = []
+        for key, text in missing:
+            label = key[1]
+            if label not in counters:
+                row = self._db.execute("SELECT value FROM counters WHERE label = ?", (label,)).fetchone()
+                counters[label] = row[0] if row else 0
+            counter = counters[label] + 1
+            while True:
+                placeholder = f"[{label}_{counter}]"
+                taken = self._db.execute("SELECT 1 FROM pseudonyms WHERE placeholder = ?", (placeholder,)).fetchone()
+                if not taken and not (is_reserved and is_reserved(placeholder)):
+                    break
+                counter += 1
+            counters[label] = counter
+            found[key] = placeholder
+            rows.append((key[0], label, placeholder, text))
+        self._db.executemany("INSERT INTO pseudonyms (key, label, placeholder, text) VALUES (?, ?, ?, ?)", rows)
+        self._db.executemany("INSERT INTO counters (label, value) VALUES (?, ?) "
+                             "ON CONFLICT (label) DO UPDATE SET value = excluded.value", counters.items())
+        if rows:
+            logger.debug(f"Pseudonym store: {len(rows)} new placeholders")
+
+    def _remember(self, key: EntityKey, placeholder: str):
+        if self.cache_entries == 0:
+            return
+        self._memory[key] = placeholder
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.cache_entries:
+            self._memory.popitem(last=False)  # least recently used
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM pseudonyms").fetchone()[0]
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'disk_hits': self.disk_hits,
+            'hit_rate': self.hits / total if total else 0.0,
+            'memory_entries': len(self._memory),
+        }
+
+    def reset_stats(self):
+        self.hits = self.misses = self.disk_hits = 0
+
+    def close(self):
+        with self._lock:
+            self._db.close()
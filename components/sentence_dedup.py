@@ -0,0 +1,117 @@
+"""
+Sentence-level deduplication before NER.
+Logs, form letters and templated documents repeat the same sentences many
+times. The text is split into sentences, every distinct sentence is packed
+once into a dense text for the model, and the entities found there are
+projected back onto every occurrence of their sentence.
+"""
+
+import re
+import time
+import logging
+from bisect import bisect_right
+from typing import Callable, Dict, List, Tuple
+
+from .boundary_planner import BoundaryPlanner
+from .entities import EntityMatch
+
+logger = logging.getLogger(__name__)
+
+BLANK_LINE = re.compile(r'\n[ \t]*\n')  # paragraph break; a single line break may just be hard wrapping
+SEPARATOR = "\n"  # between packed sentences, so no entity runs from one into the next
+
+
+# input text
+def segment_sentences(text: str) -> List[Tuple[int, int]]:
+    """(start, end) of every sentence or paragraph, surrounding whitespace left out.
+
+    Single line breaks don't cut: hard-wrapped text ("New\nYork", "John\nSmith") must reach the
+    model as one sentence, or the entity across the break is lost.
+    """
+    cuts = sorted(set(BoundaryPlanner(text).sentence_ends).union(m.end() for m in BLANK_LINE.finditer(text)))
+    spans = []
+    start = 0
+    for cut in cuts + [len(text)]:
+        segment = text[start:cut]
+        stripped = segment.strip()
+        if stripped:
+            segment_start = start + len(segment) - len(segment.lstrip())
+            spans.append((segment_start, segment_start + len(stripped)))
+        start = cut
+    return spans
+# output sentence spans in text order
+
+
+class SentenceDeduplicator:
+    """Runs NER once per distinct sentence and projects the entities onto every copy."""
+
+    def __init__(self, min_ratio: float = 0.1):
+        self.min_ratio = min_ratio  # below this share of repeated characters the text is used as it is
+        self.stats: Dict = {}
+
+    # input text and the NER function to run on it (text -> entities with offsets in that text)
+    def detect(self, text: str, detect_ner: Callable[[str], List[EntityMatch]]) -> List[EntityMatch]:
+        sentences = segment_sentences(text)
+        occurrences: Dict[str, List[int]] = {}  # distinct sentence -> start of every copy, first copy first
+        for start, end in sentences:
+            occurrences.setdefault(text[start:end], []).append(start)
+
+        sentence_chars = sum(end - start for start, end in sentences)
+        unique_chars = sum(len(sentence) for sentence in occurrences)
+        ratio = 1 - unique_chars / sentence_chars if sentence_chars else 0.0
+        self.stats = {
+            'sentences': len(sentences),
+            'unique_sentences': len(occurrences),
+            'dedup_ratio': ratio,  # share of sentence characters the model doesn't have to see
+            'characters': len(text),
+            'characters_inferred': len(text),
+            'applied': ratio >= self.min_ratio,
+            'inference_time': 0.0,
+            'estimated_time_saved': 0.0,
+        }
+        if not self.stats['applied']:
+            start_time = time.perf_counter()
+            entities = detect_ner(text)
+            self.stats['inference_time'] = time.perf_counter() - start_time
+            return entities
+
+        packed, packed_starts = self._pack(list(occurrences))
+        start_time = time.perf_counter()
+        packed_entities = detect_ner(packed)
+        elapsed = time.perf_counter() - start_time
+
+        entities = self._project(packed_entities, packed_starts, list(occurrences.values()))
+        self.stats['characters_inferred'] = len(packed)
+        self.stats['inference_time'] = elapsed
+        # assumes inference time grows linearly with the characters sent to the model
+        self.stats['estimated_time_saved'] = elapsed * (len(text) - len(packed)) / len(packed) if packed else 0.0
+        logger.info(f"Sentence dedup: {len(sentences)} sentences, {len(occurrences)} distinct "
+                    f"({ratio:.1%} deduplicated), ~{self.stats['estimated_time_saved']:.2f}s inference saved")
+        return entities
+    # output entities of every sentence copy, in text order
+
+    @staticmethod
+    def _pack(sentences: List[str]) -> Tuple[str, List[int]]:
+        """Distinct sentences joined into one text, and the start of each in it."""
+        starts = []
+        position = 0
+        for sentence in sentences:
+            starts.append(position)
+            position += len(sentence) + len(SEPARATOR)
+        return SEPARATOR.join(sentences), starts
+
+    @staticmethod
+    def _project(packed_entities: List[EntityMatch], packed_starts: List[int],
+                 occurrences: List[List[int]]) -> List[EntityMatch]:
+        entities = []
+        for entity in packed_entities:
+            i = bisect_right(packed_starts, entity.start) - 1
+            relative = entity.start - packed_starts[i]
+            length = entity.end - entity.start
+            if i + 1 < len(packed_starts) and entity.end > packed_starts[i + 1] - len(SEPARATOR):
+                continue  # runs over the end of its sentence, has no position in the original text
+            for sentence_start in occurrences[i]:
+                entities.append(EntityMatch(entity.text, entity.label, sentence_start + relative,
+                                            sentence_start + relative + length, entity.confidence))
+        entities.sort(key=lambda e: e.start)
+        return entities
@@ -0,0 +1,88 @@
+"""
+Linear-time text rewriting for anonymization.
+Replaces sorted, non-overlapping spans in one forward pass and records where
+every replaced span ended up, so positions can be mapped between the original
+and the anonymized text.
+"""
+
+from array import array
+from bisect import bisect_right
+from typing import Iterable, List, Optional, TextIO, Tuple
+
+
+class OffsetMap:
+    """Compact original <-> anonymized position map with one entry per replaced span."""
+
+    def __init__(self):
+        self.original_starts = array('q')
+        self.original_ends = array('q')
+        self.new_starts = array('q')
+        self.new_ends = array('q')
+
+    def add(self, original_start: int, original_end: int, new_start: int, new_end: int):
+        """Record one replaced span (spans must be added in document order)."""
+        self.original_starts.append(original_start)
+        self.original_ends.append(original_end)
+        self.new_starts.append(new_start)
+        self.new_ends.append(new_end)
+
+    def __len__(self):
+        return len(self.original_starts)
+
+    # input position in the original text
+    def to_anonymized(self, position: int) -> int:
+        """Map an original position; positions inside a replaced span map to the start of its placeholder."""
+        i = bisect_right(self.original_starts, position) - 1
+        if i < 0:
+            return position
+        if position < self.original_ends[i]:
+            return self.new_starts[i]
+        return position + self.new_ends[i] - self.original_ends[i]
+    # output position in the anonymized text
+
+    # input position in the anonymized text
+    def to_original(self, position: int) -> int:
+        """Map an anonymized position; positions inside a placeholder map to the start of the original span."""
+        i = bisect_right(self.new_starts, position) - 1
+        if i < 0:
+            return position
+        if position < self.new_ends[i]:
+            return self.original_starts[i]
+        return position + self.original_ends[i] - self.new_ends[i]
+    # output position in the original text
+
+
+def spans_are_disjoint(spans: List[Tuple[int, int, str]]) -> bool:
+    """True if spans sorted by start have strictly increasing starts and don't overlap."""
+    for (prev_start, prev_end, _), (start, _, _) in zip(spans, spans[1:]):
+        if start <= prev_start or start < prev_end:
+            return False
+    return True
+
+
+# input original text, (start, end, replacement) spans sorted by start and not overlapping, optional file handle
+def rewrite_spans(text: str, spans: Iterable[Tuple[int, int, str]],
+                  output: Optional[TextIO] = None) -> Tuple[Optional[str], OffsetMap]:
+    """Build the rewritten text in one pass; with output given, pieces are written there instead of joined."""
+    offset_map = OffsetMap()
+    pieces = []
+    write = output.write if output is not None else pieces.append
+
+    position = 0  # position in the original text
+    new_position = 0  # position in the rewritten text
+    for start, end, replacement in spans:
+        if start > position:
+            write(text[position:start])  # unchanged text before the span
+            new_position += start - position
+        write(replacement)
+        offset_map.add(start, end, new_position, new_position + len(replacement))
+        new_position += len(replacement)
+        position = end
+
+    if position < len(text):
+        write(text[position:])  # unchanged tail
+
+    if output is not None:
+        return None, offset_map
+    return ''.join(pieces), offset_map
+# output rewritten text (None when streamed to output) and the offset map
@@ -1,29 +1,119 @@
-from typing import List, Dict, Any
+import math
+from collections import Counter, defaultdict
+from typing import List, Dict, Any, Iterable, Optional
 from .entities import EntityMatch
-from collections import Counter
+
+
+class LabelStatistics: # running confidence statistics of one label
+    """Count, confidence sum, min/max and a fine confidence histogram of one label; mergeable."""
+
+    BINS = 100  # histogram bins over [0, 1], approximate quantiles are within one bin width
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.histogram = [0] * self.BINS
+
+    # input confidences of one label from one chunk
+    def add(self, confidences: List[float]):
+        self.count += len(confidences)
+        self.total += sum(confidences)  # one chunk = one sum(), as the old per-label list was averaged
+        self.min = min(self.min, min(confidences))
+        self.max = max(self.max, max(confidences))
+        for bin_index, count in Counter(int(c * self.BINS) for c in confidences).items():
+            self.histogram[min(self.BINS - 1, max(0, bin_index))] += count
+    # output updated statistics, the confidences themselves aren't kept
+
+    def merge(self, other: "LabelStatistics"):
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.histogram = [a + b for a, b in zip(self.histogram, other.histogram)]
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count
+
+    def quantile(self, q: float) -> float:
+        """Approximate quantile: linear interpolation inside the histogram bin, clamped to min/max."""
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.histogram):
+            if count and seen + count >= rank:
+                value = (i + (rank - seen) / count) / self.BINS
+                return min(self.max, max(self.min, value))
+            seen += count
+        return self.max
+
+    def coarse_histogram(self, bins: int = 10) -> List[int]:
+        """Entity counts in `bins` equal confidence ranges over [0, 1]."""
+        width = self.BINS // bins
+        return [sum(self.histogram[i:i + width]) for i in range(0, self.BINS, width)]
+
+
+class StatisticsAggregator: # online statistics, updated chunk by chunk
+    """Per-label statistics built as entities are produced; aggregators of workers or documents merge."""
+
+    QUANTILES = (0.5, 0.9, 0.99)
+
+    def __init__(self):
+        self.labels: Dict[str, LabelStatistics] = {} # label -> running statistics, in order of first appearance
+
+    # input entities (or an EntityTable) of one chunk, window or document
+    def add(self, entities: Iterable[EntityMatch]) -> "StatisticsAggregator":
+        if hasattr(entities, 'confidences_by_label'):  # an EntityTable groups its confidence column directly
+            confidences = entities.confidences_by_label()
+        else:
+            confidences = defaultdict(list)  # label -> confidences of this chunk, in order of first appearance
+            for entity in entities:
+                confidences[entity.label].append(entity.confidence)
+        for label, values in confidences.items():
+            if label not in self.labels:
+                self.labels[label] = LabelStatistics()
+            self.labels[label].add(values)
+        return self
+    # output the same aggregator, so calls can be chained
+
+    def merge(self, other: "StatisticsAggregator") -> "StatisticsAggregator":
+        for label, label_statistics in other.labels.items():
+            if label not in self.labels:
+                self.labels[label] = LabelStatistics()
+            self.labels[label].merge(label_statistics)
+        return self
+
+    @property
+    def total_entities(self) -> int:
+        return sum(s.count for s in self.labels.values())
+
+    def statistics(self, unique_entities: int = 0) -> Dict[str, Any]:
+        """The generate_statistics dictionary, plus approximate quantiles and histograms per label."""
+        return {
+            'total_entities': self.total_entities,
+            'unique_entities': unique_entities,  # Number of unique mapped entities
+            'by_category': {label: s.count for label, s in self.labels.items()},
+            'confidence_stats': {label: {
+                'average confidence': s.mean,
+                'min confidence': s.min,
+                'max confidence': s.max,
+            } for label, s in self.labels.items()},
+            'entity_types_found': list(self.labels.keys()),
+            'confidence_quantiles': {label: {f"p{round(q * 100)}": s.quantile(q) for q in self.QUANTILES}
+                                     for label, s in self.labels.items()},
+            'confidence_histograms': {label: s.coarse_histogram() for label, s in self.labels.items()},
+        }
+
+
 class StatisticsGenerator: # class for generating statistics about anonymization process
     """Generates detailed statistics about anonymization process."""
-    
+
     @staticmethod # static method that does not require instance of the class to be called
-    def generate_statistics(entities: List[EntityMatch],  # function that will generate statistics, inputs = entities as key and list of entities that are same as value
-                          entity_mapping: Dict[str, str]) -> Dict[str, Any]: # also makes a dicionary for dictionary with 2 string, all of that will be append to a dictionary
-        """Generate comprehensive statistics."""
-        by_category = Counter(entity.label for entity in entities) # count entities by their labels
-        
-        confidence_stats = {} # dictionary for holding confidence statistics
-        for label in by_category.keys(): # iterate over each label found in the entities
-            label_entities = [e for e in entities if e.label == label] # filter entities by label
-            confidences = [e.confidence for e in label_entities] # extract confidence scores
-            confidence_stats[label] = {
-                'average confidence': sum(confidences) / len(confidences),
-                'min confidence': min(confidences),
-                'max confidence': max(confidences)
-            }
-        
-        return {
-            'total_entities': len(entities),
-            'unique_entities': len(entity_mapping),  # Number of unique mapped entities
-            'by_category': dict(by_category),
-            'confidence_stats': confidence_stats,
-            'entity_types_found': list(by_category.keys())
-        }
+    def generate_statistics(entities: Iterable[EntityMatch],  # function that will generate statistics, inputs = entities as key and list of entities that are same as value
+                          entity_mapping: Dict[str, str],
+                          aggregator: Optional[StatisticsAggregator] = None) -> Dict[str, Any]: # also makes a dicionary for dictionary with 2 string, all of that will be append to a dictionary
+        """Generate comprehensive statistics (one pass; pass an aggregator to reuse one built during the run)."""
+        if aggregator is None:
+            aggregator = StatisticsAggregator().add(entities)
+        return aggregator.statistics(len(entity_mapping))
@@ -0,0 +1,151 @@
+"""
+Streaming anonymization for inputs that don't fit in memory.
+The input is read window by window; entities are resolved behind a moving
+frontier and the anonymized text is written as soon as nothing before the
+frontier can change any more, so memory stays bounded by the window size.
+"""
+
+import time
+import logging
+from typing import Dict, Set, TextIO
+
+from .anonymizer import Anonymizer
+from .entity_mapper import PLACEHOLDER_TOKEN
+from .input_text import open_text
+from .overlap_resolver import OverlapResolver
+from .statistics_generator import StatisticsAggregator
+
+logger = logging.getLogger(__name__)
+
+
+# input text file handle
+def scan_placeholder_tokens(source: TextIO, block_size: int = 1 << 20, max_length: int = 64) -> Set[str]:
+    """Collect placeholder-shaped tokens of a stream without keeping the text."""
+    tokens = set()
+    carry = ''
+    while True:
+        block = source.read(block_size)
+        text = carry + block
+        tokens.update(PLACEHOLDER_TOKEN.findall(text))
+        if not block:
+            return tokens
+        # a token cut by the block end starts at the last '[' and has no ']' yet
+        start = text.rfind('[')
+        carry = text[start:] if start != -1 and ']' not in text[start:] and len(text) - start < max_length else ''
+# output set of tokens the mapper must not use as placeholders
+
+
+class StreamingAnonymizer:
+    """Anonymizes a text stream window by window with bounded memory."""
+
+    def __init__(self, detector, mapper, window_chars: int = 100_000, context_chars: int = 2_000):
+        if window_chars <= 2 * context_chars:
+            raise ValueError("window_chars must be more than twice context_chars")
+        self.detector = detector  # anything with detect_raw_entities(text, offset), overlap_policy and patterns
+        self.mapper = mapper
+        self.window_chars = window_chars  # characters sent to detection at once
+        self.context_chars = context_chars  # characters of left/right context around the part a window decides on
+        self.supported_labels = set(Anonymizer.SUPPORTED_LABELS)
+
+    # input path of a plain or .gz/.bz2/.xz text file, path of the output file
+    def anonymize_file(self, input_path, output_path) -> Dict:
+        """Pre-scan the file for placeholder collisions, then anonymize it into output_path."""
+        with open_text(input_path) as source:
+            self.mapper.reserve_placeholders(scan_placeholder_tokens(source))
+        with open_text(input_path) as source, open(output_path, 'w', encoding='utf-8') as output:
+            return self.anonymize_stream(source, output)
+    # output run statistics
+
+    # input readable and writable text handles
+    def anonymize_stream(self, source: TextIO, output: TextIO) -> Dict:
+        """Anonymize source into output; placeholders are assigned in document order."""
+        start_time = time.perf_counter()
+        resolver = OverlapResolver(self.detector.overlap_policy, regex_labels=self.detector.patterns.keys())
+        buffer = ''  # text from buffer_offset on, only the part that may still be needed
+        buffer_offset = 0
+        frontier = 0  # every entity starting before this was fed to the resolver
+        written = 0  # output is complete up to this position of the input
+        eof = False
+        stats = {'characters': 0, 'windows': 0, 'entities': 0, 'skipped_overlaps': 0}
+        aggregator = StatisticsAggregator()  # updated window by window, no entity is kept for the statistics
+
+        def write_until(position):
+            nonlocal written
+            if position > written:
+                output.write(buffer[written - buffer_offset:position - buffer_offset])
+                written = position
+
+        def write_entities(entities):
+            nonlocal written
+            kept, end = [], written
+            for entity in entities:
+                if entity.label not in self.supported_labels:
+                    continue
+                if entity.start < end:
+                    stats['skipped_overlaps'] += 1  # still overlaps an entity that was already written
+                    continue
+                kept.append(entity)
+                end = entity.end
+            for entity, placeholder in zip(kept, self.mapper.get_or_create_placeholders(kept)):
+                write_until(entity.start)
+                output.write(placeholder)
+                written = entity.end
+                stats['entities'] += 1
+            aggregator.add(kept)
+
+        while True:
+            while not eof and buffer_offset + len(buffer) < frontier + self.window_chars:
+                block = source.read(self.window_chars)
+                if block:
+                    buffer += block
+                    stats['characters'] += len(block)
+                else:
+                    eof = True
+            buffer_end = buffer_offset + len(buffer)
+            if frontier >= buffer_end:
+                break
+
+            window_start = max(buffer_offset, frontier - self.context_chars)
+            if eof and buffer_end - frontier <= self.window_chars:
+                window_end = new_frontier = buffer_end  # last window decides on everything that is left
+            else:
+                window_end = self._cut(buffer, buffer_offset, frontier + self.window_chars // 2,
+                                       min(buffer_end, frontier + self.window_chars))
+                new_frontier = window_end - self.context_chars  # the rest is decided with right context next time
+
+            window_text = buffer[window_start - buffer_offset:window_end - buffer_offset]
+            entities = [e for e in self.detector.detect_raw_entities(window_text, window_start)
+                        if frontier <= e.start < new_frontier]
+            write_entities(resolver.feed(entities, new_frontier))
+            frontier = new_frontier
+            stats['windows'] += 1
+
+            # text up to the frontier (or the first entity that can still change) is final
+            held_start = resolver.earliest_held_start()
+            write_until(frontier if held_start is None else min(frontier, held_start))
+
+            keep_from = min(written, frontier - self.context_chars)
+            if keep_from > buffer_offset:
+                buffer = buffer[keep_from - buffer_offset:]
+                buffer_offset = keep_from
+            logger.info(f"Streaming: {frontier} characters decided, {stats['entities']} entities written")
+
+        write_entities(resolver.flush())
+        write_until(buffer_offset + len(buffer))
+
+        stats['statistics'] = aggregator.statistics(len(self.mapper.get_mapping()))
+        stats['by_category'] = stats['statistics']['by_category']
+        stats['exact_duplicates'] = resolver.exact_duplicate_count
+        stats['overlaps_removed'] = resolver.overlap_removed_count
+        stats['processing_time'] = time.perf_counter() - start_time
+        return stats
+    # output run statistics (characters, windows, entities per category, confidence statistics, time)
+
+    @staticmethod
+    def _cut(buffer: str, buffer_offset: int, earliest: int, latest: int) -> int:
+        """Window end at the last line break (or space) in [earliest, latest), so words aren't split."""
+        for separator in ('\n', ' '):
+            position = buffer.rfind(separator, earliest - buffer_offset, latest - buffer_offset)
+            if position != -1:
+                return buffer_offset + position + 1
+        return latest
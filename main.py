@@ -10,6 +10,32 @@ from components import (    # components that contain the main functionality
     TextDeanonymizer
 )
 
+def create_entity_detector():
+    """Client of the resident model server if ANONYMIZER_SERVER_URL points to one, otherwise a local model."""
+    server_url = os.environ.get("ANONYMIZER_SERVER_URL") # started with: python -m components.model_server
+    if server_url:
+        from components.model_server import ModelClient
+        client = ModelClient(server_url)
+        if client.is_available():
+            print(f"Using model server at {server_url}")
+            return client
+        print(f"Model server at {server_url} not reachable, loading the model locally")
+    return EntityDetector("Jean-Baptiste/roberta-large-ner-english", confidence_threshold=0.8)
+
+def create_entity_mapper():
+    """Keyed mapper if ANONYMIZER_PLACEHOLDER_KEY is set, backed by the case file's pseudonym store if
+    ANONYMIZER_PSEUDONYM_STORE is set, otherwise numbered per run."""
+    placeholder_key = os.environ.get("ANONYMIZER_PLACEHOLDER_KEY")
+    if placeholder_key:
+        print("Using keyed placeholders")
+        return EntityMapper(key=placeholder_key)
+    store_path = os.environ.get("ANONYMIZER_PSEUDONYM_STORE")
+    if store_path:
+        from components.pseudonym_store import PseudonymStore
+        print(f"Using pseudonym store {store_path}")
+        return EntityMapper(store=PseudonymStore(store_path))
+    return EntityMapper()
+
 def run_main():
     """Main anonymization workflow function."""
     print("Text Anonymization System")
@@ -25,8 +51,8 @@ def run_main():
 
     # Initialize components
     print("Initializing components...")
-    entity_detector = EntityDetector("Jean-Baptiste/roberta-large-ner-english", confidence_threshold=0.8)
-    entity_mapper = EntityMapper()
+    entity_detector = create_entity_detector()
+    entity_mapper = create_entity_mapper()
     statistics_generator = StatisticsGenerator()
 
     init_time = time.time() - start_time
@@ -54,6 +80,8 @@ def run_main():
     from components.anonymizer import Anonymizer
     anonymizer = Anonymizer(text, all_entities, entity_mapper)
     anonymizer.anonymize()
+    if entity_mapper.store is not None:
+        entity_mapper.store.close()  # every placeholder of this run is stored now, the mapping stays in memory
     result_text = anonymizer.result_text
     text_preview = result_text[:400] + ("..." if len(result_text) > 400 else "")
     print(text_preview)
@@ -0,0 +1,39 @@
+"""Tests for the Aho-Corasick automaton."""
+
+import re
+import pytest
+from components.aho_corasick import AhoCorasick
+
+@pytest.fixture
+def automaton():
+    return AhoCorasick(["he", "she", "his", "hers", "Robert Davis", "Davis"])
+
+def naive_matches(patterns, text):
+    return sorted((m.start(), m.start() + len(p), i) for i, p in enumerate(patterns)
+                  for m in re.finditer(f"(?={re.escape(p)})", text))
+
+# input text with overlapping and nested occurrences
+def test_finds_all_overlapping_matches(automaton):
+    text = "ushers and his Robert Davis, Davis"
+    assert sorted(automaton.iter_matches(text)) == naive_matches(automaton.patterns, text)
+# output same matches as one search per pattern
+
+# input names inside longer words
+def test_whole_words(automaton):
+    text = "Davis met Davisson and Robert Davis."
+    found = [(text[s:e], s) for s, e, _ in automaton.iter_matches(text, whole_words=True)]
+    assert found == [("Davis", 0), ("Robert Davis", 23), ("Davis", 30)]
+# output only occurrences with word boundaries on both sides
+
+# input differently cased text
+def test_case_insensitive():
+    automaton = AhoCorasick(["Robert Davis"], case_insensitive=True)
+    text = "ROBERT DAVIS and robert davis"
+    assert [text[s:e] for s, e, _ in automaton.iter_matches(text)] == ["ROBERT DAVIS", "robert davis"]
+    assert list(AhoCorasick(["Robert Davis"]).iter_matches(text)) == []
+# output original-text positions of both occurrences
+
+def test_empty_patterns_ignored():
+    automaton = AhoCorasick(["", "a"])
+    assert len(automaton) == 1
+    assert list(automaton.iter_matches("banana")) == [(1, 2, 0), (3, 4, 0), (5, 6, 0)]
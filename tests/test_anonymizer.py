@@ -53,4 +53,83 @@ def test_unicode_and_special_characters():
     assert "[PER_1]" in result
     assert "[ORG_1]" in result
     assert "[ORG_2]" in result
-# output should be anonymized text with placeholders
\ No newline at end of file
+# output should be anonymized text with placeholders
+
+def slice_anonymize(text, entities, mapper):
+    # reference: number in document order, then replace from the end by slicing the whole text once per entity
+    mapper.set_original_text(text)
+    for entity in sorted(entities, key=lambda e: e.start):
+        mapper.get_or_create_placeholder(entity)
+    result_text = text
+    for entity in sorted(entities, key=lambda e: e.start, reverse=True):
+        placeholder = mapper.get_or_create_placeholder(entity)
+        result_text = result_text[:entity.start] + placeholder + result_text[entity.end:]
+    return result_text
+
+# input many entities in a longer text
+def test_one_pass_rewrite_matches_slicing():
+    text = "John Smith met Mary Jones at Acme Corp. " * 50
+    entities = []
+    for i in range(50):
+        base = i * 40
+        entities += [
+            EntityMatch("John Smith", "PER", base, base + 10, 0.99),
+            EntityMatch("Mary Jones", "PER", base + 15, base + 25, 0.98),
+            EntityMatch("Acme Corp", "ORG", base + 29, base + 38, 0.95),
+        ]
+    anonymizer = Anonymizer(text, entities, EntityMapper())
+    anonymizer.anonymize()
+    assert anonymizer.result_text == slice_anonymize(text, entities, EntityMapper())
+# output byte-identical anonymized text
+
+# input overlapping entities
+def test_overlapping_entities_match_slicing():
+    text = "John Smith works at Acme Corp."
+    entities = [
+        EntityMatch("John Smith", "PER", 0, 10, 0.99),
+        EntityMatch("Smith works", "ORG", 5, 16, 0.90),
+    ]
+    anonymizer = Anonymizer(text, entities, EntityMapper())
+    anonymizer.anonymize()
+    assert anonymizer.result_text == slice_anonymize(text, entities, EntityMapper())
+# output same text as the slicing implementation
+
+# input file handle for streamed output
+def test_anonymize_to_file_handle(tmp_path):
+    text = "John Smith works at Acme Corp."
+    entities = [EntityMatch("John Smith", "PER", 0, 10, 0.99), EntityMatch("Acme Corp", "ORG", 20, 29, 0.95)]
+    output_path = tmp_path / "anonymized.txt"
+    with open(output_path, "w", encoding="utf-8") as f:
+        Anonymizer(text, entities, EntityMapper()).anonymize_to(f)
+    assert output_path.read_text(encoding="utf-8") == "[PER_1] works at [ORG_1]."
+# output anonymized text written to the file
+
+# input entities, checks the offset map built while rewriting
+def test_offset_map():
+    text = "John Smith works at Acme Corp."
+    entities = [EntityMatch("John Smith", "PER", 0, 10, 0.99), EntityMatch("Acme Corp", "ORG", 20, 29, 0.95)]
+    anonymizer = Anonymizer(text, entities, EntityMapper())
+    anonymizer.anonymize()
+    offset_map = anonymizer.offset_map
+    assert len(offset_map) == 2
+    assert anonymizer.result_text[offset_map.to_anonymized(20):].startswith("[ORG_1]")
+    assert offset_map.to_anonymized(11) == anonymizer.result_text.index("works")
+    assert offset_map.to_original(anonymizer.result_text.index("works")) == 11
+# output positions map between original and anonymized text
+
+def test_anonymize_regex_pii_labels():
+    text = "Card 4111 1111 1111 1111, SSN 123-45-6789."
+    entities = [EntityMatch("4111 1111 1111 1111", "CREDIT_CARD", 5, 24, 1.0), EntityMatch("123-45-6789", "SSN", 30, 41, 1.0)]
+    anonymizer = Anonymizer(text, entities, EntityMapper())
+    anonymizer.anonymize()
+    assert anonymizer.result_text == "Card [CREDIT_CARD_1], SSN [SSN_1]."
+
+# input entities listed in reverse document order
+def test_placeholders_numbered_in_document_order():
+    text = "Mary Jones met John Smith and Mary Jones again."
+    entities = [EntityMatch("Mary Jones", "PER", 30, 40, 0.9), EntityMatch("John Smith", "PER", 15, 25, 0.9),
+                EntityMatch("Mary Jones", "PER", 0, 10, 0.9)]
+    anonymizer = Anonymizer(text, entities, EntityMapper())
+    anonymizer.anonymize()
+    assert anonymizer.result_text == "[PER_1] met [PER_2] and [PER_1] again."
+# output first occurrence in the text gets the lowest number
@@ -0,0 +1,140 @@
+"""Tests for the micro-batching async detection API."""
+
+import asyncio
+import re
+import time
+import pytest
+from components.async_api import AsyncEntityDetector, percentile
+from components.entities import EntityMatch
+from components.entity_detector import EntityDetector
+
+def fake_chunks(text):
+    """One chunk per line, as (chunk_text, chunk_offset, token_count)."""
+    chunks, offset = [], 0
+    for line in text.split("\n"):
+        if line.strip():
+            chunks.append((line, offset, len(line.split())))
+        offset += len(line) + 1
+    return chunks
+
+@pytest.fixture
+def detector():
+    """Regex-only detector whose NER step finds capitalised word pairs and records its batch sizes."""
+    detector = EntityDetector(use_ner=False)
+    detector.use_ner = True
+    detector.batch_sizes = []
+
+    def detect_batch(chunks, batch_size=None):
+        detector.batch_sizes.append(len(chunks))
+        if any(chunk_text == "fail" for chunk_text, _, _ in chunks):
+            raise RuntimeError("model crashed")
+        return [[EntityMatch(m.group(), 'PER', m.start() + offset, m.end() + offset, 0.95)
+                 for m in re.finditer(r'[A-Z][a-z]+ [A-Z][a-z]+', chunk_text)]
+                for chunk_text, offset, _ in chunks]
+
+    detector._create_ner_chunks = fake_chunks
+    detector._detect_entities_ner_batched = detect_batch
+    detector._detect_entities_ner_text = lambda text: [e for found in detect_batch(fake_chunks(text)) for e in found]
+    return detector
+
+async def detect_all(api, texts):
+    return await asyncio.gather(*(api.detect_entities_full_text(text) for text in texts))
+
+# input concurrent requests from 8 callers, batches of up to 4 chunks
+def test_concurrent_requests_share_batches(detector):
+    texts = [f"ticket {i} from John Smith, reply to john{i}@acme.com" for i in range(8)]
+    expected = [detector.detect_entities_full_text(text) for text in texts]
+    detector.batch_sizes.clear()
+
+    async def run():
+        async with AsyncEntityDetector(detector, max_batch_size=4, max_wait=1.0) as api:
+            return await detect_all(api, texts), api.stats()
+
+    results, stats = asyncio.run(run())
+    assert results == expected
+    assert [[(e.start, e.end) for e in entities] for entities in results] == \
+        [[(e.start, e.end) for e in entities] for entities in expected]
+    assert detector.batch_sizes == [4, 4]
+    assert (stats['requests'], stats['batches'], stats['average_batch_size']) == (8, 2, 4.0)
+# output each caller gets its own entities, 8 chunks in 2 forward passes
+
+# input a lone request with a large batch size
+def test_deadline_flushes_partial_batch(detector):
+    async def run():
+        async with AsyncEntityDetector(detector, max_batch_size=64, max_wait=0.05) as api:
+            start = time.perf_counter()
+            entities = await api.detect_entities_full_text("Mary Jones\nand Peter Brown")
+            return entities, time.perf_counter() - start
+
+    entities, elapsed = asyncio.run(run())
+    assert [(e.text, e.start) for e in entities] == [("Mary Jones", 0), ("Peter Brown", 15)]
+    assert detector.batch_sizes == [2]
+    assert 0.05 <= elapsed < 1.0
+# output the batch runs once max_wait has passed, without waiting for it to fill
+
+# input a failing batch between good ones
+def test_failed_batch_reaches_its_callers_only(detector):
+    async def run():
+        async with AsyncEntityDetector(detector, max_batch_size=1, max_wait=0.0) as api:
+            results = await asyncio.gather(api.detect_entities_full_text("John Smith"),
+                                           api.detect_entities_full_text("fail"),
+                                           api.detect_entities_full_text("Mary Jones"),
+                                           return_exceptions=True)
+            return results, api.stats()
+
+    (first, failed, third), stats = asyncio.run(run())
+    assert [e.text for e in first] == ["John Smith"]
+    assert isinstance(failed, RuntimeError)
+    assert [e.text for e in third] == ["Mary Jones"]
+    assert stats['requests'] == 2
+# output the error is raised in the failing caller, the batcher keeps serving
+
+def test_regex_only_and_empty_requests(detector):
+    detector.use_ner = False
+
+    async def run():
+        async with AsyncEntityDetector(detector) as api:
+            return await detect_all(api, ["", "call 555-123-4567"])
+
+    empty, phone = asyncio.run(run())
+    assert empty == []
+    assert [e.label for e in phone] == ["PHONE"]
+    assert detector.batch_sizes == []
+
+# input a detector configured with options the micro-batching path doesn't run
+def test_skipped_features_are_reported(caplog):
+    detector = EntityDetector(use_ner=False, sentence_dedup=True, num_workers=2)
+    api = AsyncEntityDetector(detector)
+    assert api._skipped_features() == ['sentence_dedup', 'num_workers']
+    assert "doesn't use sentence_dedup, num_workers" in caplog.text
+    assert AsyncEntityDetector(EntityDetector(use_ner=False))._skipped_features() == []
+# output a warning names them
+
+# input long documents from concurrent callers, and the same detector used synchronously from a thread
+def test_long_documents_with_real_tokenizer():
+    detector = EntityDetector(batch_size=4)
+    detector.tokenizer.model_max_length = 512  # the pipeline truncates its inputs, as with the released model
+    documents = [" ".join(f"John Smith visited Berlin on day {i} of trip {n}." for i in range(300)) for n in range(3)]
+    expected = [[(e.text, e.label, e.start, e.end) for e in detector.detect_entities_full_text(document)]
+                for document in documents]
+
+    async def run():
+        async with AsyncEntityDetector(detector, max_batch_size=4) as api:
+            background = asyncio.create_task(asyncio.to_thread(
+                lambda: [detector.detect_entities_full_text(document) for document in documents]))
+            results = await detect_all(api, documents * 2)
+            await background
+            return results
+
+    results = asyncio.run(run())
+    assert [[(e.text, e.label, e.start, e.end) for e in entities] for entities in results] == expected * 2
+    assert all(entities[-1].end > len(document) - 100 for entities, document in zip(results, documents))  # not cut at 512 tokens
+# output every document is covered to its end and finds what a single synchronous call finds
+
+def test_latency_percentiles():
+    values = sorted([0.01] * 98 + [0.5, 1.0])
+    assert percentile(values, 0.5) == 0.01
+    assert percentile(values, 0.99) == 0.5
+    assert percentile([], 0.99) == 0.0
+    with pytest.raises(ValueError):
+        AsyncEntityDetector(None, max_batch_size=0)
@@ -0,0 +1,139 @@
+"""Tests for the headless batch anonymization command."""
+
+import gzip
+import json
+import threading
+import time
+import pytest
+import batch_anonymize
+from components.deanonymizer import TextDeanonymizer
+from components.entities import EntityMatch
+
+DOCUMENTS = {
+    "a.txt": "Mail john@acme.com or call 555-123-4567.",
+    "reports/b.txt": "Invoices go to billing@acme.com, copies to john@acme.com.",
+}
+
+class SlowDetector:
+    """Finds nothing, but records how many documents are in detection at once."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def detect_entities_full_text(self, text):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.05)
+        with self._lock:
+            self.active -= 1
+        if text == "fail":
+            raise RuntimeError("model crashed")
+        return [EntityMatch("acme", "ORG", 0, 4, 0.9)] if text.startswith("acme") else []
+
+@pytest.fixture
+def corpus(tmp_path):
+    input_dir = tmp_path / "input"
+    for name, text in DOCUMENTS.items():
+        (input_dir / name).parent.mkdir(parents=True, exist_ok=True)
+        (input_dir / name).write_text(text, encoding="utf-8")
+    with gzip.open(input_dir / "c.txt.gz", "wt", encoding="utf-8") as f:
+        f.write("Server 10.0.0.1 is down.")
+    (input_dir / "notes.md").write_text("not picked up from directories", encoding="utf-8")
+    return input_dir
+
+# input a directory with plain, nested and gzip documents, regex-only profile
+def test_directory_round_trip(corpus, tmp_path, capsys):
+    output_dir = tmp_path / "output"
+    assert batch_anonymize.main([str(corpus), "--output-dir", str(output_dir), "--regex-only", "--workers", "2"]) == 0
+    written = sorted(str(p.relative_to(output_dir)) for p in output_dir.rglob("*.json"))
+    assert written == ["a.txt.json", "c.txt.gz.json", "reports/b.txt.json"]
+    for name, text in DOCUMENTS.items():
+        result = json.loads((output_dir / f"{name}.json").read_text(encoding="utf-8"))
+        assert "acme.com" not in result['anonymized_text']
+        assert TextDeanonymizer.deanonymize_text(result['anonymized_text'], result['mapping']) == text
+        assert result['statistics']['total_entities'] == len(result['entities'])
+    assert "3 anonymized, 0 failed" in capsys.readouterr().out
+# output one JSON per document that deanonymizes back to the original
+
+# input a glob pattern
+def test_glob_inputs(corpus, tmp_path):
+    files = batch_anonymize.collect_inputs([str(corpus / "**" / "*.txt")])
+    assert [p.name for p in files] == ["a.txt", "b.txt"]
+    assert batch_anonymize.collect_inputs([str(corpus / "missing*.txt")]) == []
+# output only the matching files, sorted
+
+# input more documents than workers, one of them failing
+def test_bounded_concurrency_and_failures(tmp_path):
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    for i in range(6):
+        (input_dir / f"doc{i}.txt").write_text("acme ships" if i else "fail", encoding="utf-8")
+    detector = SlowDetector()
+    files = batch_anonymize.collect_inputs([str(input_dir)])
+    summary = batch_anonymize.run_batch(files, tmp_path / "output", detector, workers=2)
+    assert detector.peak == 2
+    assert summary['documents'] == 5
+    assert summary['failed'] == [str(input_dir / "doc0.txt")]
+    assert summary['entities'] == 5
+    assert summary['statistics']['by_category'] == {'ORG': 5}
+    assert summary['documents_per_second'] > 0 and summary['mb_per_second'] > 0
+    assert not (tmp_path / "output" / "doc0.txt.json").exists()
+# output at most 2 documents in flight, the failure is reported and the rest finish
+
+# input long documents run with one and with three workers on a locally loaded model
+def test_workers_share_a_local_model(tmp_path):
+    from components.entity_detector import EntityDetector
+    detector = EntityDetector(batch_size=4)
+    detector.tokenizer.model_max_length = 512  # the pipeline truncates its inputs, as with the released model
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    for n in range(4):
+        (input_dir / f"doc{n}.txt").write_text(" ".join(f"John Smith visited Berlin on day {i} of trip {n}."
+                                                        for i in range(300)), encoding="utf-8")
+    files = batch_anonymize.collect_inputs([str(input_dir)])
+    results = {}
+    for workers in (1, 3):
+        batch_anonymize.run_batch(files, tmp_path / f"output{workers}", detector, workers=workers)
+        results[workers] = [json.loads((tmp_path / f"output{workers}" / f"doc{n}.txt.json").read_text(encoding="utf-8"))
+                            for n in range(4)]
+    assert [r['entities'] for r in results[3]] == [r['entities'] for r in results[1]]
+    assert [r['anonymized_text'] for r in results[3]] == [r['anonymized_text'] for r in results[1]]
+# output concurrent documents get the same entities: the detector runs one NER pass at a time
+
+def test_no_inputs(tmp_path):
+    assert batch_anonymize.main([str(tmp_path / "*.txt"), "--output-dir", str(tmp_path / "out"), "--regex-only"]) == 1
+
+# input the same corpus anonymized twice with a pseudonym store
+def test_pseudonym_store_shared_across_documents(corpus, tmp_path):
+    store_path = tmp_path / "case.sqlite"
+    for run in ("first", "second"):
+        assert batch_anonymize.main([str(corpus), "--output-dir", str(tmp_path / run), "--regex-only",
+                                     "--workers", "2", "--pseudonym-store", str(store_path)]) == 0
+    placeholders = {}
+    for run in ("first", "second"):
+        for name in DOCUMENTS:
+            mapping = json.loads((tmp_path / run / f"{name}.json").read_text(encoding="utf-8"))['mapping']
+            for placeholder, original in mapping.items():
+                assert placeholders.setdefault(original, placeholder) == placeholder
+    assert "john@acme.com" in placeholders
+# output john@acme.com has one placeholder in every document of both runs
+
+# input two independent runs over different documents with the same placeholder key
+def test_keyed_runs_merge_cleanly(corpus, tmp_path):
+    from components.mapping_merge import load_mapping, merge_mappings
+    key_file = tmp_path / "case.key"
+    key_file.write_text("case-secret\n", encoding="utf-8")
+    for run, document in (("first", "a.txt"), ("second", "reports/b.txt")):
+        assert batch_anonymize.main([str(corpus / document), "--output-dir", str(tmp_path / run), "--regex-only",
+                                     "--placeholder-key-file", str(key_file)]) == 0
+    results = [tmp_path / "first" / "a.txt.json", tmp_path / "second" / "b.txt.json"]
+    merged, conflicts = merge_mappings((str(path), load_mapping(path)) for path in results)
+    assert conflicts == []
+    assert list(merged.values()).count("john@acme.com") == 1
+    with pytest.raises(SystemExit):
+        batch_anonymize.main([str(corpus), "--output-dir", str(tmp_path / "x"), "--regex-only",
+                              "--placeholder-key-file", str(key_file), "--pseudonym-store", str(tmp_path / "s.sqlite")])
+# output john@acme.com has one placeholder in both runs
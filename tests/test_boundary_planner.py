@@ -0,0 +1,59 @@
+"""Tests for the protected-span index used to plan chunk boundaries."""
+
+import pytest
+from components.boundary_planner import BoundaryPlanner
+
+@pytest.fixture
+def text():
+    return "Mail jane.doe@example.com or call (212) 555-1234. See https://example.com/a.b?x=1 now! End"
+
+def test_protected_spans(text):
+    planner = BoundaryPlanner(text)
+    spans = [text[start:end] for start, end in zip(planner.span_starts, planner.span_ends)]
+    assert 'jane.doe@example.com' in spans
+    assert any('555-1234' in span for span in spans)
+    assert 'https://example.com/a.b?x=1' in spans
+
+# input cut positions inside and outside protected spans
+def test_is_safe_cut(text):
+    planner = BoundaryPlanner(text)
+    email = text.index('jane')
+    assert planner.is_safe_cut(email)  # right before the span
+    assert not planner.is_safe_cut(email + 4)
+    assert planner.is_safe_cut(email + len('jane.doe@example.com'))  # right after the span
+    assert planner.protected_span_at(email + 4) == (email, email + len('jane.doe@example.com'))
+# output only cuts that split a span are unsafe
+
+def test_last_safe_break_skips_spans(text):
+    planner = BoundaryPlanner(text)
+    url_start = text.index('https')
+    # the '.' and '?' inside the URL are break characters, but cutting there would split it
+    cut = planner.last_safe_break(0, text.index(' now'), {' ', '.', '?'})
+    assert cut == url_start
+
+def test_sentence_ends(text):
+    planner = BoundaryPlanner(text)
+    assert list(planner.sentence_ends) == [text.index('. See') + 1, text.index('! End') + 1]
+    assert planner.last_sentence_end(0, len(text)) == text.index('! End') + 1
+    assert planner.last_sentence_end(0, 10) is None
+
+def test_empty_text():
+    planner = BoundaryPlanner("")
+    assert planner.is_safe_cut(0)
+    assert planner.last_safe_break(0, 0, {' '}) is None
+
+# input a lazy planner asked about a few windows, one of them inside a long URL
+def test_lazy_windows_match_whole_text(text):
+    long_text = ("word " * 200 + text + " https://example.com/" + "x" * 300 + " 1 (212) 555-1234 ") * 3
+    eager = BoundaryPlanner(long_text)
+    lazy = BoundaryPlanner(long_text, lazy=True)
+    assert len(lazy.span_starts) == 0
+    windows = [(0, 50), (1000, 1100), (1300, 1350), (1500, 1600), (2700, 2800), (1000, 1100)]
+    for lo, hi in windows:
+        lazy.index_window(lo, hi)
+    assert len(lazy.span_starts) < len(eager.span_starts)
+    for lo, hi in windows:
+        for cut in range(lo, hi + 1):
+            assert lazy.protected_span_at(cut) == eager.protected_span_at(cut)
+    assert list(lazy.sentence_ends) == list(eager.sentence_ends)  # sentence ends index the rest of the text
+# output the same spans at every cut of the indexed windows, nothing scanned elsewhere
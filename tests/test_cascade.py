@@ -0,0 +1,96 @@
+"""Tests for the two-tier NER cascade."""
+
+import pytest
+from components.cascade import CascadeFilter, HeuristicChunkScorer
+from components.entities import EntityMatch
+
+@pytest.fixture
+def scorer():
+    return HeuristicChunkScorer()
+
+class FakeModelScorer:
+    """Cheap tier stub that returns fixed entities per chunk text."""
+    provides_labels = True
+
+    def __init__(self, results):
+        self.results = results
+
+    def score(self, text, chunk_offset=0):
+        return [EntityMatch(t, label, s + chunk_offset, e + chunk_offset, c) for t, label, s, e, c in self.results.get(text, [])]
+
+# input text with capitalised names in the middle of a sentence
+def test_heuristic_finds_name_candidates(scorer):
+    candidates = scorer.score("yesterday we met John Smith at the office of IBM.", chunk_offset=100)
+    texts = {c.text: c for c in candidates}
+    assert 'John Smith' in texts
+    assert texts['John Smith'].start == 100 + 17
+    assert texts['John Smith'].confidence >= 0.8
+    assert texts['IBM'].confidence >= 0.5
+# output multi-word and acronym candidates with high heuristic confidence
+
+# input text without names, only sentence-initial capitals and common words
+def test_heuristic_low_confidence_for_plain_text(scorer):
+    candidates = scorer.score("The weather was fine. Nothing happened today. It rained.")
+    assert all(c.confidence < 0.5 for c in candidates)
+# output low scores only; the heuristic tier still escalates such a chunk, it skips only chunks without candidates
+
+# input chunks with and without names for the heuristic tier
+def test_cascade_escalates_only_uncertain_chunks(scorer):
+    cascade = CascadeFilter(scorer, lower_bound=0.5, upper_bound=0.95)
+    chunks = [
+        ("the weather was fine and nothing happened.", 0, 10),
+        ("later John Smith joined Acme Corp.", 43, 9),
+        ("no names in here at all.", 78, 7),
+    ]
+    escalated, accepted = cascade.select(chunks)
+    assert escalated == [1]
+    assert accepted == []
+    assert cascade.stats == {'chunks_total': 3, 'chunks_escalated': 1, 'chunks_accepted': 0, 'chunks_skipped': 2,
+                             'recall_guard_escalations': 0}
+# output only the chunk with candidates goes to the full model
+
+# input model tier results that are confident, uncertain, or below the lower bound
+def test_cascade_accepts_confident_model_tier():
+    scorer = FakeModelScorer({
+        "confident": [("Acme", "ORG", 0, 4, 0.99)],
+        "uncertain": [("Acme", "ORG", 0, 4, 0.99), ("Bob", "PER", 5, 8, 0.7)],
+        "noise": [("x", "MISC", 0, 1, 0.2)],
+    })
+    cascade = CascadeFilter(scorer, lower_bound=0.5, upper_bound=0.95)
+    escalated, accepted = cascade.select([("confident", 0, 1), ("uncertain", 10, 1), ("noise", 20, 1)])
+    assert escalated == [1]
+    assert [(e.text, e.start) for e in accepted] == [("Acme", 0)]
+    assert cascade.stats['chunks_accepted'] == 1
+    assert cascade.stats['chunks_skipped'] == 1
+    cascade.reset_stats()
+    assert cascade.stats['chunks_total'] == 0
+    loose = CascadeFilter(scorer, lower_bound=0.1, upper_bound=0.95)
+    assert loose.select([("noise", 20, 1)]) == ([0], [])
+# output confident chunks keep the cheap tier entities, uncertain ones escalate, noise below lower_bound is dropped
+
+# input chunks the model tier accepts or skips, some with a name-like run it didn't cover
+def test_cascade_recall_guard(scorer):
+    chunks = ["later John Smith joined Acme Corp.", "the weather was fine.", "the Smith report."]
+    model_tier = FakeModelScorer({chunks[0]: [("Acme Corp", "ORG", 24, 33, 0.99)],
+                                  chunks[2]: [("Smith", "PER", 4, 9, 0.97)]})
+    cascade = CascadeFilter(model_tier, lower_bound=0.5, upper_bound=0.95, recall_guard=scorer)
+    escalated, accepted = cascade.select([(chunk, 0, 5) for chunk in chunks])
+    assert escalated == [0]
+    assert [e.text for e in accepted] == ["Smith"]
+    assert cascade.stats['recall_guard_escalations'] == 1
+    assert cascade.stats['chunks_skipped'] == 1
+# output a name the model tier missed sends its chunk to the full model
+
+# input chunks whose only name starts the sentence, and one without any capitalised word
+def test_cascade_escalates_sentence_initial_names(scorer):
+    cascade = CascadeFilter(scorer, lower_bound=0.5, upper_bound=0.95)
+    escalated, _ = cascade.select([("Smith called yesterday about the invoice.", 0, 8),
+                                   ("Berlin is cold in winter.", 42, 6),
+                                   ("nothing capitalised here.", 68, 5)])
+    assert escalated == [0, 1]
+    assert cascade.stats['chunks_skipped'] == 1
+# output a low score never lets a chunk with a possible name skip the full model
+
+def test_cascade_invalid_bounds(scorer):
+    with pytest.raises(ValueError):
+        CascadeFilter(scorer, lower_bound=0.9, upper_bound=0.5)
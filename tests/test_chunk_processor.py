@@ -63,5 +63,55 @@ class TestChunkProcessor:
         # Should return one chunk for small text
         assert result == [(text, 0)]
 
-
-
+    # input text for tokenized chunks with token counts
+    def test_tokenized_chunks_token_counts(self, processor):
+        text = "This is a test sentence for chunking."
+        result = processor.create_tokenized_chunks(text, tokenizer, max_tokens=3, overlap_tokens=1, return_token_counts=True)
+        assert len(result) > 0
+        for chunk, offset, token_count in result:
+            assert chunk
+            assert 0 < token_count <= 3
+    # output chunks with their token counts
+
+    # input text where most break characters are inside URLs
+    def test_regex_safe_chunks_keep_protected_spans(self, processor):
+        text = " ".join(f"https://site{i}.example.com/a.b?q={i}" for i in range(300))
+        result = processor.create_regex_safe_chunks(text, chunk_size=500, overlap_size=50)
+        assert len(result) > 1
+        for chunk, offset in result[:-1]:
+            assert chunk.endswith(" ")  # cut between two URLs, never at a '.' or '?' inside one
+    # output chunks that never split a URL
+
+    # input sentences longer than the slack a window may give up
+    def test_tokenized_chunks_end_at_sentence(self, processor):
+        text = "John Smith works at Acme Corp in New York. Mary Johnson lives in London. " * 20
+        aligned = processor.create_tokenized_chunks(text, tokenizer, max_tokens=40, overlap_tokens=5, align_boundaries=True)
+        for chunk, offset in aligned[:-1]:
+            assert chunk.rstrip().endswith(".")
+        plain = processor.create_tokenized_chunks(text, tokenizer, max_tokens=40, overlap_tokens=5)
+        assert any(not chunk.rstrip().endswith(".") for chunk, _ in plain[:-1])  # fixed-size windows by default
+    # output chunks end at sentence ends
+
+    # input token counts for length bucketing
+    def test_create_length_buckets(self, processor):
+        buckets = processor.create_length_buckets([400, 12, 400, 250, 400], batch_size=2)
+        assert buckets == [[0, 2], [4, 3], [1]]
+        assert sorted(i for bucket in buckets for i in bucket) == [0, 1, 2, 3, 4]
+    # output batches of chunk indices, longest chunks first
+
+    # input text for token windows that keep input_ids and offsets
+    def test_token_windows_match_chunk_tokenization(self, processor):
+        text = "John Smith works at Acme Corp in New York.  Mary   Johnson lives in London.\n\n" * 20
+        chunks = processor.create_tokenized_chunks(text, tokenizer, max_tokens=50, overlap_tokens=5)
+        windows = processor.create_token_windows(text, tokenizer, max_tokens=50, overlap_tokens=5)
+        assert len(chunks) == len(windows)
+        assert [offset for *_, offset in processor.create_token_windows(text, tokenizer, max_tokens=50, overlap_tokens=5,
+                                                                         align_boundaries=True)] == \
+               [offset for _, offset in processor.create_tokenized_chunks(text, tokenizer, max_tokens=50, overlap_tokens=5,
+                                                                          align_boundaries=True)]
+        for (chunk, offset), (input_ids, offsets, window_offset) in zip(chunks, windows):
+            expected = tokenizer(chunk, add_special_tokens=False, return_offsets_mapping=True)
+            assert window_offset == offset
+            assert input_ids == expected['input_ids']
+            assert offsets == [(start + offset, end + offset) for start, end in expected['offset_mapping']]
+    # output windows have the same tokens the chunk text would get on its own
@@ -129,3 +129,17 @@ def test_multiple_collision_scenarios(entity_mapper):
         assert placeholder.startswith('[')
         assert placeholder.endswith(']')
         assert '_' in placeholder
+
+def test_collision_index_built_once(entity_mapper):
+    """Placeholder-shaped tokens are indexed by set_original_text, glued or nested ones included."""
+    entity_mapper.set_original_text("see[PER_1], [[ORG_2]] and [PER_3 ] or [LOC_1]x")
+    assert entity_mapper.text_placeholders == {'[PER_1]', '[ORG_2]', '[LOC_1]'}
+
+    assert entity_mapper.get_or_create_placeholder(EntityMatch('Alice', 'PER', 0, 5, 0.99)) == '[PER_2]'
+    assert entity_mapper.get_or_create_placeholder(EntityMatch('Bob', 'PER', 6, 9, 0.99)) == '[PER_3]'  # '[PER_3 ]' is not one
+    assert entity_mapper.get_or_create_placeholder(EntityMatch('Acme', 'ORG', 0, 4, 0.99)) == '[ORG_1]'
+    assert entity_mapper.get_or_create_placeholder(EntityMatch('Acme Two', 'ORG', 0, 8, 0.99)) == '[ORG_3]'
+    assert entity_mapper.get_or_create_placeholder(EntityMatch('Paris', 'LOC', 0, 5, 0.99)) == '[LOC_2]'
+
+    entity_mapper.set_original_text("no placeholders here")
+    assert entity_mapper.text_placeholders == set()
@@ -62,4 +62,42 @@ def test_deanonymize_missing_placeholder(processor):
     result = processor.deanonymize_text(anonymized, entity_mapping=entity_mapping)
     assert result == expected
 
-   
\ No newline at end of file
+   
+def test_deanonymize_longest_placeholder_first(processor):
+    # [PER_1] is part of [PER_1_X], the longer placeholder has to win
+    anonymized = "[PER_1_X] met [PER_1]."
+    entity_mapping = {
+        '[PER_1]': 'John',
+        '[PER_1_X]': 'Mary',
+        '[PER': 'broken'  # not a well-formed placeholder, ignored
+    }
+    result = processor.deanonymize_text(anonymized, entity_mapping=entity_mapping)
+    assert result == "Mary met John."
+
+def test_deanonymize_value_with_backslash(processor):
+    anonymized = "Saved in [LOC_1]."
+    entity_mapping = {'[LOC_1]': 'C:\\Users\\new'}
+    result = processor.deanonymize_text(anonymized, entity_mapping=entity_mapping)
+    assert result == "Saved in C:\\Users\\new."
+
+def test_deanonymize_replacement_forms_placeholder(processor):
+    # after [PER_1] is replaced the text reads [ORG_1], which the longest-first passes replace too
+    anonymized = "[ORG[PER_1]]"
+    entity_mapping = {'[PER_1]': '_1', '[ORG_1]': 'Acme'}
+    result = processor.deanonymize_text(anonymized, entity_mapping=entity_mapping)
+    assert result == "Acme"
+
+# input anonymized text read from a file handle in small chunks
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 1024])
+def test_deanonymize_stream(processor, chunk_size):
+    import io
+    anonymized = "Contact [PER_1] at [ORG_1] in [LOC_1]. [PER_1] said [not a placeholder]."
+    entity_mapping = {
+        '[PER_1]': 'John Smith',
+        '[ORG_1]': 'Acme Corporation',
+        '[LOC_1]': 'New York'
+    }
+    output = io.StringIO()
+    processor.deanonymize_stream(io.StringIO(anonymized), output, entity_mapping, chunk_size=chunk_size)
+    assert output.getvalue() == processor.deanonymize_text(anonymized, entity_mapping)
+# output same text as deanonymizing it in memory
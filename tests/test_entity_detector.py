@@ -3,6 +3,7 @@
 
 
 import pytest
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch
 
 import sys
@@ -10,6 +11,8 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from components.entities import EntityMatch
 from components.entity_detector import EntityDetector
+from components.ner_cache import NERCache
+from components.gazetteer import Gazetteer
 from components import EntityMapper
 
 # Remove the old anonymize_text helper, use only the one inside the test
@@ -72,6 +75,169 @@ def test_deduplication_overlap(detector):
     assert deduped[0].text == 'John Doe'
 # output results of of deduplication of overlapping entities
 
-
-
-
+# input multi-chunk text for batched NER inference
+def test_batched_ner_matches_single_chunk(detector):
+    text = "John Smith works at Acme Corp in New York. Mary Johnson lives in London. " * 60
+    detector.batch_size = 1
+    single = detector._detect_entities_ner_chunked(text)
+    detector.batch_size = 4
+    batched = detector._detect_entities_ner_chunked(text)
+    assert [(e.start, e.end, e.label, e.text) for e in single] == [(e.start, e.end, e.label, e.text) for e in batched]
+# output batched entities should be identical to chunk-at-a-time entities
+
+# input multi-chunk text for the multi-process worker pool
+def test_worker_pool_matches_single_process(detector):
+    text = "John Smith works at Acme Corp in New York. Mary Johnson lives in London. " * 60
+    detector.num_workers = 1
+    single = detector._detect_entities_ner_chunked(text)
+    detector.num_workers = 2
+    pooled = detector._detect_entities_ner_chunked(text)
+    assert [(e.start, e.end, e.label, e.text) for e in single] == [(e.start, e.end, e.label, e.text) for e in pooled]
+# output entities from worker processes should be identical to single-process entities
+
+# input multi-chunk text for direct inference on ChunkProcessor's token windows
+def test_direct_inference_matches_pipeline(detector):
+    text = "John Smith works at Acme Corp in New York. Mary Johnson lives in London. " * 60
+    detector.direct_inference = False
+    pipeline_entities = detector._detect_entities_ner_chunked(text)
+    detector.direct_inference = True
+    direct_entities = detector._detect_entities_ner_chunked(text)
+    assert [(e.start, e.end, e.label, e.text) for e in pipeline_entities] == [(e.start, e.end, e.label, e.text) for e in direct_entities]
+# output direct inference should give the same entities as the pipeline
+
+# input same text through the torch and the ONNX Runtime backend
+def test_onnx_backend_matches_torch(detector, tmp_path):
+    pytest.importorskip("onnxruntime")
+    onnx_detector = EntityDetector(backend="onnx", model_cache_dir=str(tmp_path))
+    text = "John Smith works at Acme Corp in New York. Contact john.doe@example.com or 555-123-4567. " * 20
+    torch_entities = detector.detect_entities_full_text(text)
+    onnx_entities = onnx_detector.detect_entities_full_text(text)
+    assert [(e.start, e.end, e.label, e.text) for e in torch_entities] == [(e.start, e.end, e.label, e.text) for e in onnx_entities]
+    for torch_entity, onnx_entity in zip(torch_entities, onnx_entities):
+        assert onnx_entity.confidence == pytest.approx(torch_entity.confidence, abs=1e-3)
+    # exported graph is cached for the next detector
+    assert list(tmp_path.glob("**/model.onnx"))
+# output both backends should find the same entities
+
+# input text with a repeated section, run twice through a cached detector (pipeline and direct inference)
+@pytest.mark.parametrize("direct_inference", [False, True])
+def test_ner_cache_matches_uncached(detector, tmp_path, direct_inference):
+    text = "John Smith works at Acme Corp in New York. Mary Johnson lives in London. " * 60
+    detector.direct_inference = direct_inference
+    uncached = detector._detect_entities_ner_chunked(text)
+    detector.ner_cache = NERCache(tmp_path / "ner_cache.sqlite")
+    first = detector._detect_entities_ner_chunked(text)
+    second = detector._detect_entities_ner_chunked(text)
+    assert detector.ner_cache.misses == 0 and detector.ner_cache.hits > 0  # second run never touched the model
+    for cached in (first, second):
+        assert [(e.start, e.end, e.label, e.text) for e in cached] == [(e.start, e.end, e.label, e.text) for e in uncached]
+# output cached entities are identical to a run without the cache
+
+# input the same sentences repeated many times
+def test_sentence_dedup_projects_onto_copies(detector):
+    sentence = "John Smith works at Acme Corp in New York."
+    text = (sentence + " ") * 40
+    detector.sentence_dedup = True
+    entities = detector._detect_entities_ner_chunked(text)
+    once = detector._detect_entities_ner_text(sentence)
+    assert detector.sentence_deduplicator.stats['unique_sentences'] == 1
+    assert len(entities) == 40 * len(once)
+    assert all(text[e.start:e.end] == e.text for e in entities)
+# output every copy gets the entities of the single inferred sentence
+
+# input a name the model only found once
+def test_propagation_finds_missed_occurrences(detector):
+    text = "Robert Davis called. Later Robert Davis left, and Robert Davisson stayed. robert davis too."
+    detector.propagate_entities = True
+    with patch.object(detector, '_detect_entities_ner_chunked',
+                      return_value=[EntityMatch("Robert Davis", "PER", 0, 12, 0.95)]):
+        entities = detector.detect_entities_full_text(text)
+    assert [(e.text, e.start, e.label, e.confidence) for e in entities] == [
+        ("Robert Davis", 0, "PER", 0.95), ("Robert Davis", 27, "PER", 0.95)]
+    assert detector.propagation_stats == {'surface_forms': 1, 'occurrences': 2, 'added': 1}
+# output the second whole-word occurrence is added with the same label and confidence
+
+# input a missed occurrence the model only found in two weaker pieces
+def test_propagation_counts_hits_that_replace_entities(detector):
+    text = "Robert Davis called. Later Robert Davis left."
+    detector.propagate_entities = True
+    detector.propagation_min_length = 8  # only the full name is propagated
+    with patch.object(detector, '_detect_entities_ner_chunked', return_value=[
+            EntityMatch("Robert Davis", "PER", 0, 12, 0.95),
+            EntityMatch("Robert", "PER", 27, 33, 0.4), EntityMatch("Davis", "PER", 34, 39, 0.5)]):
+        entities = detector.detect_entities_full_text(text)
+    assert [(e.text, e.start) for e in entities] == [("Robert Davis", 0), ("Robert Davis", 27)]
+    assert detector.propagation_stats == {'surface_forms': 1, 'occurrences': 2, 'added': 1}
+# output one propagated hit replaced two entities and counts as one added, never a negative count
+
+# input a client name from a gazetteer file that the model doesn't need to find
+def test_gazetteer_hits_in_full_text(detector, tmp_path):
+    clients = tmp_path / "clients.txt"
+    clients.write_text("Globex Holdings\n", encoding="utf-8")
+    detector.gazetteer = Gazetteer({"ORG": clients}, cache_dir=tmp_path)
+    text = "Our contract with globex holdings was renewed. Contact john.doe@example.com."
+    entities = detector.detect_entities_full_text(text)
+    assert ("globex holdings", "ORG", 18, 1.0) in [(e.text, e.label, e.start, e.confidence) for e in entities]
+    assert any(e.label == "EMAIL" for e in entities)
+# output gazetteer entity kept through deduplication next to the regex entities
+
+# input a long text chunked with and without boundary alignment
+def test_chunk_alignment_is_opt_in(detector):
+    text = "John Smith works at Acme Corp in New York. Mary Johnson lives in London. " * 80
+    assert detector.align_chunk_boundaries is False
+    plain = detector._create_ner_chunks(text)
+    assert plain == detector.chunk_processor.create_tokenized_chunks(text, detector.tokenizer, max_tokens=400,
+                                                                     overlap_tokens=detector.overlap_tokens,
+                                                                     return_token_counts=True)
+    detector.align_chunk_boundaries = True
+    aligned = detector._create_ner_chunks(text)
+    assert all(chunk_text.rstrip().endswith(".") for chunk_text, _, _ in aligned[:-1])
+# output fixed-size chunks unless the detector asks for aligned ones
+
+# input long documents detected from several threads sharing one detector
+def test_concurrent_detection_matches_sequential(detector):
+    detector.tokenizer.model_max_length = 512  # the pipeline truncates its inputs, as with the released model
+    detector.batch_size = 4
+    documents = [" ".join(f"John Smith visited Berlin on day {i} of trip {n}." for i in range(300)) for n in range(3)]
+    expected = [detector.detect_entities_full_text(document) for document in documents]
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        results = list(pool.map(detector.detect_entities_full_text, documents * 4))
+    assert results == expected * 4
+# output the same entities as one call at a time: chunking never sees another call's truncation
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        EntityDetector(backend="tpu")
+
+def test_unknown_overlap_policy():
+    with pytest.raises(ValueError):
+        EntityDetector(overlap_policy="shortest")
+
+# input same text through the fp32 and the dynamically quantized int8 model
+def test_int8_backend_agrees_with_fp32(detector, tmp_path):
+    int8_detector = EntityDetector(backend="int8", model_cache_dir=str(tmp_path))
+    text = "John Smith works at Acme Corp in New York. Mary Johnson lives in London. " * 10
+    fp32_entities = {(e.start, e.end, e.label) for e in detector._detect_entities_ner_chunked(text)}
+    int8_entities = {(e.start, e.end, e.label) for e in int8_detector._detect_entities_ner_chunked(text)}
+    assert len(fp32_entities & int8_entities) >= 0.8 * len(fp32_entities)
+    # quantized weights are cached and reload without quantizing again
+    assert list(tmp_path.glob("**/model-int8.pt"))
+    reloaded = EntityDetector(backend="int8", model_cache_dir=str(tmp_path))
+    assert {(e.start, e.end, e.label) for e in reloaded._detect_entities_ner_chunked(text)} == int8_entities
+# output int8 entities should mostly match fp32 entities
+
+# input concurrent short requests through the micro-batching async API
+def test_async_micro_batches_match_sync(detector):
+    import asyncio
+    from components.async_api import AsyncEntityDetector
+    texts = ["John Smith called from London.", "Mary Johnson works at Acme Corp.", "Email bob@acme.com today."]
+    expected = [[(e.start, e.end, e.label) for e in detector.detect_entities_full_text(text)] for text in texts]
+
+    async def run():
+        async with AsyncEntityDetector(detector, max_batch_size=4, max_wait=0.05) as api:
+            return await asyncio.gather(*(api.detect_entities_full_text(text) for text in texts)), api.stats()
+
+    results, stats = asyncio.run(run())
+    assert [[(e.start, e.end, e.label) for e in entities] for entities in results] == expected
+    assert stats['batches'] < len(texts)
+# output same entities per request, fewer forward passes than requests
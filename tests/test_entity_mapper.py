@@ -46,3 +46,58 @@ def test_get_mapping_thread_safety(entity_mapper):
     mapping1 = entity_mapper.get_mapping()
     mapping2 = entity_mapper.get_mapping()
     assert mapping1 == mapping2
+
+def test_get_or_create_placeholders_document_order(entity_mapper):
+    # new placeholders follow the entity positions, results follow the input order
+    entities = [EntityMatch('Acme', 'ORG', 30, 34, 0.9), EntityMatch('Mary', 'PER', 20, 24, 0.9),
+                EntityMatch('JOHN', 'PER', 12, 16, 0.9), EntityMatch('John', 'PER', 0, 4, 0.9)]
+    assert entity_mapper.get_or_create_placeholders(entities) == ['[ORG_1]', '[PER_2]', '[PER_1]', '[PER_1]']
+    assert entity_mapper.get_or_create_placeholder(EntityMatch('mary', 'PER', 50, 54, 0.9)) == '[PER_2]'
+    assert entity_mapper.get_or_create_placeholders([]) == []
+
+def test_get_or_create_placeholders_deterministic_across_threads():
+    # every thread maps its own documents; the numbering doesn't depend on how many threads run
+    from concurrent.futures import ThreadPoolExecutor
+    documents = [[EntityMatch(f'Name {(d * 7 + i) % 13}', 'PER', i * 10, i * 10 + 6, 0.9) for i in range(40)][::-1]
+                 for d in range(16)]
+
+    def map_document(entities):
+        return EntityMapper().get_or_create_placeholders(entities)
+
+    expected = [map_document(entities) for entities in documents]
+    for workers in (2, 8):
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            assert list(executor.map(map_document, documents)) == expected
+
+def test_shared_mapper_concurrent_batches():
+    # batches from many threads on one mapper: one placeholder per entity, no placeholder handed out twice
+    from concurrent.futures import ThreadPoolExecutor
+    mapper = EntityMapper()
+    batches = [[EntityMatch(f'Name {(b + i) % 50}', 'PER', i, i + 1, 0.9) for i in range(50)] for b in range(20)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(mapper.get_or_create_placeholders, batches))
+    by_name = {}
+    for batch, placeholders in zip(batches, results):
+        for entity, placeholder in zip(batch, placeholders):
+            assert by_name.setdefault(entity.text, placeholder) == placeholder
+    assert len(set(by_name.values())) == 50 == len(mapper.get_mapping())
+
+def test_keyed_placeholders_agree_across_mappers():
+    # mappers with the same key derive the same placeholder from label and normalized text, in any order
+    first, second = EntityMapper(key="case-secret"), EntityMapper(key=b"case-secret")
+    acme, john = EntityMatch('Acme Corp', 'ORG', 0, 9, 0.9), EntityMatch('John Smith', 'PER', 20, 30, 0.9)
+    placeholders = first.get_or_create_placeholders([acme, john])
+    assert second.get_or_create_placeholders([EntityMatch('JOHN SMITH', 'PER', 5, 15, 0.9), acme]) == placeholders[::-1]
+    assert placeholders[0].startswith('[ORG_') and len(placeholders[0]) == len('[ORG_]') + 10
+    assert EntityMapper(key="other-secret").get_or_create_placeholder(acme) != placeholders[0]
+
+def test_keyed_placeholder_collision_fallback():
+    # a short digest that is taken (here by a literal token in the text) falls back to a longer one
+    probe = EntityMapper(key="k", digest_chars=4).get_or_create_placeholder(EntityMatch('Bob', 'PER', 0, 3, 0.9))
+    mapper = EntityMapper(key="k", digest_chars=4)
+    mapper.set_original_text(f"{probe} is a literal token, Bob is a name")
+    placeholder = mapper.get_or_create_placeholder(EntityMatch('Bob', 'PER', 0, 3, 0.9))
+    assert placeholder != probe and placeholder.startswith(probe[:-1]) and len(placeholder) == len(probe) + 4
+    assert mapper.keyed_collisions == 1
+    with pytest.raises(ValueError):
+        EntityMapper(store=object(), key="k")
@@ -0,0 +1,115 @@
+"""Tests for the columnar EntityTable."""
+
+import pytest
+from unittest.mock import patch
+from components.anonymizer import Anonymizer
+from components.entities import EntityMatch
+from components.entity_detector import EntityDetector
+from components.entity_mapper import EntityMapper
+from components.entity_table import EntityTable
+from components.overlap_resolver import OverlapResolver
+from components.statistics_generator import StatisticsGenerator
+
+TEXT = "John Smith met JOHN SMITH at Acme Corp; mail john@acme.com. [PER_1] is taken."
+
+@pytest.fixture
+def entities():
+    return [
+        EntityMatch("Acme Corp", "ORG", 29, 38, 0.9),
+        EntityMatch("John Smith", "PER", 0, 10, 0.95),
+        EntityMatch("JOHN SMITH", "PER", 15, 25, 0.8),
+        EntityMatch("john@acme.com", "EMAIL", 45, 58, 1.0),
+        EntityMatch("Smith", "PER", 5, 10, 0.7),  # overlaps John Smith
+        EntityMatch("J. Smith", "PER", 15, 25, 0.6),  # text that isn't its source span
+    ]
+
+@pytest.fixture
+def table(entities):
+    return EntityTable.from_entities(entities, TEXT)
+
+# input entities found in TEXT
+def test_rows_read_back(table, entities):
+    assert len(table) == 6
+    assert table.texts == {5: "J. Smith"}  # every other text is sliced from the source
+    assert table.to_entities() == entities
+    assert [(e.start, e.end, e.confidence) for e in table] == [(e.start, e.end, e.confidence) for e in entities]
+    key_ids, keys = table.normalized_keys()
+    assert key_ids.tolist() == [0, 1, 1, 2, 3, 4] and keys[1] == ("john smith", "PER")
+# output the same entities, equal spellings share one interned key
+
+# input the same entities as a list and as a table
+def test_anonymizer_and_statistics_accept_table(table, entities):
+    valid = [e for e in entities if e.label != "PER" or e.text != "Smith" and e.text != "J. Smith"]
+    from_list = Anonymizer(TEXT, valid, EntityMapper())
+    from_list.anonymize()
+    from_table = Anonymizer(TEXT, EntityTable.from_entities(valid, TEXT), EntityMapper())
+    from_table.anonymize()
+    assert from_table.result_text == from_list.result_text
+    assert from_table.mapper.get_mapping() == from_list.mapper.get_mapping()
+    assert "[PER_2]" in from_table.result_text  # [PER_1] occurs literally in the text
+    assert StatisticsGenerator.generate_statistics(table, {}) == StatisticsGenerator.generate_statistics(entities, {})
+# output identical anonymized text, mapping and statistics
+
+# input overlapping and duplicated table rows
+def test_resolve_table(table, entities):
+    for policy in ("confidence", "prefer_regex", "longest"):
+        from_list = OverlapResolver(policy)
+        expected = from_list.resolve(entities + entities[:2])
+        from_table = OverlapResolver(policy)
+        with patch.object(EntityTable, '__getitem__', side_effect=AssertionError("row materialized")):
+            resolved = from_table.resolve_table(EntityTable.from_entities(entities + entities[:2], TEXT))
+        assert isinstance(resolved, EntityTable)
+        assert resolved.to_entities() == expected
+        assert [e.confidence for e in resolved] == [e.confidence for e in expected]
+        assert (from_table.exact_duplicate_count, from_table.overlap_removed_count) == (
+            from_list.exact_duplicate_count, from_list.overlap_removed_count)
+    assert OverlapResolver().resolve_table(table).starts.tolist() == [0, 15, 29, 45]
+# output the rows resolve() keeps, as a table, without building an EntityMatch per row
+
+# input a table saved with and without its source text
+def test_save_and_load(table, tmp_path):
+    path = tmp_path / "doc.entities"
+    table.save(path)
+    loaded = EntityTable.load(path)
+    assert loaded.source == TEXT and loaded.labels == table.labels
+    assert loaded.to_entities() == table.to_entities()
+    assert loaded.confidences.tolist() == table.confidences.tolist()
+
+    table.save(path, include_source=False)
+    assert EntityTable.load(path).source is None
+    assert EntityTable.load(path, source=TEXT).to_entities() == table.to_entities()
+    empty = tmp_path / "empty.entities"
+    EntityTable.from_entities([], "").save(empty)
+    assert len(EntityTable.load(empty)) == 0
+# output the same rows back; without the source, texts come from the one passed in
+
+def test_detector_table():
+    detector = EntityDetector(use_ner=False)
+    table = detector.detect_entity_table(TEXT)
+    assert table.source == TEXT and table.texts == {}
+    assert table.to_entities() == detector.detect_entities_full_text(TEXT)
+    assert len(detector.detect_entity_table("  ")) == 0
+
+# input tables with different label lists and stored texts
+def test_concat(table, entities):
+    other = EntityTable.from_entities([EntityMatch("Acme", "ORG", 29, 33, 0.5), EntityMatch("x", "LOC", 0, 1, 0.4)], TEXT)
+    combined = EntityTable.concat([table, EntityTable.from_entities([], TEXT), other], TEXT)
+    assert combined.to_entities() == entities + other.to_entities()
+    assert combined.labels == ["ORG", "PER", "EMAIL", "LOC"]
+    assert len(EntityTable.concat([], TEXT)) == 0
+# output the rows in order, texts that aren't their span kept at their new row
+
+# input a name the (mocked) model found only once
+def test_detector_table_propagation():
+    text = "John Smith met John Smith at Acme Corp."
+    detector = EntityDetector(use_ner=False, propagate_entities=True)
+    ner = [EntityMatch("John Smith", "PER", 0, 10, 0.9)]
+    with patch.object(detector, "_detect_entities_ner_chunked", side_effect=lambda _: list(ner)):
+        entities = detector.detect_entities_full_text(text)
+        list_stats = detector.propagation_stats
+        with patch.object(EntityTable, "__getitem__", side_effect=AssertionError("row read back as EntityMatch")):
+            table = detector.detect_entity_table(text)
+    assert table.to_entities() == entities
+    assert [(e.start, e.end) for e in entities] == [(0, 10), (15, 25)]
+    assert detector.propagation_stats == list_stats == {'surface_forms': 1, 'occurrences': 2, 'added': 1}
+# output the second occurrence is added on the table's columns, as on the list
@@ -0,0 +1,54 @@
+"""Tests for gazetteer (deny-list) detection."""
+
+import pytest
+from unittest.mock import patch
+from components.gazetteer import Gazetteer, read_terms
+
+@pytest.fixture
+def term_files(tmp_path):
+    employees = tmp_path / "employees.txt"
+    employees.write_text("# employees\nRobert Davis\nAnna Lee\n\nRobert\n", encoding="utf-8")
+    clients = tmp_path / "clients.txt"
+    clients.write_text("Acme Corp\nGlobex\nanna lee\n", encoding="utf-8")
+    return {"PER": employees, "ORG": clients}
+
+@pytest.fixture
+def gazetteer(term_files, tmp_path):
+    return Gazetteer(term_files, cache_dir=tmp_path / "cache")
+
+def test_read_terms(term_files):
+    assert read_terms(term_files["PER"]) == ["Robert Davis", "Anna Lee", "Robert"]
+
+# input text with terms in different case, inside longer words and nested in longer terms
+def test_scan_case_insensitive_whole_words(gazetteer):
+    text = "ROBERT DAVIS met Robert at ACME Corp; Globexia and anna lee were not there."
+    assert [(e.text, e.label, e.start, e.confidence) for e in gazetteer.scan(text, chunk_offset=10)] == [
+        ("ROBERT DAVIS", "PER", 10, 1.0), ("Robert", "PER", 27, 1.0), ("ACME Corp", "ORG", 37, 1.0),
+        ("anna lee", "PER", 61, 1.0)]
+# output leftmost-longest whole-word hits; a term listed twice keeps its first label
+
+# input matching options switched off
+def test_exact_case_and_substrings(term_files, tmp_path):
+    gazetteer = Gazetteer(term_files, case_insensitive=False, whole_words=False, cache_dir=tmp_path)
+    text = "ROBERT DAVIS works at Globexia with Robert Davis."
+    assert [e.text for e in gazetteer.scan(text)] == ["Globex", "Robert Davis"]
+# output only exact-case hits, also inside longer words
+
+# input same files twice, then a changed file
+def test_automaton_cached_by_content(term_files, tmp_path):
+    cache_dir = tmp_path / "cache"
+    first = Gazetteer(term_files, cache_dir=cache_dir)
+    assert first.cache_path.exists()
+    with patch("components.gazetteer.AhoCorasick", side_effect=AssertionError("compiled again")):
+        second = Gazetteer(term_files, cache_dir=cache_dir)
+    assert [e.text for e in second.scan("Globex")] == ["Globex"]
+
+    term_files["ORG"].write_text("Initech\n", encoding="utf-8")
+    changed = Gazetteer(term_files, cache_dir=cache_dir)
+    assert changed.cache_path != first.cache_path
+    assert [e.text for e in changed.scan("Globex and Initech")] == ["Initech"]
+# output unchanged files load the saved automaton, changed files compile a new one
+
+def test_unsupported_label(term_files, tmp_path):
+    with pytest.raises(ValueError):
+        Gazetteer({"CODENAME": term_files["ORG"]}, cache_dir=tmp_path)
@@ -29,4 +29,14 @@ def test_file_text(tmp_path, monkeypatch, handler):
     monkeypatch.setattr('builtins.input', lambda _: next(inputs))
     handler.default_file_path = None  # Ensure prompt for file path
     text = handler.text_handler()
-    assert text == "File input test."
\ No newline at end of file
+    assert text == "File input test."
+
+def test_compressed_file_text(tmp_path, monkeypatch, handler):
+    import gzip
+    file = tmp_path / "test.txt.gz"
+    with gzip.open(file, 'wt', encoding='utf-8') as f:
+        f.write("Compressed input test.")
+    inputs = iter(["3", str(file)])
+    monkeypatch.setattr('builtins.input', lambda _: next(inputs))
+    text = handler.text_handler()
+    assert text == "Compressed input test."
@@ -0,0 +1,50 @@
+"""Tests that the non-model paths never import the NER stack."""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).parent.parent
+HEAVY_MODULES = ("torch", "transformers")
+IMPORT_BUDGET_SECONDS = 1.0  # deanonymize-only startup; torch alone takes several seconds
+
+def run_fresh(code):
+    """Run code in a new interpreter and return what it prints as JSON."""
+    result = subprocess.run([sys.executable, "-c", code], cwd=project_root, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+# input a deanonymize-only job in a fresh interpreter
+def test_deanonymize_only_startup():
+    loaded = run_fresh(
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        "from components import TextDeanonymizer, EntityMapper, StatisticsGenerator\n"
+        "text = TextDeanonymizer.deanonymize_text('[PER_1] called', {'[PER_1]': 'John'})\n"
+        "print(json.dumps({'seconds': time.perf_counter() - start, 'text': text,\n"
+        f"                  'heavy': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))\n")
+    assert loaded['text'] == "John called"
+    assert loaded['heavy'] == []
+    assert loaded['seconds'] < IMPORT_BUDGET_SECONDS
+# output no torch or transformers, startup well under the budget
+
+# input regex-only detector in a fresh interpreter
+def test_regex_only_profile():
+    loaded = run_fresh(
+        "import json, sys\n"
+        "from components import EntityDetector\n"
+        "detector = EntityDetector(use_ner=False)\n"
+        "entities = detector.detect_entities_full_text('Mail john.doe@example.com or call 555-123-4567.')\n"
+        "print(json.dumps({'entities': [[e.text, e.label] for e in entities],\n"
+        f"                  'heavy': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))\n")
+    assert loaded['entities'] == [["john.doe@example.com", "EMAIL"], ["555-123-4567", "PHONE"]]
+    assert loaded['heavy'] == []
+# output regex entities without loading the model stack
+
+def test_unknown_name():
+    import components
+    with pytest.raises(AttributeError):
+        components.NotAComponent
+    assert "TextDeanonymizer" in dir(components)
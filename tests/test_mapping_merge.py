@@ -0,0 +1,58 @@
+"""Tests for merging the mappings of independent runs."""
+
+import json
+from components.anonymizer import Anonymizer
+from components.deanonymizer import TextDeanonymizer
+from components.entities import EntityMatch
+from components.entity_mapper import EntityMapper
+from components.mapping_merge import load_mapping, main, merge_mappings
+
+DOCUMENTS = {
+    "a": ("Acme Corp hired John Smith.", [EntityMatch("Acme Corp", "ORG", 0, 9, 0.9), EntityMatch("John Smith", "PER", 16, 26, 0.9)]),
+    "b": ("Mary Jones sued ACME CORP.", [EntityMatch("Mary Jones", "PER", 0, 10, 0.9), EntityMatch("ACME CORP", "ORG", 16, 25, 0.9)]),
+    "c": ("John Smith met Mary Jones.", [EntityMatch("John Smith", "PER", 0, 10, 0.9), EntityMatch("Mary Jones", "PER", 15, 25, 0.9)]),
+}
+
+def run(name, key=None):
+    """Anonymize one document in its own mapper, as an independent process would."""
+    text, entities = DOCUMENTS[name]
+    anonymizer = Anonymizer(text, entities, EntityMapper(key=key))
+    anonymizer.anonymize()
+    return anonymizer.result_text, anonymizer.mapper.get_mapping()
+
+# input the documents anonymized by separate keyed mappers
+def test_keyed_runs_merge_without_conflicts():
+    results = {name: run(name, key="case-secret") for name in DOCUMENTS}
+    merged, conflicts = merge_mappings((name, mapping) for name, (_, mapping) in results.items())
+    assert conflicts == []
+    assert len(merged) == 3  # Acme Corp has one placeholder in both runs
+    for name, (anonymized, _) in results.items():
+        assert TextDeanonymizer.deanonymize_text(anonymized, merged).lower() == DOCUMENTS[name][0].lower()
+# output one merged mapping that deanonymizes every document
+
+# input the same documents numbered per run
+def test_numbered_runs_report_conflicts():
+    merged, conflicts = merge_mappings((name, run(name)[1]) for name in DOCUMENTS)
+    by_type = {(c['type'], c.get('placeholder') or c['text']): c for c in conflicts}
+    assert set(by_type) == {('placeholder', '[PER_1]'), ('entity', 'mary jones')}
+    assert by_type[('placeholder', '[PER_1]')]['texts'] == {'john smith': ['a', 'c'], 'mary jones': ['b']}
+    assert by_type[('placeholder', '[PER_1]')]['kept'] == merged['[PER_1]'] == 'John Smith'
+    assert by_type[('entity', 'mary jones')]['placeholders'] == {'[PER_1]': ['b'], '[PER_2]': ['c']}
+# output [PER_1] means two people and Mary Jones has two placeholders; "ACME CORP" vs "Acme Corp" is no conflict
+
+# input mapping files in every supported format
+def test_load_and_merge_files(tmp_path, capsys):
+    (tmp_path / "plain.json").write_text(json.dumps({"[PER_1]": "John"}), encoding="utf-8")
+    (tmp_path / "batch.json").write_text(json.dumps({"anonymized_text": "[PER_1]", "mapping": {"[PER_1]": "Mary"}}), encoding="utf-8")
+    (tmp_path / "entity_mappings.txt").write_text("ENTITY MAPPINGS\n" + "=" * 50 + "\n\n[ORG_1] → 'Acme'\n", encoding="utf-8")
+    assert load_mapping(tmp_path / "batch.json") == {"[PER_1]": "Mary"}
+    assert load_mapping(tmp_path / "entity_mappings.txt") == {"[ORG_1]": "Acme"}
+
+    output, report = tmp_path / "merged.json", tmp_path / "conflicts.json"
+    assert main([str(tmp_path / "plain.json"), str(tmp_path / "entity_mappings.txt"), "--output", str(output)]) == 0
+    assert json.loads(output.read_text(encoding="utf-8")) == {"[PER_1]": "John", "[ORG_1]": "Acme"}
+    assert main([str(tmp_path / "plain.json"), str(tmp_path / "batch.json"), "--output", str(output),
+                 "--report", str(report)]) == 1
+    assert [c['placeholder'] for c in json.loads(report.read_text(encoding="utf-8"))] == ["[PER_1]"]
+    assert "[PER_1] stands for 2 entities" in capsys.readouterr().out
+# output merged JSON, conflicts in the report and a failing exit code
@@ -0,0 +1,116 @@
+"""Tests for the resident model server and its client."""
+
+import re
+import json
+import threading
+import http.client
+import pytest
+from components.entities import EntityMatch
+from components.model_server import ModelClient, ModelServer, ServerBusy
+
+class FakeDetector:
+    """Capitalised word pairs as PER; can be held inside a job to fill the job slots."""
+    model_name = "fake-ner"
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.release.set()
+        self.entered = threading.Event()
+
+    def detect_entities_full_text(self, text):
+        self.entered.set()
+        self.release.wait(5)
+        if text == "fail":
+            raise RuntimeError("model crashed")
+        return [EntityMatch(m.group(), 'PER', m.start(), m.end(), 0.95)
+                for m in re.finditer(r'[A-Z][a-z]+ [A-Z][a-z]+', text)]
+
+@pytest.fixture
+def detector():
+    return FakeDetector()
+
+@pytest.fixture
+def server(detector):
+    model_server = ModelServer(detector, port=0, max_concurrent=1, queue_timeout=0.2)
+    model_server.start()
+    yield model_server
+    detector.release.set()
+    model_server.shutdown()
+
+@pytest.fixture
+def client(server):
+    return ModelClient(server.url, timeout=10)
+
+def test_health(client):
+    assert client.is_available()
+    assert client.health() == {'status': 'ok', 'model': 'fake-ner'}
+    assert not ModelClient("http://127.0.0.1:9", timeout=1).is_available()
+
+# input text sent to the detection endpoint
+def test_detect_entities_full_text(client):
+    entities = client.detect_entities_full_text("yesterday John Smith met Mary Jones.")
+    assert [(e.text, e.label, e.start, e.end, e.confidence) for e in entities] == [
+        ("John Smith", "PER", 10, 20, 0.95), ("Mary Jones", "PER", 25, 35, 0.95)]
+# output same EntityMatch objects as the detector returns
+
+# input two jobs with the same name
+def test_anonymize_uses_fresh_mapper(client):
+    first = client.anonymize("John Smith called.")
+    second = client.anonymize("Mary Jones and John Smith.")
+    assert first['anonymized_text'] == "[PER_1] called."
+    assert first['mapping'] == {"[PER_1]": "John Smith"}
+    assert set(second['mapping']) == {"[PER_1]", "[PER_2]"}
+    assert [e.text for e in second['entities']] == ["Mary Jones", "John Smith"]
+# output placeholders are numbered per job
+
+# input a second job while the only job slot is taken
+def test_busy_server_rejects_after_queue_timeout(client, detector):
+    detector.release.clear()
+    detector.entered.clear()
+    worker = threading.Thread(target=client.detect_entities_full_text, args=("John Smith",))
+    worker.start()
+    assert detector.entered.wait(5)
+    with pytest.raises(ServerBusy):
+        client.detect_entities_full_text("Mary Jones")
+    detector.release.set()
+    worker.join(5)
+    assert client.metrics()['rejected'] == 1
+# output 503 as ServerBusy, the first job still completes
+
+# input successful, failing and malformed requests
+def test_metrics_and_errors(client, server):
+    client.detect_entities_full_text("John Smith")
+    with pytest.raises(RuntimeError, match="500"):
+        client.detect_entities_full_text("fail")
+    with pytest.raises(RuntimeError, match="400"):
+        client._request("/detect", {'document': "John Smith"})
+    with pytest.raises(RuntimeError, match="404"):
+        client._request("/missing")
+    metrics = client.metrics()
+    assert (metrics['requests'], metrics['errors'], metrics['in_flight']) == (2, 1, 0)
+    assert metrics['characters'] == len("John Smith") + len("fail")
+# output counters per finished job, bad requests don't reach the model
+
+# input POST requests with a negative and a non-numeric Content-Length
+def test_invalid_content_length(server, client):
+    host, port = server.httpd.server_address[:2]
+    for length in ("-1", "ten"):
+        connection = http.client.HTTPConnection(host, port, timeout=5)
+        connection.putrequest("POST", "/detect")
+        connection.putheader("Content-Length", length)
+        connection.endheaders()
+        response = connection.getresponse()
+        assert response.status == 400
+        assert json.loads(response.read()) == {'error': "invalid Content-Length"}
+        connection.close()
+    assert client.metrics()['requests'] == 0
+# output 400 right away instead of a read that waits for the client to hang up
+
+# input ANONYMIZER_SERVER_URL pointing at a running server
+def test_main_uses_server_when_configured(server, monkeypatch):
+    import main
+    monkeypatch.setenv("ANONYMIZER_SERVER_URL", server.url)
+    detector = main.create_entity_detector()
+    assert isinstance(detector, ModelClient)
+    assert [e.text for e in detector.detect_entities_full_text("call John Smith")] == ["John Smith"]
+# output main.py detects through the server instead of loading the model
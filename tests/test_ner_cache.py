@@ -0,0 +1,74 @@
+"""Tests for the content-addressed NER result cache."""
+
+import pytest
+from components.entities import EntityMatch
+from components.ner_cache import NERCache
+
+@pytest.fixture
+def cache(tmp_path):
+    ner_cache = NERCache(tmp_path / "ner_cache.sqlite", memory_entries=2)
+    yield ner_cache
+    ner_cache.close()
+
+def make_key(text, **settings):
+    options = dict(model_name="model", threshold=0.8, backend_version="torch-2.0")
+    options.update(settings)
+    return NERCache.make_key(text, **options)
+
+# input same chunk text under different models, thresholds, backends and token ids
+def test_key_covers_text_and_settings():
+    key = make_key("John Smith")
+    assert key == make_key("John Smith")
+    assert len({key, make_key("John Smyth"), make_key("John Smith", model_name="other"),
+                make_key("John Smith", threshold=0.9), make_key("John Smith", backend_version="onnxruntime-1.17"),
+                make_key("John Smith", token_ids=[1, 2])}) == 6
+# output every setting that changes the entities changes the key
+
+# input entities of a chunk at offset 100, looked up again at offset 5000
+def test_hit_rebases_offsets(cache):
+    key = make_key("met John Smith")
+    assert cache.get(key, 100) is None
+    cache.put(key, [EntityMatch("John Smith", "PER", 104, 114, 0.99)], chunk_offset=100)
+    [entity] = cache.get(key, 5000)
+    assert (entity.text, entity.label, entity.start, entity.end) == ("John Smith", "PER", 5004, 5014)
+    assert entity.confidence == pytest.approx(0.99)
+    assert (cache.hits, cache.misses) == (1, 1)
+# output same entity at the chunk's new position
+
+# input chunks cached by one instance, read by a new one on the same file
+def test_disk_tier_survives_restart(tmp_path):
+    path = tmp_path / "ner_cache.sqlite"
+    first = NERCache(path)
+    first.put(make_key("chunk"), [EntityMatch("Acme", "ORG", 0, 4, 0.9)])
+    first.put(make_key("empty chunk"), [])
+    first.close()
+
+    second = NERCache(path)
+    assert [e.text for e in second.get(make_key("chunk"))] == ["Acme"]
+    assert second.get(make_key("empty chunk")) == []  # a cached empty result is still a hit
+    assert second.stats()['disk_hits'] == 2
+    assert second.get(make_key("chunk")) is not None
+    assert second.stats()['disk_hits'] == 2  # now served from memory
+    second.close()
+# output entities and empty results come back from disk, then from memory
+
+# input three chunks with room for two in memory
+def test_memory_tier_is_lru(cache):
+    for name in ("a", "b", "c"):
+        cache.put(make_key(name), [])
+    assert cache.stats()['memory_entries'] == 2
+    cache.get(make_key("a"))
+    assert cache.stats()['disk_hits'] == 1  # "a" was the least recently used
+# output oldest entry falls back to the disk tier
+
+# input more entity data than the disk budget allows
+def test_disk_tier_evicts_by_size(tmp_path):
+    cache = NERCache(tmp_path / "ner_cache.sqlite", memory_entries=0, max_disk_bytes=2000)
+    entities = [EntityMatch("Acme Corporation", "ORG", i * 20, i * 20 + 16, 0.9) for i in range(5)]
+    for i in range(40):
+        cache.put(make_key(f"chunk {i}"), entities)
+    assert cache.disk_bytes <= 2000
+    assert cache.get(make_key("chunk 39")) is not None
+    assert cache.get(make_key("chunk 0")) is None
+    cache.close()
+# output least recently used chunks are dropped, the newest are kept
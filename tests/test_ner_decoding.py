@@ -0,0 +1,49 @@
+"""Tests for NER logits decoding."""
+
+import numpy as np
+import pytest
+from components.ner_decoding import decode_token_logits
+
+id2label = {0: 'O', 1: 'LOC', 2: 'MISC', 3: 'ORG', 4: 'PER'}
+
+def one_hot_logits(label_ids, strength=10.0):
+    logits = np.zeros((len(label_ids), len(id2label)), dtype=np.float32)
+    for row, label_id in enumerate(label_ids):
+        logits[row, label_id] = strength
+    return logits
+
+# input tokens "John", "Smith", "works" with PER, PER, O predictions
+def test_adjacent_tokens_are_grouped():
+    offsets = [(0, 4), (5, 10), (11, 16)]
+    groups = decode_token_logits(one_hot_logits([4, 4, 0]), offsets, id2label)
+    assert len(groups) == 1
+    assert groups[0]['entity_group'] == 'PER'
+    assert (groups[0]['start'], groups[0]['end']) == (0, 10)
+    assert groups[0]['score'] > 0.99
+# output one PER group covering both tokens, O tokens are dropped
+
+# input different labels next to each other
+def test_label_change_starts_new_group():
+    offsets = [(0, 4), (5, 9), (10, 15)]
+    groups = decode_token_logits(one_hot_logits([3, 1, 1]), offsets, id2label)
+    assert [(g['entity_group'], g['start'], g['end']) for g in groups] == [('ORG', 0, 4), ('LOC', 5, 15)]
+# output separate ORG and LOC groups
+
+# input BIO labels where B- always starts a new entity
+def test_bio_labels():
+    bio = {0: 'O', 1: 'B-PER', 2: 'I-PER'}
+    logits = np.zeros((3, 3), dtype=np.float32)
+    logits[0, 1] = logits[1, 1] = logits[2, 2] = 10.0
+    groups = decode_token_logits(logits, [(0, 4), (5, 9), (10, 15)], bio)
+    assert [(g['entity_group'], g['start'], g['end']) for g in groups] == [('PER', 0, 4), ('PER', 5, 15)]
+# output B- prefix splits groups, I- continues them
+
+# input group score is the mean of token scores
+def test_group_score_is_mean():
+    logits = np.log(np.array([[0.1, 0.1, 0.1, 0.1, 0.6], [0.05, 0.05, 0.05, 0.05, 0.8]], dtype=np.float32))
+    groups = decode_token_logits(logits, [(0, 4), (5, 10)], id2label)
+    assert groups[0]['score'] == pytest.approx(0.7, abs=1e-5)
+# output averaged confidence
+
+def test_empty_window():
+    assert decode_token_logits(np.zeros((0, 5), dtype=np.float32), [], id2label) == []
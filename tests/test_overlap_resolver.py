@@ -0,0 +1,61 @@
+"""Tests for the sweep-line overlap resolver."""
+
+import pytest
+from components.entities import EntityMatch
+from components.overlap_resolver import OverlapResolver
+
+@pytest.fixture
+def entities():
+    return [
+        EntityMatch("John Doe", "PER", 0, 8, 0.95),
+        EntityMatch("John", "PER", 0, 4, 0.90),
+        EntityMatch("john doe", "PER", 0, 8, 0.80),  # exact duplicate from a chunk overlap
+        EntityMatch("Doe Inc", "ORG", 5, 12, 0.97),
+        EntityMatch("john@x.com", "EMAIL", 20, 30, 1.0),
+        EntityMatch("x.com", "ORG", 25, 30, 0.99),
+    ]
+
+# input duplicated and overlapping entities
+def test_highest_confidence_wins(entities):
+    resolver = OverlapResolver()
+    result = resolver.resolve(entities)
+    assert [(e.text, e.label) for e in result] == [("Doe Inc", "ORG"), ("john@x.com", "EMAIL")]
+    assert resolver.exact_duplicate_count == 1
+    assert resolver.overlap_removed_count == 3
+# output one entity per overlap group, in start order
+
+def test_earlier_same_text_entity_is_kept():
+    # only the overlapping "Ann" may be removed, not the equal-looking one earlier in the text
+    entities = [
+        EntityMatch("Ann", "PER", 0, 3, 0.9),
+        EntityMatch("Ann", "PER", 10, 13, 0.9),
+        EntityMatch("Ann Lee", "PER", 10, 17, 0.95),
+    ]
+    result = OverlapResolver().resolve(entities)
+    assert [(e.start, e.end) for e in result] == [(0, 3), (10, 17)]
+
+def test_prefer_regex_policy(entities):
+    result = OverlapResolver("prefer_regex").resolve(entities)
+    assert ("john@x.com", "EMAIL") in [(e.text, e.label) for e in result]
+    result = OverlapResolver("prefer_regex", regex_labels=[]).resolve(entities[4:])
+    assert [e.label for e in result] == ["EMAIL"]  # without regex labels confidence decides (1.0 > 0.99)
+
+def test_longest_policy():
+    entities = [EntityMatch("Acme", "ORG", 0, 4, 0.99), EntityMatch("Acme Corp", "ORG", 0, 9, 0.85)]
+    result = OverlapResolver("longest").resolve(entities)
+    assert [e.text for e in result] == ["Acme Corp"]
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        OverlapResolver("shortest")
+
+# input entities fed chunk by chunk with a moving frontier
+def test_incremental_matches_batch(entities):
+    resolver = OverlapResolver()
+    released = resolver.feed(entities[:4], frontier=10)
+    assert released == []  # "Doe Inc" ends after the frontier, it could still lose
+    released += resolver.feed(entities[4:], frontier=26)
+    assert [e.text for e in released] == ["Doe Inc"]
+    released += resolver.flush()
+    assert [(e.text, e.label) for e in released] == [(e.text, e.label) for e in OverlapResolver().resolve(entities)]
+# output same entities as resolving the whole list at once
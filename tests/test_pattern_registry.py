@@ -0,0 +1,82 @@
+"""Tests for the regex pattern registry and its combined scanner."""
+
+import pytest
+from components.chunk_processor import ChunkProcessor
+from components.pattern_registry import (
+    PatternEntry, PatternRegistry, default_registry, iban_valid, ipv4_valid, luhn_valid, scan_chunks_parallel
+)
+
+@pytest.fixture
+def registry():
+    return default_registry()
+
+def labels_found(entities):
+    return {(e.label, e.text) for e in entities}
+
+def test_validators():
+    assert luhn_valid("4111 1111 1111 1111")
+    assert not luhn_valid("4111 1111 1111 1112")
+    assert iban_valid("DE89 3704 0044 0532 0130 00")
+    assert not iban_valid("DE88 3704 0044 0532 0130 00")
+    assert ipv4_valid("192.168.0.1")
+    assert not ipv4_valid("300.1.1.1")
+
+# input text with one entity of every default label
+def test_single_pass_finds_all_labels(registry):
+    text = ("Mail john.doe@example.com or call 555-123-4567, see https://example.com/page. "
+            "IBAN DE89 3704 0044 0532 0130 00, card 4111-1111-1111-1111, SSN 123-45-6789, host 192.168.0.1.")
+    found = labels_found(registry.scan(text, 10))
+    assert found == {
+        ('EMAIL', 'john.doe@example.com'), ('PHONE', '555-123-4567'), ('URL', 'https://example.com/page.'),
+        ('IBAN', 'DE89 3704 0044 0532 0130 00'), ('CREDIT_CARD', '4111-1111-1111-1111'),
+        ('SSN', '123-45-6789'), ('IP', '192.168.0.1'),
+    }
+    email = next(e for e in registry.scan(text, 10) if e.label == 'EMAIL')
+    assert text[email.start - 10:email.end - 10] == email.text
+# output one entity per label with positions shifted by the chunk offset
+
+def test_checksum_rejects_lookalikes(registry):
+    text = "Order 4111 1111 1111 1112 from 999.1.1.1"
+    assert not {'CREDIT_CARD', 'IP'} & {e.label for e in registry.scan(text)}
+
+def test_triggers_select_active_entries(registry):
+    assert registry.active_labels("no digits, no mail, no links") == ()
+    assert registry.active_labels("write to a@b.co") == ('EMAIL',)
+    assert 'URL' in registry.active_labels("see http://x.org")
+    assert registry.scan("Plain prose without any candidates.") == []
+
+def test_scanner_cache_and_custom_entry():
+    registry = PatternRegistry([PatternEntry('TICKET', r'\bTCK-\d{4}\b', triggers=('TCK-',))])
+    assert registry.scanner(('TICKET',)) is registry.scanner(('TICKET',))
+    registry.register(PatternEntry('EMPLOYEE_ID', r'\bEMP\d{5}\b', triggers=('EMP',)))
+    assert labels_found(registry.scan("TCK-1234 by EMP00042")) == {('TICKET', 'TCK-1234'), ('EMPLOYEE_ID', 'EMP00042')}
+
+# input prose with a few numbers, and the same entries without a reach
+def test_regions_around_triggers(registry):
+    text = "A long stretch of plain prose. " * 20 + "Call 555-123-4567 or mail a@b.co now. " + "More prose here. " * 20
+    regions = registry.regions(text, registry.active_labels(text))
+    assert sum(end - start for start, end in regions) < len(text) // 4
+    assert all(text[start - 1].isspace() for start, _ in regions if start) and all(text[end].isspace() for _, end in regions)
+    assert labels_found(registry.scan(text)) == {('PHONE', '555-123-4567'), ('EMAIL', 'a@b.co')}
+    whole = registry.scanner(registry.active_labels(text)).scan(text)
+    assert [(e.start, e.end, e.label) for e in registry.scan(text)] == [(e.start, e.end, e.label) for e in whole]
+    custom = PatternRegistry([PatternEntry('TICKET', r'\bTCK-\d{4}\b', triggers=('TCK-',))])
+    assert custom.regions("see TCK-1234", ('TICKET',)) is None
+# output only the regions around the number and the address are scanned, with the whole-chunk result
+
+# input card numbers split by spaces and dashes across several digit runs
+def test_regions_keep_long_matches(registry):
+    text = "paid with card 4111 1111 1111 1111 and IBAN DE89 3704 0044 0532 0130 00 yesterday"
+    assert labels_found(registry.scan(text)) >= {('CREDIT_CARD', '4111 1111 1111 1111'),
+                                                  ('IBAN', 'DE89 3704 0044 0532 0130 00')}
+# output the matches are complete, not cut at a region edge
+
+# input multi-chunk text scanned in forked workers
+def test_parallel_scan_matches_sequential(registry):
+    text = "Contact jane@corp.org or 555-987-6543 about card 4111 1111 1111 1111. " * 300
+    chunks = ChunkProcessor().create_regex_safe_chunks(text, chunk_size=2000, overlap_size=100)
+    sequential = [registry.scan(chunk_text, offset) for chunk_text, offset in chunks]
+    parallel = scan_chunks_parallel(registry, text, chunks, num_workers=2)
+    assert [[(e.start, e.end, e.label) for e in chunk] for chunk in parallel] == \
+           [[(e.start, e.end, e.label) for e in chunk] for chunk in sequential]
+# output same entities in the same order
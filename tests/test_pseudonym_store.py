@@ -0,0 +1,100 @@
+"""Tests for the persistent pseudonym store behind EntityMapper."""
+
+import pytest
+from components.anonymizer import Anonymizer
+from components.deanonymizer import TextDeanonymizer
+from components.entities import EntityMatch
+from components.entity_mapper import EntityMapper
+from components.pseudonym_store import PseudonymStore
+
+@pytest.fixture
+def store(tmp_path):
+    pseudonym_store = PseudonymStore(tmp_path / "case.sqlite", cache_entries=2)
+    yield pseudonym_store
+    pseudonym_store.close()
+
+def anonymize(text, entities, store):
+    mapper = EntityMapper(store=store)
+    anonymizer = Anonymizer(text, entities, mapper)
+    anonymizer.anonymize()
+    return anonymizer.result_text, mapper.get_mapping()
+
+# input two documents of a case file, anonymized by different runs on the same store file
+def test_same_placeholder_in_every_document(tmp_path):
+    path = tmp_path / "case.sqlite"
+    first_store = PseudonymStore(path)
+    first, _ = anonymize("Acme Corporation hired John Smith.",
+                         [EntityMatch("Acme Corporation", "ORG", 0, 16, 0.9), EntityMatch("John Smith", "PER", 23, 33, 0.9)],
+                         first_store)
+    first_store.close()
+
+    second_store = PseudonymStore(path)
+    text = "Mary Jones sued ACME CORPORATION."
+    second, mapping = anonymize(text, [EntityMatch("Mary Jones", "PER", 0, 10, 0.9),
+                                       EntityMatch("ACME CORPORATION", "ORG", 16, 32, 0.9)], second_store)
+    assert first == "[ORG_1] hired [PER_1]."
+    assert second == "[PER_2] sued [ORG_1]."  # numbering continues where the store left off
+    assert TextDeanonymizer.deanonymize_text(second, mapping) == text
+    assert second_store.texts(["[ORG_1]", "[PER_2]", "[PER_9]"]) == {"[ORG_1]": "Acme Corporation", "[PER_2]": "Mary Jones"}
+    assert len(second_store) == 3
+    second_store.close()
+# output the organisation keeps [ORG_1], each document's own mapping deanonymizes it
+
+# input bulk insert and lookup
+def test_bulk_lookup_and_insert(store):
+    rows = [((f"name {i}", "PER"), f"[PER_{i + 1}]", f"Name {i}") for i in range(1000)]
+    assert store.insert_many(rows) == 1000
+    assert store.insert_many(rows[:10] + [(("other", "PER"), "[PER_1]", "Other")]) == 0  # key or placeholder taken
+    found = store.lookup_many([("name 5", "PER"), ("name 999", "PER"), ("unknown", "PER"), ("name 5", "ORG")])
+    assert found == {("name 5", "PER"): "[PER_6]", ("name 999", "PER"): "[PER_1000]"}
+    # imported placeholders are skipped by later allocations
+    assert store.get_or_create([(("new", "PER"), "New")]) == ["[PER_1001]"]
+# output only stored keys come back, new keys never reuse an imported placeholder
+
+# input more distinct keys than the memory tier holds
+def test_memory_tier_is_bounded(store):
+    keys = [((f"name {i}", "PER"), f"Name {i}") for i in range(5)]
+    placeholders = store.get_or_create(keys)
+    assert store.stats()['memory_entries'] == 2
+    assert store.lookup_many([key for key, _ in keys]) == dict(zip([key for key, _ in keys], placeholders))
+    stats = store.stats()
+    assert stats['disk_hits'] == 3 and stats['memory_entries'] == 2
+# output every key still resolves, the cold ones from SQLite
+
+# input a document that literally contains the next placeholder
+def test_reserved_placeholders_are_skipped(store):
+    result, mapping = anonymize("[PER_1] was written by Alice.", [EntityMatch("Alice", "PER", 23, 28, 0.9)], store)
+    assert result == "[PER_1] was written by [PER_2]."
+    assert mapping == {"[PER_2]": "Alice"}
+# output the store allocates past the literal token
+
+# input a stored placeholder written literally in a later document of the case file
+def test_literal_stored_placeholder_gets_document_alias(store):
+    first, _ = anonymize("Alice wrote it.", [EntityMatch("Alice", "PER", 0, 5, 0.9)], store)
+    assert first == "[PER_1] wrote it."
+    text = "The token [PER_1] is literal; Alice and Bob wrote it."
+    result, mapping = anonymize(text, [EntityMatch("Alice", "PER", 30, 35, 0.9), EntityMatch("Bob", "PER", 40, 43, 0.9)], store)
+    assert result == "The token [PER_1] is literal; [PER_3] and [PER_2] wrote it."
+    assert mapping == {"[PER_3]": "Alice", "[PER_2]": "Bob"}
+    assert TextDeanonymizer.deanonymize_text(result, mapping) == text
+    assert store.texts(["[PER_1]", "[PER_3]"]) == {"[PER_1]": "Alice"}  # the alias isn't stored
+# output the literal token stays as it is, Alice deanonymizes through this document's alias
+
+# input two connections to one file, as two processes would have
+def test_connections_agree(tmp_path):
+    path = tmp_path / "case.sqlite"
+    first, second = PseudonymStore(path, cache_entries=0), PseudonymStore(path, cache_entries=0)
+    a = first.get_or_create([(("acme", "ORG"), "Acme"), (("globex", "ORG"), "Globex")])
+    b = second.get_or_create([(("globex", "ORG"), "Globex"), (("initech", "ORG"), "Initech"), (("acme", "ORG"), "ACME")])
+    assert a == ["[ORG_1]", "[ORG_2]"]
+    assert b == ["[ORG_2]", "[ORG_3]", "[ORG_1]"]
+    first.close()
+    second.close()
+# output shared keys get the stored placeholder, new ones continue the shared counter
+
+def test_mapper_single_entity_path(store):
+    mapper = EntityMapper(store=store)
+    assert mapper.get_or_create_placeholder(EntityMatch("Paris", "LOC", 0, 5, 0.9)) == "[LOC_1]"
+    assert EntityMapper(store=store).get_or_create_placeholder(EntityMatch("paris", "LOC", 9, 14, 0.9)) == "[LOC_1]"
+    with pytest.raises(ValueError):
+        PseudonymStore(store.path, cache_entries=-1)
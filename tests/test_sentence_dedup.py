@@ -0,0 +1,76 @@
+"""Tests for sentence deduplication before NER."""
+
+import re
+import pytest
+from components.entities import EntityMatch
+from components.sentence_dedup import SentenceDeduplicator, segment_sentences
+
+class FakeNER:
+    """Finds 'John Smith' and 'Acme Corp' and records every text it was given."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        return [EntityMatch(m.group(), 'PER' if m.group() == 'John Smith' else 'ORG', m.start(), m.end(), 0.99)
+                for m in re.finditer(r'John Smith|Acme Corp', text)]
+
+@pytest.fixture
+def deduplicator():
+    return SentenceDeduplicator()
+
+# input sentences, line breaks and an email whose dot is no sentence end
+def test_segment_sentences():
+    text = "  First one. Mail john.doe@example.com now!\nno punctuation here\n\nLast?"
+    assert [text[s:e] for s, e in segment_sentences(text)] == [
+        "First one.", "Mail john.doe@example.com now!", "no punctuation here", "Last?"]
+# output stripped sentence spans
+
+# input hard-wrapped lines, an entity split by a single line break
+def test_single_line_breaks_dont_split_sentences():
+    text = "Our office moved to New\nYork last year and John\nSmith runs it.\n\nSecond paragraph"
+    assert [text[s:e] for s, e in segment_sentences(text)] == [
+        "Our office moved to New\nYork last year and John\nSmith runs it.", "Second paragraph"]
+# output one sentence per sentence end or blank line, the wrapped names stay whole
+
+# input the repeated sentence from test_performanse
+def test_repeated_sentences_run_once(deduplicator):
+    text = "John Smith works at Acme Corp. " * 100
+    ner = FakeNER()
+    entities = deduplicator.detect(text, ner)
+    assert ner.calls == ["John Smith works at Acme Corp."]
+    assert [(e.start, e.end, e.label) for e in entities] == [(e.start, e.end, e.label) for e in FakeNER()(text)]
+    assert all(text[e.start:e.end] == e.text for e in entities)
+    assert deduplicator.stats['sentences'] == 100
+    assert deduplicator.stats['unique_sentences'] == 1
+    assert deduplicator.stats['dedup_ratio'] == pytest.approx(0.99)
+    assert deduplicator.stats['estimated_time_saved'] >= 0
+# output entities on every copy at the right offsets, model ran on one sentence
+
+# input mixed distinct and repeated sentences with different surrounding whitespace
+def test_projection_onto_copies(deduplicator):
+    text = "Dear John Smith,\n\nWelcome.\n  Dear John Smith,\n\nAcme Corp thanks you.\nWelcome.\nAcme Corp thanks you."
+    ner = FakeNER()
+    entities = deduplicator.detect(text, ner)
+    assert ner.calls == ["Dear John Smith,\nWelcome.\nAcme Corp thanks you."]
+    assert [(e.text, e.start) for e in entities] == [(m.group(), m.start()) for m in re.finditer(r'John Smith|Acme Corp', text)]
+# output every copy gets the entities of its sentence
+
+# input text without repeated sentences
+def test_unique_text_is_used_as_it_is(deduplicator):
+    text = "John Smith works at Acme Corp. He lives in London."
+    ner = FakeNER()
+    entities = deduplicator.detect(text, ner)
+    assert ner.calls == [text]
+    assert [e.text for e in entities] == ["John Smith", "Acme Corp"]
+    assert deduplicator.stats['applied'] is False
+# output model sees the original text, no projection
+
+# input packed entity that runs into the next sentence
+def test_entity_across_sentences_dropped():
+    def ner(text):
+        return [EntityMatch("end.\nNext", "MISC", 4, 13, 0.9)]
+    entities = SentenceDeduplicator().detect("The end.\nNext one.\nThe end.\nNext one.", ner)
+    assert entities == []
+# output no entity without a position in the original text
@@ -0,0 +1,45 @@
+"""Tests for the one-pass span rewriter."""
+
+import io
+import pytest
+from components.span_rewriter import OffsetMap, rewrite_spans, spans_are_disjoint
+
+# input sorted, non-overlapping spans
+def test_rewrite_spans_basic():
+    text = "Call Bob at home, Bob."
+    result, offset_map = rewrite_spans(text, [(5, 8, "[PER_1]"), (18, 21, "[PER_1]")])
+    assert result == "Call [PER_1] at home, [PER_1]."
+    assert len(offset_map) == 2
+# output text with every span replaced
+
+def test_rewrite_spans_to_output():
+    output = io.StringIO()
+    result, _ = rewrite_spans("abc def", [(0, 3, "X")], output)
+    assert result is None
+    assert output.getvalue() == "X def"
+
+def test_rewrite_no_spans():
+    result, offset_map = rewrite_spans("unchanged", [])
+    assert result == "unchanged"
+    assert len(offset_map) == 0
+    assert offset_map.to_anonymized(4) == 4
+
+# input positions before, inside and after replaced spans
+def test_offset_map_positions():
+    offset_map = OffsetMap()
+    offset_map.add(5, 8, 5, 12)  # "Bob" -> "[PER_1]"
+    assert offset_map.to_anonymized(2) == 2
+    assert offset_map.to_anonymized(6) == 5
+    assert offset_map.to_anonymized(10) == 14
+    assert offset_map.to_original(7) == 5
+    assert offset_map.to_original(14) == 10
+# output mapped positions in both directions
+
+@pytest.mark.parametrize("spans, expected", [
+    ([(0, 3, "A"), (3, 5, "B")], True),
+    ([(0, 3, "A"), (2, 5, "B")], False),
+    ([(0, 3, "A"), (0, 3, "B")], False),
+    ([], True),
+])
+def test_spans_are_disjoint(spans, expected):
+    assert spans_are_disjoint(spans) == expected
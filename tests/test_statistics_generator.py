@@ -49,3 +49,32 @@ def test_statistics_generator_empty_entities(statistics_generator):
     assert stats['confidence_stats'] == {}
     assert stats['entity_types_found'] == []
     # output results of empty entities and mapping
+
+from components.statistics_generator import StatisticsAggregator
+
+# input the same entities added chunk by chunk into two aggregators, then merged
+def test_statistics_aggregator_merge():
+    entities = [EntityMatch('x', 'PER' if i % 3 else 'ORG', i, i + 1, 0.5 + i / 200) for i in range(100)]
+    single = StatisticsGenerator.generate_statistics(entities, {})
+    first, second = StatisticsAggregator(), StatisticsAggregator()
+    for i in range(0, 100, 10):
+        (first if i % 20 else second).add(entities[i:i + 10])
+    merged = first.merge(second).statistics()
+    assert merged['by_category'] == single['by_category'] == {'ORG': 34, 'PER': 66}
+    assert merged['confidence_histograms'] == single['confidence_histograms']
+    assert sum(merged['confidence_histograms']['PER']) == 66
+    for label, stats in single['confidence_stats'].items():
+        assert merged['confidence_stats'][label]['average confidence'] == pytest.approx(stats['average confidence'])
+        assert merged['confidence_stats'][label]['min confidence'] == stats['min confidence']
+        assert merged['confidence_stats'][label]['max confidence'] == stats['max confidence']
+    # output merged aggregators agree with one pass over all entities
+
+# input uniformly spread confidences
+def test_statistics_aggregator_quantiles():
+    aggregator = StatisticsAggregator().add(EntityMatch('x', 'PER', i, i + 1, i / 1000) for i in range(1001))
+    quantiles = aggregator.statistics()['confidence_quantiles']['PER']
+    assert quantiles['p50'] == pytest.approx(0.5, abs=0.01)
+    assert quantiles['p90'] == pytest.approx(0.9, abs=0.01)
+    assert quantiles['p99'] == pytest.approx(0.99, abs=0.01)
+    assert aggregator.statistics()['confidence_histograms']['PER'][-1] == 101  # 0.9 up to and including 1.0
+    # output quantiles within one histogram bin of the exact ones
@@ -0,0 +1,73 @@
+"""Tests for the streaming anonymization pipeline."""
+
+import gzip
+import io
+import re
+import pytest
+from components.anonymizer import Anonymizer
+from components.deanonymizer import TextDeanonymizer
+from components.entities import EntityMatch
+from components.entity_mapper import EntityMapper
+from components.streaming_pipeline import StreamingAnonymizer, scan_placeholder_tokens
+
+class RegexDetector:
+    """Detector stand-in: names and emails found by regex, raw and undeduplicated like EntityDetector."""
+    overlap_policy = 'confidence'
+    patterns = {'EMAIL': re.compile(r'\b[\w.]+@[\w.]+\.[a-z]{2,}\b')}
+    NAME_PATTERN = re.compile(r'\b(?:Alice|Bob Stone|Carol)\b')
+
+    def __init__(self):
+        self.calls = 0
+
+    def detect_raw_entities(self, text, offset=0):
+        self.calls += 1
+        entities = [EntityMatch(m.group(), 'PER', m.start() + offset, m.end() + offset, 0.9)
+                    for m in self.NAME_PATTERN.finditer(text)]
+        entities += [EntityMatch(m.group(), 'EMAIL', m.start() + offset, m.end() + offset, 1.0)
+                     for m in self.patterns['EMAIL'].finditer(text)]
+        return entities
+
+@pytest.fixture
+def text():
+    lines = [f"Line {i}: Alice wrote to Bob Stone at bob.stone@example.com, Carol replied.\n" for i in range(400)]
+    return "".join(lines)
+
+# input long text streamed through small windows
+def test_stream_matches_in_memory_anonymizer(text):
+    output = io.StringIO()
+    detector = RegexDetector()
+    mapper = EntityMapper()
+    stats = StreamingAnonymizer(detector, mapper, window_chars=1000, context_chars=100).anonymize_stream(io.StringIO(text), output)
+
+    full_mapper = EntityMapper()
+    anonymizer = Anonymizer(text, [e for e in detector.detect_raw_entities(text)], full_mapper)
+    anonymizer.anonymize()
+    assert output.getvalue() == anonymizer.result_text
+    assert TextDeanonymizer.deanonymize_text(output.getvalue(), mapper.get_mapping()) == text
+    assert stats['characters'] == len(text)
+    assert stats['windows'] > 10
+    assert stats['by_category'] == {'PER': 1200, 'EMAIL': 400}
+    assert stats['statistics']['total_entities'] == 1600 and set(stats['statistics']['confidence_quantiles']) == {'PER', 'EMAIL'}
+# output same anonymized text, both number placeholders in document order
+
+def test_window_must_exceed_context():
+    with pytest.raises(ValueError):
+        StreamingAnonymizer(RegexDetector(), EntityMapper(), window_chars=100, context_chars=50)
+
+# input gzip-compressed file containing a placeholder-like token
+def test_anonymize_compressed_file(tmp_path):
+    source = tmp_path / "input.txt.gz"
+    with gzip.open(source, 'wt', encoding='utf-8') as f:
+        f.write("[PER_1] is a literal token. Alice met Carol.\n" * 50)
+    target = tmp_path / "output.txt"
+    mapper = EntityMapper()
+    StreamingAnonymizer(RegexDetector(), mapper, window_chars=500, context_chars=50).anonymize_file(source, target)
+    anonymized = target.read_text(encoding='utf-8')
+    assert '[PER_1]' not in mapper.get_mapping()  # reserved by the pre-scan
+    assert anonymized.count('[PER_1]') == 50  # only the literal tokens
+    assert 'Alice' not in anonymized
+# output anonymized text without placeholder collisions
+
+def test_scan_placeholder_tokens_across_blocks():
+    tokens = scan_placeholder_tokens(io.StringIO("abc [PER_12] def [ORG_3]"), block_size=6)
+    assert tokens == {'[PER_12]', '[ORG_3]'}